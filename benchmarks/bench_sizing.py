@@ -0,0 +1,110 @@
+""" pytest-benchmark suite for sizing, BOM and LCA. The files are named bench_*.py so that the normal test run does
+not pick them up, run them explicitly and compare against the stored baseline with
+
+    python -m pytest benchmarks/bench_sizing.py --benchmark-json=benchmark.json
+    python -m benchmarks.compare_benchmarks compare benchmarks/baselines/baseline.json benchmark.json
+
+Peak memory is measured with tracemalloc in a separate, untimed call and stored in extra_info."""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator, \
+    ElectricMachineBom
+from lca.EM_production_environmental_impact import get_pei_matrix, get_pei_matrix_batch
+from sizing.batch_sizing import size_motor_batch, get_bom_array_batch
+from sizing.design_sweep import size_sweep_chunk
+from sizing.motor_sizing_tool import MotorSizingTool
+from sizing.response_surface import RESPONSE_SURFACE_FIELDS, ResponseSurface
+
+TOPOLOGIES = {'radial_pm': (True, True), 'radial_induction': (False, True), 'x_motor': (True, False)}
+BATCH_SIZES = (1000, 100000, 1000000)
+# queries per call of the response surface against the exact sizing and LCA
+QUERY_SIZES = (1, 32, 1000)
+
+
+def record_peak_memory(benchmark, function, *args):
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['peak_memory_bytes'] = peak
+
+
+def size_single_design(PM_case, radial_case):
+    rotor = ConceptRotor(name='rotor')
+    rotor.dl_ratio = 1.0
+    sizing_tool = MotorSizingTool(ConceptMotorAssembly('motor', rotor, ConceptStator(name='stator')),
+                                  PM_case=PM_case, radial_case=radial_case)
+    return sizing_tool.size_motor()
+
+
+def get_requirements(number_of_designs):
+    rng = np.random.default_rng(0)
+    return dict(max_torque=rng.uniform(50.0, 500.0, number_of_designs),
+                base_speed=rng.uniform(1000.0, 6000.0, number_of_designs),
+                maximum_rotor_speed=rng.uniform(8000.0, 20000.0, number_of_designs),
+                average_shear_stress=rng.uniform(40.0, 120.0, number_of_designs),
+                dl_ratio=rng.uniform(0.5, 3.0, number_of_designs),
+                PM_case=rng.random(number_of_designs) < 0.5,
+                radial_case=rng.random(number_of_designs) < 0.7)
+
+
+def size_and_assess_batch(requirements):
+    result = size_motor_batch(**requirements)
+    return get_pei_matrix_batch(get_bom_array_batch(result))
+
+
+@pytest.mark.parametrize('topology', TOPOLOGIES)
+def test_size_motor(benchmark, topology):
+    PM_case, radial_case = TOPOLOGIES[topology]
+    record_peak_memory(benchmark, size_single_design, PM_case, radial_case)
+    benchmark(size_single_design, PM_case, radial_case)
+
+
+def test_get_bom_as_array(benchmark):
+    bom = ElectricMachineBom(name="test bom", electrical_steel=107, other_steel=10, aluminum=16, copper=10,
+                             ndfeb=2.5, ferrite=0)
+    record_peak_memory(benchmark, bom.get_bom_as_array)
+    benchmark(bom.get_bom_as_array)
+
+
+def test_get_pei_matrix(benchmark):
+    bom = ElectricMachineBom(name="test bom", electrical_steel=107, other_steel=10, aluminum=16, copper=10,
+                             ndfeb=2.5, ferrite=0)
+    record_peak_memory(benchmark, get_pei_matrix, bom)
+    benchmark(get_pei_matrix, bom)
+
+
+@pytest.mark.parametrize('number_of_designs', BATCH_SIZES)
+def test_batch_sweep(benchmark, number_of_designs):
+    requirements = get_requirements(number_of_designs)
+    record_peak_memory(benchmark, size_and_assess_batch, requirements)
+    benchmark.extra_info['designs'] = number_of_designs
+    benchmark.pedantic(size_and_assess_batch, args=(requirements,), rounds=3 if number_of_designs >= 1000000 else 10,
+                       warmup_rounds=1)
+
+
+@pytest.fixture(scope='module')
+def response_surface(tmp_path_factory):
+    return ResponseSurface.build(str(tmp_path_factory.mktemp('surface')), tolerance=1e-2)
+
+
+@pytest.mark.parametrize('method', ('surface', 'exact'))
+@pytest.mark.parametrize('number_of_queries', QUERY_SIZES)
+def test_response_surface_query(benchmark, response_surface, method, number_of_queries):
+    rng = np.random.default_rng(0)
+    queries = {'max_torque': rng.uniform(50.0, 500.0, number_of_queries),
+               'base_speed': rng.uniform(1000.0, 6000.0, number_of_queries),
+               'average_shear_stress': rng.uniform(40.0, 120.0, number_of_queries),
+               'dl_ratio': rng.uniform(0.5, 3.0, number_of_queries)}
+    benchmark.extra_info['designs'] = number_of_queries
+    if method == 'surface':
+        benchmark(response_surface.query, **queries)
+    else:
+        benchmark(size_sweep_chunk, dict(queries, **response_surface.fixed_inputs), lca=True,
+                  fields=RESPONSE_SURFACE_FIELDS)
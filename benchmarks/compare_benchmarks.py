@@ -0,0 +1,82 @@
+""" Stores and compares benchmark baselines.
+
+    python -m benchmarks.compare_benchmarks save benchmark.json benchmarks/baselines/baseline.json
+    python -m benchmarks.compare_benchmarks compare benchmarks/baselines/baseline.json benchmark.json
+
+benchmark.json is written by pytest --benchmark-json. A baseline only keeps the mean time and the peak memory of
+every benchmark. compare exits with status 1 when a benchmark got slower or needs more memory than the baseline
+by more than the thresholds."""
+
+import argparse
+import json
+import sys
+
+
+def load_results(path: str) -> dict:
+    """Benchmark name -> {'mean': seconds, 'peak_memory_bytes': bytes}, from a pytest-benchmark json or a baseline"""
+
+    with open(path) as results_file:
+        results = json.load(results_file)
+    if 'benchmarks' not in results:
+        return results
+    return {benchmark['fullname']: {'mean': benchmark['stats']['mean'],
+                                    'peak_memory_bytes': benchmark['extra_info'].get('peak_memory_bytes')}
+            for benchmark in results['benchmarks']}
+
+
+def save_baseline(results_path: str, baseline_path: str):
+    with open(baseline_path, 'w') as baseline_file:
+        json.dump(load_results(results_path), baseline_file, indent=1, sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, time_threshold: float = 0.1, memory_threshold: float = 0.1) -> list:
+    """
+    Regressions of current against baseline
+
+    :param float time_threshold: allowed relative increase of the mean time (loss of throughput)
+    :param float memory_threshold: allowed relative increase of the peak memory
+    :return: list of (benchmark name, metric, baseline value, current value)
+    """
+
+    regressions = []
+    for name, reference in sorted(baseline.items()):
+        if name not in current:
+            continue
+        result = current[name]
+        if result['mean'] > reference['mean'] * (1.0 + time_threshold):
+            regressions.append((name, 'mean', reference['mean'], result['mean']))
+        if reference.get('peak_memory_bytes') and result.get('peak_memory_bytes') and \
+                result['peak_memory_bytes'] > reference['peak_memory_bytes'] * (1.0 + memory_threshold):
+            regressions.append((name, 'peak_memory_bytes', reference['peak_memory_bytes'],
+                                result['peak_memory_bytes']))
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    save_parser = commands.add_parser('save', help='store a pytest-benchmark json as baseline')
+    save_parser.add_argument('results')
+    save_parser.add_argument('baseline')
+    compare_parser = commands.add_parser('compare', help='compare a pytest-benchmark json against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--time-threshold', type=float, default=0.1)
+    compare_parser.add_argument('--memory-threshold', type=float, default=0.1)
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'save':
+        save_baseline(arguments.results, arguments.baseline)
+        return 0
+
+    regressions = compare(load_results(arguments.baseline), load_results(arguments.results),
+                          arguments.time_threshold, arguments.memory_threshold)
+    for name, metric, reference, value in regressions:
+        print(F"REGRESSION {name} {metric}: {reference:.4g} -> {value:.4g} ({value / reference - 1:+.1%})")
+    if not regressions:
+        print("no regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
+from sizing.batch_sizing import size_motor_batch
 from sizing.motor_sizing_tool import MotorSizingTool
+from sizing.material_database import get_topology_index
 from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 
 
 def get_concept_motor(dl_ratio) -> ConceptMotorAssembly:
@@ -19,7 +19,22 @@ def get_concept_motor(dl_ratio) -> ConceptMotorAssembly:
 
 
 def size_syn_rel_machine():
-    pass
+    """ MotorSizingTool only knows the PM_case / radial_case topologies, reluctance machines are sized by the
+    topology kernels of the batch engine. The shear stress of PMaSynRel machines is lower than for IPM machines,
+    30 to 50 kPa, please review the confluence page for more details."""
+
+    result = size_motor_batch(max_torque=200.0,
+                              base_speed=3000.0,
+                              maximum_rotor_speed=12000.0,
+                              average_shear_stress=[40.0, 40.0],
+                              dl_ratio=1.0,
+                              topology=[get_topology_index('SynRel'), get_topology_index('PMaSynRel')])
+
+    for index, name in enumerate(('SynRel', 'PMaSynRel')):
+        print("{}: stator outer diameter = {:.4f} m, stack length = {:.4f} m, total weight = {:.2f} kg, "
+              "ferrite = {:.2f} kg".format(name, result['stator_outer_diameter'][index],
+                                           result['rotor_stack_length'][index],
+                                           result['total_motor_weight'][index], result['ferrite'][index]))
 
 # def size_machine(dl_ratio, average_shear_stress, mrs, split_ratio):
 
@@ -41,7 +56,8 @@ def size_radial_machine():
                                                    base_speed=3000.0,
                                                    airgap_flux_density=1.,
                                                    PM_case=True,                     # not induction machine
-                                                   radial_case=False                  # if false, this means we are designing x-motor
+                                                   radial_case=False,                 # if false, this means we are designing x-motor
+                                                   verbose=True
                                                    )
 
     """ Note: the shear stress can be changed according to the E-machine topology. Referring to IPM the shear stress is varied
@@ -63,6 +79,11 @@ def size_radial_machine():
     plot_motor(motor_assembly)
 
 def plot_motor(sized_motor: ConceptMotorAssembly):
+    # matplotlib is only imported when a plot is requested, it is slow to import and needs a display for plt.show()
+    # for many designs or headless machines use sizing.cross_section_sheets.render_cross_sections instead
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+
     rotor = sized_motor.rotor
     stator = sized_motor.stator
 
@@ -109,4 +130,5 @@ def plot_motor(sized_motor: ConceptMotorAssembly):
     plt.show()
 
 
-size_radial_machine()
+if __name__ == "__main__":
+    size_radial_machine()
@@ -0,0 +1,139 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+""" Lightweight per-stage timers and call counters for the sizing and LCA pipeline. Functions decorated with
+@instrumented only check PROFILER.enabled when the profiler is off, so instrumentation can stay in place in
+production code. When it is on, the nested stages are recorded as call stacks, which can be exported as JSON or
+in the collapsed-stack format read by flamegraph.pl and speedscope. Every thread keeps its own stage stack, so
+stages running on executor threads or in concurrent requests record their own call paths.
+
+    PROFILER.enable()
+    sizing_tool.size_motor()
+    PROFILER.disable()
+    PROFILER.to_json('profile.json')
+"""
+
+
+class StageStatistics:
+    """Call count, total (inclusive) time and self (exclusive) time of a stage, times in seconds"""
+
+    __slots__ = ('calls', 'total_time', 'self_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'total_time': self.total_time, 'self_time': self.self_time}
+
+
+class Profiler:
+    """Collects timings of instrumented stages while enabled, from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.stacks = {}
+        # stage names and child times of the open stages, per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Drops the recorded statistics, stages open in other threads are recorded when they end"""
+
+        with self._lock:
+            self.stages = {}
+            self.stacks = {}
+
+    def _get_thread_stack(self) -> tuple:
+        local = self._local
+        if not hasattr(local, 'stack'):
+            local.stack, local.child_time = [], []
+        return local.stack, local.child_time
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the body of a with block as stage name, a no-op while the profiler is disabled"""
+
+        if not self.enabled:
+            yield
+            return
+        stack, child_times = self._get_thread_stack()
+        stack.append(name)
+        child_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            child_time = child_times.pop()
+            path = ';'.join(stack)
+            stack.pop()
+            if child_times:
+                child_times[-1] += elapsed
+
+            with self._lock:
+                statistics = self.stages.get(name)
+                if statistics is None:
+                    statistics = self.stages[name] = StageStatistics()
+                statistics.calls += 1
+                statistics.total_time += elapsed
+                statistics.self_time += elapsed - child_time
+                self.stacks[path] = self.stacks.get(path, 0.0) + elapsed - child_time
+
+    def report(self) -> dict:
+        """Stage statistics sorted by total time, and self time per call stack"""
+
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1].total_time, reverse=True)
+            return {'stages': {name: statistics.as_dict() for name, statistics in stages},
+                    'stacks': dict(self.stacks)}
+
+    def to_json(self, path: str = None) -> str:
+        text = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, 'w') as report_file:
+                report_file.write(text)
+        return text
+
+    def to_collapsed(self, path: str = None) -> str:
+        """Collapsed-stack lines 'outer;inner <self time in microseconds>', the input format of flamegraph.pl"""
+
+        stacks = self.report()['stacks']
+        text = ''.join(F"{stack} {round(self_time * 1e6)}\n" for stack, self_time in sorted(stacks.items()))
+        if path is not None:
+            with open(path, 'w') as report_file:
+                report_file.write(text)
+        return text
+
+
+PROFILER = Profiler()
+
+
+def instrumented(name: str = None):
+    """Decorator recording calls of a function as a stage of PROFILER, named after the function by default"""
+
+    def decorator(function):
+        stage_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER.stage(stage_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,198 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS, EM_PEI_KG
+from sizing.batch_sizing import BOM_FIELDS, SIZING_INPUT_FIELDS
+from sizing.design_sweep import iter_sample_chunks, size_sweep_chunk, sweep_length
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import TOPOLOGIES, get_topology_from_flags, get_topology_index
+
+# Notes: -production environmental impact of whole vehicle programmes: variant tables (one row per motor variant with
+#         its production volume) are sized chunk by chunk and reduced to totals per group, e.g. per programme, year
+#         and topology
+#        -only the volume weighted BOM masses are summed per group; the impacts are linear in the BOM, so the impacts
+#         of a group (and their split by BOM material) follow from its BOM totals exactly
+#        -memory is bounded by the chunk size and the number of groups, partial aggregates of different chunks,
+#         tables or processes are merged by adding them up
+#        -variants which cannot be sized (a NaN mass, e.g. from NaN inputs) or have a NaN volume are left out of the
+#         sums and counted as invalid_variants of their group
+#        -the topology column holds TOPOLOGIES indices or names (e.g. 'SynRel'), names are mapped to indices before the
+#         sizing and the grouping, so both kinds of tables add up to the same groups
+
+# inputs of the sizing, variant table columns which are not given take the SWEEP_DEFAULTS values
+FLEET_SIZING_INPUTS = SIZING_INPUT_FIELDS + ('electrical_steel', 'conductor', 'magnet', 'topology')
+FLEET_GROUP_BY = ('programme', 'year', 'topology')
+# sums kept per group, the BOM masses and the motor weight are multiplied by the production volume
+FLEET_AGGREGATE_COLUMNS = ('volume', 'variants', 'invalid_variants') + BOM_FIELDS + ('total_motor_weight',)
+FLEET_MASS_FIELDS = FLEET_AGGREGATE_COLUMNS[3:]
+
+
+def _get_topology_indices(topology):
+    """TOPOLOGIES indices of a topology column of indices or names"""
+
+    topology = np.asarray(topology)
+    if topology.dtype.kind not in 'USO':
+        return topology
+    names, inverse = np.unique(topology, return_inverse=True)
+    return np.array([get_topology_index(str(name)) for name in names])[inverse].reshape(topology.shape)
+
+
+class FleetAggregate:
+    """
+    Mergeable group-by totals of a motor fleet
+
+    :param group_by: variant table columns the totals are grouped by, topology is derived from PM_case and
+        radial_case when the table has no topology column
+    """
+
+    def __init__(self, group_by=FLEET_GROUP_BY):
+        self.group_by = tuple(group_by)
+        # group key tuple -> sums, ordered as FLEET_AGGREGATE_COLUMNS
+        self.groups = {}
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add_chunk(self, chunk: dict):
+        """Sizes a chunk of a variant table and adds it to the totals"""
+
+        if 'volume' not in chunk:
+            raise KeyError("the variant table has no volume column")
+        length = sweep_length(chunk)
+        if 'topology' in chunk:
+            chunk = dict(chunk, topology=_get_topology_indices(chunk['topology']))
+        inputs = {name: chunk[name] for name in FLEET_SIZING_INPUTS if name in chunk}
+        result = size_sweep_chunk(inputs, fields=FLEET_MASS_FIELDS)
+        masses = {field: np.broadcast_to(result[field], (length,)) for field in FLEET_MASS_FIELDS}
+        volume = np.broadcast_to(np.asarray(chunk['volume'], dtype=float), (length,))
+        valid = ~np.isnan(volume)
+        for values in masses.values():
+            valid &= ~np.isnan(values)
+
+        keys = []
+        for name in self.group_by:
+            if name == 'topology' and 'topology' not in chunk:
+                value = get_topology_from_flags(chunk.get('PM_case', True), chunk.get('radial_case', True))
+            else:
+                value = chunk[name]
+            keys.append(np.broadcast_to(value, (length,)))
+
+        # one integer code per row for the combination of its keys
+        codes, uniques = np.zeros(length, dtype=np.int64), []
+        for key in keys:
+            unique, inverse = np.unique(key, return_inverse=True)
+            codes = codes * unique.size + inverse
+            uniques.append(unique)
+        group_codes, group_index = np.unique(codes, return_inverse=True)
+
+        sums = np.empty((group_codes.size, len(FLEET_AGGREGATE_COLUMNS)))
+        valid_index = group_index[valid]
+        sums[:, 0] = np.bincount(valid_index, weights=volume[valid], minlength=group_codes.size)
+        sums[:, 1] = np.bincount(valid_index, minlength=group_codes.size)
+        sums[:, 2] = np.bincount(group_index[~valid], minlength=group_codes.size)
+        for column, field in enumerate(FLEET_MASS_FIELDS, 3):
+            sums[:, column] = np.bincount(valid_index, weights=volume[valid] * masses[field][valid],
+                                          minlength=group_codes.size)
+
+        key_indices = np.unravel_index(group_codes, [unique.size for unique in uniques]) if uniques else ()
+        for group, group_sums in enumerate(sums):
+            key = tuple(unique[indices[group]].item() for unique, indices in zip(uniques, key_indices))
+            self._add(key, group_sums)
+
+    def _add(self, key, sums):
+        if key in self.groups:
+            self.groups[key] = self.groups[key] + sums
+        else:
+            self.groups[key] = np.array(sums, dtype=float)
+
+    def merge(self, other):
+        """Adds the totals of another FleetAggregate with the same grouping, returns self"""
+
+        if other.group_by != self.group_by:
+            raise ValueError(F"cannot merge totals grouped by {other.group_by} into totals grouped by {self.group_by}")
+        for key, sums in other.groups.items():
+            self._add(key, sums)
+        return self
+
+    def get_totals(self, by_material: bool = False, impact_factors=EM_PEI_KG) -> dict:
+        """
+        Totals as a table, one row per group sorted by the group keys, topologies by name
+
+        :param bool by_material: one row per group and BOM material, with its mass and the impacts it causes,
+            instead of one row per group
+        :param impact_factors: 12x10 per kg impact factors, defaults to EM_PEI_KG
+        :return: dict of 1D arrays: the group_by columns, volume, variants, invalid_variants (left out of all
+            other totals), total_motor_weight and the BOM_FIELDS masses (or material and mass when by_material), and
+            the EM_PEI_FIELDS impacts
+        """
+
+        keys = sorted(self.groups)
+        sums = np.array([self.groups[key] for key in keys]).reshape(len(keys), len(FLEET_AGGREGATE_COLUMNS))
+        bom = sums[:, 3:3 + len(BOM_FIELDS)]
+        impact_factors = np.asarray(impact_factors, dtype=float)
+
+        table = {}
+        for column, name in enumerate(self.group_by):
+            values = [key[column] for key in keys]
+            if name == 'topology':
+                values = [TOPOLOGIES['name'][value] for value in values]
+            table[name] = np.array(values)
+        if not by_material:
+            table.update({field: sums[:, column] for column, field in enumerate(FLEET_AGGREGATE_COLUMNS)})
+            impacts = bom @ impact_factors.T
+            table.update({field: impacts[:, column] for column, field in enumerate(EM_PEI_FIELDS)})
+            return table
+
+        table = {name: np.repeat(values, len(BOM_FIELDS)) for name, values in table.items()}
+        table['material'] = np.tile(np.array(BOM_FIELDS), len(keys))
+        table['mass'] = bom.ravel()
+        # impact of group g caused by material m: factors[:, m] * bom[g, m]
+        impacts = (bom[:, :, None] * impact_factors.T[None, :, :]).reshape(-1, len(EM_PEI_FIELDS))
+        table.update({field: impacts[:, column] for column, field in enumerate(EM_PEI_FIELDS)})
+        return table
+
+
+def _aggregate_chunk(chunk: dict, group_by) -> FleetAggregate:
+    aggregate = FleetAggregate(group_by)
+    aggregate.add_chunk(chunk)
+    return aggregate
+
+
+@instrumented()
+def aggregate_fleet(variant_tables, group_by=FLEET_GROUP_BY, chunk_size: int = 100000,
+                    workers: int = 1) -> FleetAggregate:
+    """
+    Sizes the variants of one or more variant tables and reduces them to group totals
+
+    :param variant_tables: a variant table or an iterable of them (e.g. one per programme, read lazily). A variant
+        table is a dict of 1D arrays or scalars: volume (production volume), the group_by columns and the sizing
+        inputs in FLEET_SIZING_INPUTS
+    :param group_by: columns the totals are grouped by
+    :param int chunk_size: variants sized per vectorized call
+    :param int workers: number of worker processes, every process aggregates whole chunks
+    :return: FleetAggregate, see FleetAggregate.get_totals
+    """
+
+    if isinstance(variant_tables, dict):
+        variant_tables = [variant_tables]
+    chunks = (chunk for table in variant_tables for _, chunk in iter_sample_chunks(table, chunk_size))
+    aggregate = FleetAggregate(group_by)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for chunk in chunks:
+            aggregate.add_chunk(chunk)
+        return aggregate
+
+    # a few chunks per worker in flight, the partial aggregates are merged as they come back
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_aggregate_chunk, chunk, aggregate.group_by))
+            if len(in_flight) >= 2 * workers:
+                aggregate.merge(in_flight.popleft().result())
+        while in_flight:
+            aggregate.merge(in_flight.popleft().result())
+    return aggregate
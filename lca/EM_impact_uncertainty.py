@@ -0,0 +1,123 @@
+import numpy as np
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS, EM_PEI_KG
+from sizing.batch_sizing import BOM_FIELDS, SIZING_INPUT_FIELDS, get_bom_array_batch, size_motor_batch
+from instrumentation.stage_timers import instrumented
+
+# Notes: -Monte Carlo propagation of uncertain sizing inputs, BOM ratios and per kg impact factors through
+#         sizing -> BOM -> production environmental impact
+#        -the BOM is the sized one of get_bom_array_batch, the masses of the auxiliary materials estimated from
+#         ratios in the sizing (insulation, resins, paint, plastics) are scaled by lognormal factors with median 1, so
+#         without spread the samples equal the deterministic sweep and optimizer LCA
+#        -the samples are evaluated in blocks of about MONTE_CARLO_BLOCK designs x samples rows, every block has its
+#         own generator spawned from the seed and draws its random numbers as (designs x samples) arrays, and the
+#         sizing of a block is one size_motor_batch call; the samples of a seed depend on the number of designs
+#         evaluated together and on MONTE_CARLO_BLOCK
+
+# rows (designs x samples) per block (about 10 MB of intermediate arrays)
+MONTE_CARLO_BLOCK = 10000
+# auxiliary BOM materials whose sized masses come from ratios of other masses
+EM_BOM_RATIO_MATERIALS = ('insulation_materials', 'insulation_resins', 'paint', 'plastics')
+
+
+class ImpactUncertainty:
+    """
+    Spread of the uncertain quantities
+
+    :param dict sizing_input_spread: sizing input -> relative standard deviation of a normal distribution,
+        defaults to 10 % on average_shear_stress (the scatter of the benchmark curve fits)
+    :param float bom_ratio_spread: geometric standard deviation (as log) of the lognormal BOM ratios
+    :param impact_factor_spread: geometric standard deviation (as log) of the lognormal per kg impact factors,
+        a scalar or a 12x10 array like EM_PEI_KG
+    """
+
+    def __init__(self, sizing_input_spread: dict = None, bom_ratio_spread: float = 0.2,
+                 impact_factor_spread=0.2):
+        self.sizing_input_spread = {'average_shear_stress': 0.1} if sizing_input_spread is None \
+            else dict(sizing_input_spread)
+        unknown = set(self.sizing_input_spread) - set(SIZING_INPUT_FIELDS[:5])
+        if unknown:
+            raise ValueError(F"unknown sizing inputs {sorted(unknown)}")
+        self.bom_ratio_spread = bom_ratio_spread
+        self.impact_factor_spread = np.broadcast_to(np.asarray(impact_factor_spread, dtype=float), EM_PEI_KG.shape)
+
+
+def _sample_impacts(design_inputs: dict, number_of_samples: int, uncertainty: ImpactUncertainty, rng):
+    """(designs x number_of_samples x 12) impacts of the designs, all random numbers drawn from rng, rows in
+    design-major order"""
+
+    number_of_designs = design_inputs['max_torque'].size
+    rows = number_of_designs * number_of_samples
+    spread_inputs = [name for name in SIZING_INPUT_FIELDS if uncertainty.sizing_input_spread.get(name, 0.0)]
+    normals = rng.standard_normal((len(spread_inputs), rows))
+    ratio_factors = rng.lognormal(0.0, uncertainty.bom_ratio_spread, (rows, len(EM_BOM_RATIO_MATERIALS)))
+    factor_normals = rng.standard_normal((rows,) + EM_PEI_KG.shape)
+
+    if spread_inputs:
+        inputs = {name: np.repeat(values, number_of_samples) for name, values in design_inputs.items()}
+        for name, normal in zip(spread_inputs, normals):
+            inputs[name] = inputs[name] * (1.0 + uncertainty.sizing_input_spread[name] * normal)
+        bom_array = get_bom_array_batch(size_motor_batch(**inputs))
+    else:
+        bom_array = np.repeat(get_bom_array_batch(size_motor_batch(**design_inputs)), number_of_samples, axis=0)
+    bom_array[:, [BOM_FIELDS.index(material) for material in EM_BOM_RATIO_MATERIALS]] *= ratio_factors
+
+    # impact_k = sum_m bom_m * factor_km, with a lognormal factor per sample, category and material
+    factors = EM_PEI_KG * np.exp(uncertainty.impact_factor_spread * factor_normals)
+    impacts = np.einsum('sm,skm->sk', bom_array, factors)
+    return impacts.reshape(number_of_designs, number_of_samples, len(EM_PEI_FIELDS))
+
+
+@instrumented()
+def sample_impacts(max_torque=200.0, base_speed=3000.0, maximum_rotor_speed=12000.0, average_shear_stress=80.0,
+                   dl_ratio=1.0, PM_case=True, radial_case=True, number_of_samples: int = 100000,
+                   uncertainty: ImpactUncertainty = None, seed=None) -> np.ndarray:
+    """
+    Monte Carlo samples of the production environmental impact of N designs (inputs broadcast like
+    size_motor_batch)
+
+    :param int number_of_samples: samples per design
+    :param ImpactUncertainty uncertainty: defaults to ImpactUncertainty()
+    :param seed: seed, the same seed gives the same samples of the same designs
+    :return: (N x number_of_samples x 12) array, categories as in EM_PEI_ROW_HEADER
+    """
+
+    if uncertainty is None:
+        uncertainty = ImpactUncertainty()
+    inputs = dict(zip(SIZING_INPUT_FIELDS, np.broadcast_arrays(
+        *(np.atleast_1d(value) for value in (max_torque, base_speed, maximum_rotor_speed, average_shear_stress,
+                                             dl_ratio, PM_case, radial_case)))))
+    number_of_designs = inputs['max_torque'].size
+    # every block holds all designs and as many samples as fit into MONTE_CARLO_BLOCK rows
+    block_samples = max(1, MONTE_CARLO_BLOCK // number_of_designs)
+    number_of_blocks = -(-number_of_samples // block_samples)
+
+    samples = np.empty((number_of_designs, number_of_samples, len(EM_PEI_FIELDS)))
+    for block, seed_sequence in enumerate(np.random.SeedSequence(seed).spawn(number_of_blocks)):
+        start = block * block_samples
+        size = min(block_samples, number_of_samples - start)
+        samples[:, start:start + size] = _sample_impacts(inputs, size, uncertainty,
+                                                         np.random.default_rng(seed_sequence))
+    return samples
+
+
+@instrumented()
+def get_impact_percentiles(max_torque=200.0, base_speed=3000.0, maximum_rotor_speed=12000.0,
+                           average_shear_stress=80.0, dl_ratio=1.0, PM_case=True, radial_case=True,
+                           number_of_samples: int = 100000, uncertainty: ImpactUncertainty = None,
+                           percentiles=(5, 50, 95), seed=None) -> dict:
+    """
+    Percentiles of the 12 impact categories of N designs under uncertainty, see sample_impacts
+
+    :return: dict of (N x len(percentiles)) arrays keyed by EM_PEI_FIELDS, plus the mean of each category as
+        <category>_mean (N,) arrays and the percentiles
+    """
+
+    samples = sample_impacts(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, PM_case,
+                             radial_case, number_of_samples, uncertainty, seed)
+    values = np.percentile(samples, percentiles, axis=1)
+    means = samples.mean(axis=1)
+    result = {'percentiles': np.asarray(percentiles)}
+    for category, field in enumerate(EM_PEI_FIELDS):
+        result[field] = values[:, :, category].T
+        result[field + '_mean'] = means[:, category]
+    return result
@@ -24,6 +24,8 @@ class ConceptRotor:
         :param float mass: mass of rotor, is calculated if density is specified, or can be set by user
         """
 
+    __slots__ = ('name', 'stack_length', 'inner_diameter', 'outer_diameter', 'mass', 'dl_ratio', 'shaft_diameter')
+
     def __init__(self, name: str,
                  stack_length: float = 0.1,
                  inner_diameter: float = 0.03,
@@ -76,7 +78,10 @@ class ConceptStator:
         :param float split_ratio: inner-outer ratio of the stator
         """
 
+    __slots__ = ('name', 'stack_length', 'inner_diameter', 'outer_diameter', 'split_ratio', 'end_winding_length')
+
     def __init__(self, name: str, stack_length: float = 0.1, inner_diameter: float = 0.1, outer_diameter: float = 0.2):
+        self.name = name
         self.stack_length = stack_length
         self.inner_diameter = inner_diameter
         self.outer_diameter = outer_diameter
@@ -106,6 +111,13 @@ class ConceptMotorAssembly:
 
 class ElectricMachineBom:
     """Bill of materials of electric machine (motor or generator)"""
+
+    # masses of the auxiliary materials relative to the copper (aluminum for the paint) mass
+    INSULATION_MATERIALS_RATIO = 1/100
+    INSULATION_RESINS_RATIO = 33/100
+    PAINT_RATIO = 2/100
+    PLASTICS_RATIO = 5/100
+
     def __init__(self, name, electrical_steel: float, other_steel: float, aluminum: float, copper: float, ndfeb: float,
                  ferrite: float):
         self.name = name
@@ -113,13 +125,33 @@ class ElectricMachineBom:
         self.other_steel = other_steel
         self.aluminum = aluminum
         self.copper = copper
-        self.insulation_materials = copper * 1/100
-        self.insulation_resins = copper * 33/100
-        self.paint = aluminum * 2/100
-        self.plastics = copper * 5/100
+        self.insulation_materials = copper * self.INSULATION_MATERIALS_RATIO
+        self.insulation_resins = copper * self.INSULATION_RESINS_RATIO
+        self.paint = aluminum * self.PAINT_RATIO
+        self.plastics = copper * self.PLASTICS_RATIO
         self.ndfeb = ndfeb
         self.ferrite = ferrite
 
+    @classmethod
+    def from_mass_result(cls, name, mass_result):
+        """Builds the BOM straight from the MotorMassResult of MotorSizingTool.material_size_wieght_cal.
+        The insulation, resin, paint and plastic masses are taken from the sizing result as they are,
+        instead of being re-derived from the copper and aluminum masses"""
+
+        bom = cls.__new__(cls)
+        bom.name = name
+        bom.electrical_steel = mass_result.electrical_steel
+        bom.other_steel = mass_result.other_steel
+        bom.aluminum = mass_result.aluminum
+        bom.copper = mass_result.copper
+        bom.insulation_materials = mass_result.insulation_materials
+        bom.insulation_resins = mass_result.insulation_resins
+        bom.paint = mass_result.paint
+        bom.plastics = mass_result.plastics
+        bom.ndfeb = mass_result.ndfeb
+        bom.ferrite = mass_result.ferrite
+        return bom
+
     def get_bom_as_array(self):
         """Prepares a 1x10 array for LCA calculations"""
 
@@ -0,0 +1,241 @@
+import math
+
+import numpy as np
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+
+
+""" Array-backed collections of concept rotors, stators and motor assemblies. The geometry of all members is held in
+contiguous float64 columns, so that fleets of millions of motors take 8 bytes per value and the volume, mass and
+split-ratio calculations run vectorized over the whole collection. Indexing a collection returns a view which behaves
+like a ConceptRotor/ConceptStator but reads and writes the columns in place."""
+
+
+class _ColumnAttribute:
+    """Attribute of a view, backed by one element of a column of the collection the view belongs to"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return getattr(view.collection, self.name)[view.index].item()
+
+    def __set__(self, view, value):
+        getattr(view.collection, self.name)[view.index] = value
+
+
+class _ColumnCollection:
+    COLUMNS = ()
+    DEFAULTS = {}
+    VIEW = None
+
+    def __init__(self, size: int = 0, names=None, **columns):
+        for column in self.COLUMNS:
+            if column in columns:
+                values = np.array(columns.pop(column), dtype=float)
+                size = values.size
+            else:
+                values = None
+            setattr(self, column, values)
+        if columns:
+            raise TypeError(F"unknown columns {sorted(columns)}")
+        for column in self.COLUMNS:
+            if getattr(self, column) is None:
+                setattr(self, column, np.full(size, self.DEFAULTS[column], dtype=float))
+            elif getattr(self, column).shape != (size,):
+                raise ValueError(F"column {column} does not have {size} elements")
+        self.names = names
+
+    def __len__(self):
+        return getattr(self, self.COLUMNS[0]).size
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return self.VIEW(self, index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.VIEW(self, index)
+
+    def get_name(self, index):
+        if self.names is None:
+            return F"{type(self).__name__}[{index}]"
+        return self.names[index]
+
+
+class RotorView:
+    """ConceptRotor-like view of one rotor of a RotorArray, reads and writes the array without copying"""
+
+    __slots__ = ('collection', 'index')
+
+    stack_length = _ColumnAttribute()
+    inner_diameter = _ColumnAttribute()
+    outer_diameter = _ColumnAttribute()
+    shaft_diameter = _ColumnAttribute()
+    dl_ratio = _ColumnAttribute()
+    mass = _ColumnAttribute()
+
+    def __init__(self, collection, index):
+        self.collection = collection
+        self.index = index
+
+    @property
+    def name(self):
+        return self.collection.get_name(self.index)
+
+    get_rotor_volume = ConceptRotor.get_rotor_volume
+    set_dl_ratio_length = ConceptRotor.set_dl_ratio_length
+    set_dl_ratio_diameter = ConceptRotor.set_dl_ratio_diameter
+    set_rotor_mass_with_density = ConceptRotor.set_rotor_mass_with_density
+    set_rotor_mass = ConceptRotor.set_rotor_mass
+
+
+class StatorView:
+    """ConceptStator-like view of one stator of a StatorArray, reads and writes the array without copying"""
+
+    __slots__ = ('collection', 'index')
+
+    stack_length = _ColumnAttribute()
+    inner_diameter = _ColumnAttribute()
+    outer_diameter = _ColumnAttribute()
+    split_ratio = _ColumnAttribute()
+    end_winding_length = _ColumnAttribute()
+
+    def __init__(self, collection, index):
+        self.collection = collection
+        self.index = index
+
+    @property
+    def name(self):
+        return self.collection.get_name(self.index)
+
+    set_split_ratio_inner = ConceptStator.set_split_ratio_inner
+    set_split_ratio_outer = ConceptStator.set_split_ratio_outer
+    calc_stator_volume = ConceptStator.calc_stator_volume
+
+
+class RotorArray(_ColumnCollection):
+    """
+        Geometry of many rotors, stored as float64 columns. Column keyword arguments take arrays,
+        missing columns are filled with the ConceptRotor defaults.
+
+        :param int size: number of rotors, when no column is given
+        :param names: optional sequence of rotor names
+        """
+
+    COLUMNS = ('stack_length', 'inner_diameter', 'outer_diameter', 'shaft_diameter', 'dl_ratio', 'mass')
+    DEFAULTS = {'stack_length': 0.1, 'inner_diameter': 0.03, 'outer_diameter': 0.1, 'shaft_diameter': 0.025,
+                'dl_ratio': 1.0, 'mass': np.nan}
+    VIEW = RotorView
+
+    @classmethod
+    def from_rotors(cls, rotors):
+        rotors = list(rotors)
+        columns = {column: [np.nan if getattr(rotor, column) is None else getattr(rotor, column) for rotor in rotors]
+                   for column in cls.COLUMNS}
+        return cls(len(rotors), names=[rotor.name for rotor in rotors], **columns)
+
+    def get_rotor_volume(self):
+        return (self.outer_diameter ** 2 - self.inner_diameter ** 2) * self.stack_length * math.pi / 4
+
+    def set_dl_ratio_length(self, dl_ratio, stack_length):
+        self.dl_ratio[:] = dl_ratio
+        self.stack_length[:] = stack_length
+        self.outer_diameter[:] = self.dl_ratio * self.stack_length
+
+    def set_dl_ratio_diameter(self, dl_ratio, outer_diameter):
+        self.dl_ratio[:] = dl_ratio
+        self.outer_diameter[:] = outer_diameter
+        self.stack_length[:] = self.outer_diameter / self.dl_ratio
+
+    def set_rotor_mass_with_density(self, density=7650.0):
+        self.mass[:] = self.get_rotor_volume() * density
+
+    def set_rotor_mass(self, mass):
+        self.mass[:] = mass
+
+
+class StatorArray(_ColumnCollection):
+    """
+        Geometry of many stators, stored as float64 columns. Column keyword arguments take arrays,
+        missing columns are filled with the ConceptStator defaults.
+
+        :param int size: number of stators, when no column is given
+        :param names: optional sequence of stator names
+        """
+
+    COLUMNS = ('stack_length', 'inner_diameter', 'outer_diameter', 'split_ratio', 'end_winding_length')
+    DEFAULTS = {'stack_length': 0.1, 'inner_diameter': 0.1, 'outer_diameter': 0.2, 'split_ratio': 0.5,
+                'end_winding_length': 0.03}
+    VIEW = StatorView
+
+    @classmethod
+    def from_stators(cls, stators):
+        stators = list(stators)
+        columns = {column: [getattr(stator, column) for stator in stators] for column in cls.COLUMNS}
+        return cls(len(stators), names=[stator.name for stator in stators], **columns)
+
+    def set_split_ratio_inner(self, split_ratio, inner_diameter):
+        self.split_ratio[:] = split_ratio
+        self.inner_diameter[:] = inner_diameter
+        self.outer_diameter[:] = self.inner_diameter / self.split_ratio
+
+    def set_split_ratio_outer(self, split_ratio, outer_diameter):
+        self.split_ratio[:] = split_ratio
+        self.outer_diameter[:] = outer_diameter
+        self.inner_diameter[:] = self.outer_diameter * self.split_ratio
+
+    def calc_stator_volume(self):
+        return (self.outer_diameter ** 2 - self.inner_diameter ** 2) * self.stack_length * math.pi / 4
+
+
+class MotorAssemblyArray:
+    """
+        Many motor assemblies, the rotors and stators of which are held in a RotorArray and a StatorArray
+
+        :param RotorArray rotors: rotors of the motors
+        :param StatorArray stators: stators of the motors, same length as rotors
+        :param names: optional sequence of motor names
+        """
+
+    def __init__(self, rotors: RotorArray, stators: StatorArray, names=None):
+        if len(rotors) != len(stators):
+            raise ValueError("rotors and stators must have the same length")
+        self.rotors = rotors
+        self.stators = stators
+        self.names = names
+
+    @classmethod
+    def from_batch(cls, batch_result: dict, names=None):
+        """Motor assemblies holding the geometry of a sizing.batch_sizing.size_motor_batch result"""
+
+        rotors = RotorArray(stack_length=batch_result['rotor_stack_length'],
+                            inner_diameter=batch_result['rotor_inner_diameter'],
+                            outer_diameter=batch_result['rotor_outer_diameter'],
+                            shaft_diameter=batch_result['shaft_diameter'],
+                            dl_ratio=batch_result['rotor_outer_diameter'] / batch_result['rotor_stack_length'])
+        stators = StatorArray(stack_length=batch_result['stator_stack_length'],
+                              inner_diameter=batch_result['stator_inner_diameter'],
+                              outer_diameter=batch_result['stator_outer_diameter'],
+                              split_ratio=batch_result['stator_split_ratio'])
+        return cls(rotors, stators, names)
+
+    def __len__(self):
+        return len(self.rotors)
+
+    def __getitem__(self, index) -> ConceptMotorAssembly:
+        name = F"motor[{index}]" if self.names is None else self.names[index]
+        return ConceptMotorAssembly(name, self.rotors[index], self.stators[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def set_split_ratio_from_rotor(self, split_ratio):
+        """Links the stator inner diameters and stack lengths to the rotors and applies the split ratios"""
+
+        self.stators.stack_length[:] = self.rotors.stack_length
+        self.stators.set_split_ratio_inner(split_ratio, self.rotors.outer_diameter)
@@ -0,0 +1,399 @@
+import numpy as np
+import math
+
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import MATERIALS, TOPOLOGIES, DEFAULT_MATERIALS, BOM_COLUMNS, END_WINDING_LENGTH, \
+    HOUSING_DIAMETER_ALLOWANCE, HOUSING_END_PLATE_LENGTH, END_CAP_THICKNESS, PAINT_THICKNESS, \
+    WINDING_INSULATION_RATIO, IMPREGNATION_RATIO, PLASTIC_RATIO, SPLIT_RATIO_SLOPE, SPLIT_RATIO_INTERCEPT, \
+    get_topology_from_flags, get_topology_index
+from sizing.topologies import get_topology_kernel
+
+
+""" Vectorized counterpart of MotorSizingTool. Every stage of MotorSizingTool.size_motor is evaluated here for a whole
+array of designs in one pass. The arithmetic is written in exactly the same order as the scalar methods (squares through
+np.square, as numpy scalar ** goes through libm pow) so both paths give bit-identical results; please keep the two in
+step when changing one of them.
+The rotor differs per topology and is sized by the kernels of sizing.topologies. Mixed batches are sized in one pass
+with per-design topology parameters, only the rotor stages are grouped by topology, every group is sized with its
+kernel and the rotor columns are put back in design order."""
+
+SIZING_INPUT_FIELDS = ('max_torque', 'base_speed', 'maximum_rotor_speed', 'average_shear_stress', 'dl_ratio',
+                       'PM_case', 'radial_case')
+
+# indices into TOPOLOGIES and MATERIALS of the sized designs, see get_design_indices
+DESIGN_INDEX_FIELDS = ('topology_index', 'electrical_steel_index', 'conductor_index', 'magnet_index')
+
+GEOMETRY_FIELDS = ('rotor_outer_diameter', 'rotor_stack_length', 'rotor_inner_diameter', 'shaft_diameter',
+                   'stator_inner_diameter', 'stator_outer_diameter', 'stator_stack_length', 'stator_split_ratio',
+                   'tip_speed', 'power', 'housing_diameter', 'housing_length')
+
+FLAG_FIELDS = ('tip_speed_error_flag', 'stacking_limit_exceeded_flag', 'shear_stress_out_of_range')
+
+MASS_FIELDS = ('stator_core_weight', 'stator_copper_weight', 'shaft_weight', 'rotor_core_weight', 'pm_weight',
+               'cage_weight', 'pole_pieces_weight', 'circumferential_pm_weight', 'axial_pm_weight', 'bush_weight',
+               'bolt_weight', 'end_ring_weight', 'e_machine_active_component_weight', 'housing_weight',
+               'total_end_caps_weight', 'winding_insulation_weight', 'impregnation_weight', 'plastic_weight',
+               'total_paint_weight', 'total_motor_weight')
+
+# same order as ElectricMachineBom.get_bom_as_array
+BOM_FIELDS = ('electrical_steel', 'other_steel', 'aluminum', 'copper', 'insulation_materials', 'insulation_resins',
+              'paint', 'plastics', 'ndfeb', 'ferrite')
+
+SIZING_OUTPUT_FIELDS = GEOMETRY_FIELDS + FLAG_FIELDS + MASS_FIELDS + BOM_FIELDS
+
+# rotor masses, set by the topology kernels, zero for components a topology does not have
+ROTOR_MASS_FIELDS = ('shaft_weight', 'rotor_core_weight', 'pm_weight', 'cage_weight', 'pole_pieces_weight',
+                     'circumferential_pm_weight', 'axial_pm_weight', 'bush_weight', 'bolt_weight', 'end_ring_weight')
+
+# outputs of TopologyKernel.calc_rotor_masses
+ROTOR_KERNEL_FIELDS = ROTOR_MASS_FIELDS + ('e_machine_active_component_weight', 'electrical_steel', 'other_steel',
+                                           'conductor_weight', 'magnet_weight')
+
+
+def _broadcast_inputs(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, PM_case,
+                      radial_case):
+    arrays = np.broadcast_arrays(*[np.atleast_1d(value) for value in
+                                   (max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio,
+                                    PM_case, radial_case)])
+    # complex inputs are kept complex, the optimizer differentiates the engine with complex steps
+    return [np.asarray(value, dtype=np.result_type(value, float)) for value in arrays[:5]] + \
+        [np.asarray(value, dtype=bool) for value in arrays[5:]]
+
+
+def _broadcast_designs(topology, *arrays) -> list:
+    """Broadcasts the topology indices against the arrays and flattens all of them in C order (so that e.g. a
+    material axis [:, None] against a design axis gives material-major rows), returns [topology, *arrays]"""
+
+    return [array.ravel() for array in np.broadcast_arrays(np.atleast_1d(topology), *arrays)]
+
+
+def _group_by_topology(topology) -> tuple:
+    """
+    Groups the designs of a 1D array of topology indices
+
+    :return: (groups, positions) with groups a list of (topology index, ascending design indices) pairs and
+        positions the position of every design in the concatenated groups. A homogeneous batch is one group with
+        design indices None and positions None
+    """
+
+    present = np.flatnonzero(np.bincount(topology, minlength=len(TOPOLOGIES)))
+    if present.size < 2:
+        return [(int(present[0]) if present.size else 0, None)], None
+    groups = [(int(index), np.flatnonzero(topology == index)) for index in present]
+    positions = np.empty(topology.size, dtype=np.intp)
+    start = 0
+    for _, designs in groups:
+        positions[designs] = np.arange(start, start + designs.size)
+        start += designs.size
+    return groups, positions
+
+
+def _dispatch_by_topology(group_function, grouping, *arrays) -> dict:
+    """
+    Calls group_function(kernel, *arrays) once per topology present, on the designs of that topology, and
+    assembles the results in design order. group_function returns the same fields for every kernel.
+    A homogeneous batch is passed through without copies
+
+    :param grouping: (groups, positions) from _group_by_topology
+    :param arrays: 1D arrays, one element per design, or scalars (and None) which are the same for every design
+    :return: dict of 1D arrays, one element per design
+    """
+
+    groups, positions = grouping
+    if positions is None:
+        return group_function(get_topology_kernel(groups[0][0]), *arrays)
+
+    results = [group_function(get_topology_kernel(index),
+                              *(array[designs] if np.ndim(array) else array for array in arrays))
+               for index, designs in groups]
+    # one take per field puts the concatenated groups back in design order
+    return {field: np.concatenate([result[field] for result in results]).take(positions) for field in results[0]}
+
+
+def _get_topology(PM_case, radial_case, topology):
+    """Topology indices, from the PM_case / radial_case flags unless topology (indices or a name) is given"""
+
+    if topology is None:
+        return get_topology_from_flags(PM_case, radial_case)
+    if isinstance(topology, str):
+        return np.asarray(get_topology_index(topology))
+    return np.asarray(topology)
+
+
+def _get_materials(topology, electrical_steel, conductor, magnet):
+    """Material indices, the defaults of DEFAULT_MATERIALS and of the topology for materials which are not given"""
+
+    electrical_steel = DEFAULT_MATERIALS['electrical_steel'] if electrical_steel is None else electrical_steel
+    conductor = DEFAULT_MATERIALS['conductor'] if conductor is None else conductor
+    magnet = TOPOLOGIES['magnet'][topology] if magnet is None else magnet
+    return electrical_steel, conductor, magnet
+
+
+def get_design_indices(PM_case=True, radial_case=True, topology=None, electrical_steel=None, conductor=None,
+                       magnet=None) -> dict:
+    """
+    Topology and material indices size_motor_batch uses for these inputs, with the same defaults
+
+    :return: dict of int64 arrays keyed by DESIGN_INDEX_FIELDS, broadcast against each other
+    """
+
+    topology = _get_topology(PM_case, radial_case, topology)
+    indices = np.broadcast_arrays(topology, *_get_materials(topology, electrical_steel, conductor, magnet))
+    return {field: np.asarray(index, dtype=np.int64) for field, index in zip(DESIGN_INDEX_FIELDS, indices)}
+
+
+@instrumented()
+def calc_rot_dimensions_batch(max_torque, average_shear_stress, dl_ratio):
+    """ Vectorized MotorSizingTool.calc_rot_dimensions, returns (rotor outer diameter, rotor stack length)"""
+
+    volume = max_torque / average_shear_stress / 2.0 / 1000.0
+    outer_diameter = np.power((volume * 4.0 / math.pi * dl_ratio), 1.0 / 3.0)
+    stack_length = outer_diameter / dl_ratio
+    return outer_diameter, stack_length
+
+
+@instrumented()
+def calc_tip_speed_batch(rotor_outer_diameter, maximum_rotor_speed):
+    """ Vectorized MotorSizingTool.calc_tip_speed, returns (tip speed, tip speed error flag)"""
+
+    tip_speed = rotor_outer_diameter * maximum_rotor_speed * math.pi / 60.0
+    return tip_speed, np.real(tip_speed) >= 110
+
+
+@instrumented()
+def calc_stacking_limit_batch(rotor_stack_length):
+    """ Vectorized MotorSizingTool.calc_stacking_limit, returns the stacking limit exceeded flag"""
+
+    return np.real(rotor_stack_length) > 0.3
+
+
+@instrumented()
+def calc_split_ratio_from_curve_batch(rotor_outer_diameter, average_shear_stress):
+    """ Vectorized MotorSizingTool.calc_split_ratio_from_curve, returns (split ratio, stator outer diameter,
+    shear stress out of range flag)"""
+
+    shear_stress_out_of_range = (np.real(average_shear_stress) > 120) | (np.real(average_shear_stress) < 40)
+    stator_split_ratio = SPLIT_RATIO_SLOPE * average_shear_stress + SPLIT_RATIO_INTERCEPT
+    outer_diameter = rotor_outer_diameter / stator_split_ratio
+    return stator_split_ratio, outer_diameter, shear_stress_out_of_range
+
+
+@instrumented()
+def calc_shaft_diameter_batch(max_torque, base_speed):
+    """ Power and shaft diameter part of MotorSizingTool.calc_rotor_inner_diameter, returns (power, shaft diameter)"""
+
+    power = base_speed * np.pi / 30 * max_torque
+    shaft_diameter = np.power((1330 * power / base_speed), 1.0 / 3.0) / 1000
+    return power, shaft_diameter
+
+
+def _size_rotor_group(kernel, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight,
+                      electrical_steel_density, conductor_density, magnet_density) -> dict:
+    density = MATERIALS['density']
+    densities = {'electrical_steel': electrical_steel_density,
+                 'conductor': conductor_density,
+                 'magnet': magnet_density,
+                 'shaft': density[DEFAULT_MATERIALS['shaft']],
+                 'pole_pieces': density[DEFAULT_MATERIALS['pole_pieces']],
+                 'bolt': density[DEFAULT_MATERIALS['bolt']]}
+    result = {}
+    if Dri is None:
+        Dri = result['rotor_inner_diameter'] = kernel.calc_rotor_inner_diameter(Dsi, Dsh)
+    rotor = kernel.calc_rotor_masses(Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities)
+    zeros = np.zeros(Dsi.shape, dtype=Dsi.dtype)
+    result.update({field: rotor.get(field, zeros) for field in ROTOR_KERNEL_FIELDS})
+    return result
+
+
+def _get_uniform(indices):
+    """indices[0] if all the indices are the same, so that uniform materials are not gathered per design"""
+
+    return indices[0] if indices.size and np.all(indices == indices[0]) else indices
+
+
+def _material_size_wieght_cal(grouping, topology, Dso, Dsi, Dsh, Lstk, Dri, electrical_steel, conductor,
+                              magnet) -> dict:
+    """material_size_wieght_cal_batch of 1D arrays, the rotor inner diameters are sized too when Dri is None"""
+
+    topology, electrical_steel, conductor, magnet = [_get_uniform(indices) for indices in
+                                                     (topology, electrical_steel, conductor, magnet)]
+    density = MATERIALS['density']
+    mass_density_Aluminum_alloy = density[DEFAULT_MATERIALS['housing']]
+    kfill = TOPOLOGIES['fill_factor'][topology]
+    d = TOPOLOGIES['slot_end_diameter_ratio'][topology]
+    zeros = np.zeros(Dso.shape, dtype=Dso.dtype)
+
+    # stator side
+    stator_cylinder_vol = np.pi/4 * (np.square(Dso) - np.square(Dsi)) * Lstk
+    stator_yoke_vol = np.pi/4 * (np.square(Dso) - np.square(d*Dso)) * Lstk
+    stator_teeth_slots_vol = stator_cylinder_vol - stator_yoke_vol
+    stator_teeth_vol = stator_teeth_slots_vol * 0.5
+    stator_slots_vol = stator_teeth_vol
+    stator_core_lamination_vol = stator_teeth_vol + stator_yoke_vol
+    copper_winding_vol = stator_slots_vol * (1/Lstk) * (Lstk + END_WINDING_LENGTH*2) * kfill
+
+    stator_core_weight = stator_core_lamination_vol * density[electrical_steel]
+    stator_copper_weight = copper_winding_vol * density[conductor]
+
+    # rotor side, the only part which differs per topology
+    rotor = _dispatch_by_topology(_size_rotor_group, grouping, Dsi, Dri, Dsh, Lstk, stator_core_weight,
+                                  stator_copper_weight, density[electrical_steel], density[conductor],
+                                  density[magnet])
+    Dri = rotor.get('rotor_inner_diameter', Dri)
+
+    # Housing
+    D_housing = Dso + HOUSING_DIAMETER_ALLOWANCE
+    L_housing = Lstk * 2 - HOUSING_END_PLATE_LENGTH*2
+    Housing_vol = np.pi/4 * (np.square(D_housing) - np.square(Dso)) * L_housing
+    Housing_weight = Housing_vol * mass_density_Aluminum_alloy
+
+    # End caps
+    end_cap_thickness = END_CAP_THICKNESS
+    Front_end_cap_volume = np.pi/4 * (np.square(D_housing) - np.square(Dri)) * end_cap_thickness
+    Front_end_cap_weight = Front_end_cap_volume * mass_density_Aluminum_alloy
+    rear_end_cap_weight = Front_end_cap_weight
+    total_end_caps_weight = Front_end_cap_weight + rear_end_cap_weight
+
+    Aluminum = total_end_caps_weight + Housing_weight
+
+    total_motor_weight = rotor['e_machine_active_component_weight'] + Housing_weight + total_end_caps_weight
+
+    # insulation, painting, and plastic materials
+    winding_insulation_weight = WINDING_INSULATION_RATIO * stator_copper_weight
+    impregnation_weight = IMPREGNATION_RATIO * stator_copper_weight
+    plastic_weight = PLASTIC_RATIO * stator_copper_weight
+
+    Housing_paint_thickness = PAINT_THICKNESS
+    end_caps_paint_thickness = PAINT_THICKNESS
+    painting_material_mass_density = density[DEFAULT_MATERIALS['paint']]
+    Housing_paint_weight = np.pi/4 * (np.square(D_housing+2*Housing_paint_thickness) - np.square(D_housing)) * \
+        L_housing * painting_material_mass_density
+    End_cap_paint_weight = np.pi/4 * (np.square(D_housing) - np.square(Dri)) * end_caps_paint_thickness * 2 * 2
+    total_paint_weight = Housing_paint_weight + End_cap_paint_weight
+
+    total_motor_weight = total_motor_weight + winding_insulation_weight + impregnation_weight + plastic_weight + \
+        total_paint_weight
+
+    # BOM, the conductor and magnet masses are booked to the BOM column of their material
+    conductor_column = MATERIALS['bom_column'][conductor]
+    Copper = np.where(conductor_column == BOM_COLUMNS.index('copper'), rotor['conductor_weight'], zeros)
+    Aluminum = np.where(conductor_column == BOM_COLUMNS.index('aluminum'), Aluminum + rotor['conductor_weight'],
+                        Aluminum)
+    magnet_column = MATERIALS['bom_column'][magnet]
+
+    result = {field: rotor[field] for field in ('rotor_inner_diameter',) + ROTOR_MASS_FIELDS if field in rotor}
+    result.update({
+        'stator_core_weight': stator_core_weight,
+        'stator_copper_weight': stator_copper_weight,
+        'e_machine_active_component_weight': rotor['e_machine_active_component_weight'],
+        'housing_weight': Housing_weight,
+        'total_end_caps_weight': total_end_caps_weight,
+        'winding_insulation_weight': winding_insulation_weight,
+        'impregnation_weight': impregnation_weight,
+        'plastic_weight': plastic_weight,
+        'total_paint_weight': total_paint_weight,
+        'total_motor_weight': total_motor_weight,
+        'housing_diameter': D_housing,
+        'housing_length': L_housing,
+        'electrical_steel': rotor['electrical_steel'],
+        'other_steel': rotor['other_steel'],
+        'aluminum': Aluminum,
+        'copper': Copper,
+        'insulation_materials': winding_insulation_weight,
+        'insulation_resins': impregnation_weight,
+        'paint': total_paint_weight,
+        'plastics': plastic_weight,
+        'ndfeb': np.where(magnet_column == BOM_COLUMNS.index('ndfeb'), rotor['magnet_weight'], zeros),
+        'ferrite': np.where(magnet_column == BOM_COLUMNS.index('ferrite'), rotor['magnet_weight'], zeros),
+    })
+    return result
+
+
+@instrumented()
+def material_size_wieght_cal_batch(Dso, Dsi, Dsh, Lstk, Dri, PM_case, radial_case, electrical_steel=None,
+                                   conductor=None, magnet=None, topology=None):
+    """ Vectorized MotorSizingTool.material_size_wieght_cal. Returns a dict of mass and BOM columns, masses of
+    components which do not exist for a topology (e.g. the cage of a PM machine) are set to zero.
+    electrical_steel, conductor (stator winding and cage) and magnet are indices into
+    sizing.material_database.MATERIALS, scalars or arrays; by default the MotorSizingTool materials are used
+    (M235-35A, copper, and N42UH for radial PM machines and ferrite for X-motors). topology (indices into
+    sizing.material_database.TOPOLOGIES) replaces PM_case and radial_case when given"""
+
+    topology = _get_topology(PM_case, radial_case, topology)
+    topology, *arrays = _broadcast_designs(topology, Dso, Dsi, Dsh, Lstk, Dri,
+                                           *_get_materials(topology, electrical_steel, conductor, magnet))
+    return _material_size_wieght_cal(_group_by_topology(topology), topology, *arrays)
+
+
+@instrumented()
+def size_motor_batch(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio,
+                     PM_case=True, radial_case=True, electrical_steel=None, conductor=None, magnet=None,
+                     topology=None) -> dict:
+    """
+    Sizes many motors at once, equivalent to calling MotorSizingTool.size_motor for every design.
+    Inputs can be scalars or arrays, they are broadcast against each other (material indices and topology
+    included) and the designs are flattened in C order, so e.g. electrical_steel=steels[:, None] with
+    dl_ratio=ratios[None, :] gives len(steels) * len(ratios) rows, steel-major.
+
+    :param max_torque: array of maximum torques [Nm]
+    :param base_speed: array of base speeds [rpm]
+    :param maximum_rotor_speed: array of maximum rotor speeds [rpm]
+    :param average_shear_stress: array of average shear stresses [kPa]
+    :param dl_ratio: array of rotor diameter-length ratios
+    :param PM_case: boolean mask, True for PM machines, False for induction machines
+    :param radial_case: boolean mask, True for radial machines, False for X-motors
+    :param electrical_steel: indices of the electrical steel grades in sizing.material_database.MATERIALS
+    :param conductor: indices of the stator winding (and cage) conductor materials
+    :param magnet: indices of the magnet materials, by default N42UH for radial PM machines and ferrite for X-motors
+    :param topology: indices into sizing.material_database.TOPOLOGIES or the name of a topology (e.g. 'SynRel'),
+        replaces PM_case and radial_case when given
+    :return: dict of 1D arrays keyed by SIZING_OUTPUT_FIELDS
+    """
+
+    max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, PM_case, radial_case = \
+        _broadcast_inputs(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, PM_case,
+                          radial_case)
+    topology = _get_topology(PM_case, radial_case, topology)
+    topology, max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, electrical_steel, \
+        conductor, magnet = _broadcast_designs(topology, max_torque, base_speed, maximum_rotor_speed,
+                                               average_shear_stress, dl_ratio,
+                                               *_get_materials(topology, electrical_steel, conductor, magnet))
+    grouping = _group_by_topology(topology)
+
+    # size rotor
+    rotor_outer_diameter, rotor_stack_length = calc_rot_dimensions_batch(max_torque, average_shear_stress, dl_ratio)
+    tip_speed, tip_speed_error_flag = calc_tip_speed_batch(rotor_outer_diameter, maximum_rotor_speed)
+    stacking_limit_exceeded_flag = calc_stacking_limit_batch(rotor_stack_length)
+    # size stator
+    stator_split_ratio, stator_outer_diameter, shear_stress_out_of_range = \
+        calc_split_ratio_from_curve_batch(rotor_outer_diameter, average_shear_stress)
+    power, shaft_diameter = calc_shaft_diameter_batch(max_torque, base_speed)
+    # weight calculation, sizes the rotor inner diameter with the topology kernels
+    masses = _material_size_wieght_cal(grouping, topology, stator_outer_diameter, rotor_outer_diameter,
+                                       shaft_diameter, rotor_stack_length, None, electrical_steel, conductor, magnet)
+
+    result = {
+        'rotor_outer_diameter': rotor_outer_diameter,
+        'rotor_stack_length': rotor_stack_length,
+        'rotor_inner_diameter': masses.pop('rotor_inner_diameter'),
+        'shaft_diameter': shaft_diameter,
+        'stator_inner_diameter': rotor_outer_diameter,
+        'stator_outer_diameter': stator_outer_diameter,
+        'stator_stack_length': rotor_stack_length,
+        'stator_split_ratio': stator_split_ratio,
+        'tip_speed': tip_speed,
+        'power': power,
+        'tip_speed_error_flag': tip_speed_error_flag,
+        'stacking_limit_exceeded_flag': stacking_limit_exceeded_flag,
+        'shear_stress_out_of_range': shear_stress_out_of_range,
+    }
+    result.update(masses)
+    return result
+
+
+@instrumented()
+def get_bom_array_batch(batch_result: dict) -> np.ndarray:
+    """Stacks the BOM columns of a size_motor_batch result into an (N x 10) array, the layout expected by
+    lca.EM_production_environmental_impact.get_pei_matrix_batch"""
+
+    return np.column_stack([batch_result[field] for field in BOM_FIELDS])
@@ -0,0 +1,258 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+""" Headless rendering of the radial and axial cross-sections of many sized motors into tiled contact sheets (PNG,
+SVG or any other format matplotlib writes). Every sheet is one figure with a single axes; each layer of the cross
+sections (stator, air gap, rotor, rotor bore, shaft) is one collection holding the shapes of all tiles, so a sheet of
+hundreds of designs is a handful of artists. The figure and its artists are created once per process and updated in
+place for every sheet. matplotlib is only imported when a sheet is created, and the Agg canvas is used directly, so
+no display and no pyplot state are needed. The layout of the tiles (get_tile_layout) is plain numpy.
+
+    result = size_motor_batch(...)
+    render_cross_sections(result, 'sheets', workers=4)
+"""
+
+# geometry columns, named as in the size_motor_batch results
+CROSS_SECTION_FIELDS = ('stator_outer_diameter', 'stator_inner_diameter', 'rotor_outer_diameter',
+                        'rotor_inner_diameter', 'shaft_diameter', 'rotor_stack_length')
+
+# layers from the back to the front: (outer diameter column, colour); the rotor bore is the bush of the X-motor and
+# hidden by the shaft for radial machines. The shaft is twice as long as the stack, as in the weight calculation
+CROSS_SECTION_LAYERS = (('stator_outer_diameter', 'g'),
+                        ('stator_inner_diameter', 'w'),
+                        ('rotor_outer_diameter', 'blue'),
+                        ('rotor_inner_diameter', 'silver'),
+                        ('shaft_diameter', 'dimgray'))
+
+# space around the sections, relative to the largest diameter of the batch
+TILE_MARGIN = 0.15
+
+
+def get_cross_section_geometry(motor_assemblies) -> dict:
+    """Geometry columns (CROSS_SECTION_FIELDS) of sized ConceptMotorAssembly objects"""
+
+    rotors = [assembly.rotor for assembly in motor_assemblies]
+    stators = [assembly.stator for assembly in motor_assemblies]
+    return {'stator_outer_diameter': np.array([stator.outer_diameter for stator in stators], dtype=float),
+            'stator_inner_diameter': np.array([stator.inner_diameter for stator in stators], dtype=float),
+            'rotor_outer_diameter': np.array([rotor.outer_diameter for rotor in rotors], dtype=float),
+            'rotor_inner_diameter': np.array([rotor.inner_diameter for rotor in rotors], dtype=float),
+            # the shaft diameter of radial machines is the rotor inner diameter
+            'shaft_diameter': np.array([rotor.inner_diameter if rotor.shaft_diameter is None
+                                        else rotor.shaft_diameter for rotor in rotors], dtype=float),
+            'rotor_stack_length': np.array([rotor.stack_length for rotor in rotors], dtype=float)}
+
+
+def get_sheet_bounds(number_of_designs: int, columns: int = 10, rows: int = 10) -> list:
+    """(start, stop) design indices of every sheet"""
+
+    tiles = columns * rows
+    return [(start, min(start + tiles, number_of_designs)) for start in range(0, number_of_designs, tiles)]
+
+
+def get_tile_size(extent) -> tuple:
+    """
+    Tile size in data units from the largest outer diameter and stack length of a batch. A batch without extent (no
+    designs, zero or NaN diameters) is drawn at the scale of a 1 m stator
+
+    :return: (tile width, tile height, margin, diameter, stack length) with the diameter and stack length of the scale
+    """
+
+    diameter, stack_length = extent
+    diameter = diameter if diameter > 0.0 else 1.0
+    stack_length = stack_length if stack_length > 0.0 else 0.0
+    margin = TILE_MARGIN * diameter
+    return diameter + 2 * stack_length + 3 * margin, diameter + 2 * margin, margin, diameter, stack_length
+
+
+def get_batch_extent(geometry: dict) -> tuple:
+    """(largest stator outer diameter, largest stack length) of geometry, designs which could not be sized (NaN)
+    are ignored"""
+
+    return (float(np.nanmax(geometry['stator_outer_diameter'], initial=0.0)),
+            float(np.nanmax(geometry['rotor_stack_length'], initial=0.0)))
+
+
+def get_tile_layout(geometry: dict, extent, columns: int, rows: int) -> dict:
+    """
+    Shapes of a sheet in data units, the designs fill the tiles row by row from the top left
+
+    :param dict geometry: CROSS_SECTION_FIELDS -> arrays of at most columns x rows designs
+    :param extent: (largest stator outer diameter, largest stack length) [m] setting the scale
+    :return: dict with the tile_width, tile_height and margin, the radial_centres (N x 2) of the radial sections,
+        the axial_vertices {layer column: N x 4 x 2} of the axial sections and the label_positions (N x 2)
+    """
+
+    tile_width, tile_height, margin, diameter, largest_stack_length = get_tile_size(extent)
+    tile = np.arange(np.size(geometry['stator_outer_diameter']))
+    left = (tile % columns) * tile_width
+    bottom = (rows - 1 - tile // columns) * tile_height
+    radial_centres = np.column_stack([left + margin + diameter / 2, bottom + tile_height / 2])
+    axial_centre = radial_centres[:, 0] + diameter / 2 + margin + largest_stack_length
+
+    stack_length = np.asarray(geometry['rotor_stack_length'], dtype=float)
+    axial_vertices = {}
+    for field, _ in CROSS_SECTION_LAYERS:
+        layer_diameter = np.asarray(geometry[field], dtype=float)
+        half_length = stack_length if field == 'shaft_diameter' else stack_length / 2
+        x0, x1 = axial_centre - half_length, axial_centre + half_length
+        y0, y1 = radial_centres[:, 1] - layer_diameter / 2, radial_centres[:, 1] + layer_diameter / 2
+        axial_vertices[field] = np.stack([np.column_stack([x0, y0]), np.column_stack([x1, y0]),
+                                          np.column_stack([x1, y1]), np.column_stack([x0, y1])], axis=1)
+    return {'tile_width': tile_width,
+            'tile_height': tile_height,
+            'margin': margin,
+            'radial_centres': radial_centres,
+            'axial_vertices': axial_vertices,
+            'label_positions': np.column_stack([left + margin / 4, bottom + tile_height])}
+
+
+class CrossSectionSheet:
+    """
+    Reusable figure of columns x rows tiles, every tile holds the radial section of a design on the left and its
+    axial section on the right. All tiles of all sheets are drawn to the same scale
+
+    :param int columns: tiles per row
+    :param int rows: tiles per column
+    :param float tile_size: width of a tile [inch]
+    :param int dpi: resolution of raster formats
+    """
+
+    def __init__(self, columns: int = 10, rows: int = 10, tile_size: float = 1.5, dpi: int = 100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import EllipseCollection, PolyCollection
+        from matplotlib.figure import Figure
+
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = tile_size
+        self.figure = Figure(dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_axes((0.0, 0.0, 1.0, 1.0))
+        self.axes.set_axis_off()
+        self.axes.set_aspect('equal')
+
+        tiles = columns * rows
+        self.radial_layers = []
+        self.axial_layers = []
+        for zorder, (_, colour) in enumerate(CROSS_SECTION_LAYERS):
+            radial = EllipseCollection(np.zeros(tiles), np.zeros(tiles), np.zeros(tiles), units='xy',
+                                       offsets=np.zeros((tiles, 2)), offset_transform=self.axes.transData,
+                                       facecolors=colour, edgecolors='none', zorder=zorder)
+            axial = PolyCollection([], facecolors=colour, edgecolors='none', zorder=zorder)
+            self.radial_layers.append(self.axes.add_collection(radial))
+            self.axial_layers.append(self.axes.add_collection(axial))
+        self.labels = [self.axes.text(0.0, 0.0, '', fontsize=6, ha='left', va='top') for _ in range(tiles)]
+        self._extent = None
+
+    def _set_extent(self, extent):
+        """Axes limits and figure size of the tile size of extent"""
+
+        if extent == self._extent:
+            return
+        tile_width, tile_height = get_tile_size(extent)[:2]
+        self.axes.set_xlim(0.0, self.columns * tile_width)
+        self.axes.set_ylim(0.0, self.rows * tile_height)
+        self.figure.set_size_inches(self.columns * self.tile_size,
+                                    self.columns * self.tile_size * self.rows * tile_height /
+                                    (self.columns * tile_width))
+        self._extent = extent
+
+    def draw(self, geometry: dict, extent=None, labels=None):
+        """
+        Updates the artists to show the designs of geometry
+
+        :param dict geometry: CROSS_SECTION_FIELDS -> arrays of at most columns x rows designs
+        :param extent: (largest stator outer diameter, largest stack length) [m] setting the scale, defaults to the
+            largest values of geometry. Pass the values of the whole batch to draw all sheets to the same scale
+        :param labels: text of every tile, defaults to the tile number
+        """
+
+        geometry = {field: np.asarray(geometry[field], dtype=float) for field in CROSS_SECTION_FIELDS}
+        number_of_designs = geometry['stator_outer_diameter'].size
+        if number_of_designs > self.columns * self.rows:
+            raise ValueError(F"{number_of_designs} designs do not fit on a sheet of {self.columns * self.rows} tiles")
+        if extent is None:
+            extent = get_batch_extent(geometry)
+        extent = (float(extent[0]), float(extent[1]))
+        self._set_extent(extent)
+        layout = get_tile_layout(geometry, extent, self.columns, self.rows)
+
+        for (field, _), radial, axial in zip(CROSS_SECTION_LAYERS, self.radial_layers, self.axial_layers):
+            diameter = geometry[field]
+            radial.set_offsets(layout['radial_centres'])
+            radial.set_widths(diameter)
+            radial.set_heights(diameter)
+            radial.set_angles(np.zeros_like(diameter))
+            axial.set_verts(layout['axial_vertices'][field])
+
+        if labels is None:
+            labels = [str(index) for index in range(number_of_designs)]
+        for index, label in enumerate(self.labels):
+            if index < number_of_designs:
+                label.set_text(labels[index])
+                label.set_position(tuple(layout['label_positions'][index]))
+                label.set_visible(True)
+            else:
+                label.set_visible(False)
+
+    def save(self, path: str, file_format: str = None):
+        """Writes the sheet, the format follows the file extension unless given"""
+
+        self.figure.savefig(path, format=file_format, dpi=self.figure.dpi)
+
+
+# the sheet of a worker process, created on its first task and reused for all further sheets
+_process_sheet = None
+
+
+def _get_process_sheet(columns, rows, tile_size, dpi) -> CrossSectionSheet:
+    global _process_sheet
+    if _process_sheet is None or (_process_sheet.columns, _process_sheet.rows, _process_sheet.tile_size,
+                                  _process_sheet.figure.dpi) != (columns, rows, tile_size, dpi):
+        _process_sheet = CrossSectionSheet(columns, rows, tile_size, dpi)
+    return _process_sheet
+
+
+def _render_sheet(path, geometry, extent, labels, columns, rows, tile_size, dpi) -> str:
+    sheet = _get_process_sheet(columns, rows, tile_size, dpi)
+    sheet.draw(geometry, extent, labels)
+    sheet.save(path)
+    return path
+
+
+def render_cross_sections(geometry: dict, directory: str, columns: int = 10, rows: int = 10,
+                          file_format: str = 'png', tile_size: float = 1.5, dpi: int = 100, labels=None,
+                          workers: int = 1, prefix: str = 'cross_sections') -> list:
+    """
+    Renders the cross-sections of all designs into contact sheets of columns x rows tiles, all to the same scale
+
+    :param dict geometry: CROSS_SECTION_FIELDS -> 1D arrays, e.g. a size_motor_batch result or
+        get_cross_section_geometry(motor_assemblies)
+    :param str directory: output directory, created if missing
+    :param str file_format: file extension and format of the sheets, e.g. png or svg
+    :param labels: text of every design, defaults to the design index
+    :param int workers: number of worker processes, every process renders whole sheets
+    :return: list of the sheet paths, in design order
+    """
+
+    geometry = {field: np.asarray(geometry[field], dtype=float).ravel() for field in CROSS_SECTION_FIELDS}
+    number_of_designs = geometry['stator_outer_diameter'].size
+    if labels is None:
+        labels = [str(index) for index in range(number_of_designs)]
+    extent = get_batch_extent(geometry)
+    os.makedirs(directory, exist_ok=True)
+
+    tasks = []
+    for sheet, (start, stop) in enumerate(get_sheet_bounds(number_of_designs, columns, rows)):
+        path = os.path.join(directory, F"{prefix}_{sheet:04d}.{file_format}")
+        tasks.append((path, {field: values[start:stop] for field, values in geometry.items()}, extent,
+                      list(labels[start:stop]), columns, rows, tile_size, dpi))
+
+    if workers == 1 or len(tasks) <= 1:
+        return [_render_sheet(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_sheet, *zip(*tasks)))
@@ -0,0 +1,202 @@
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch, get_bom_array_batch
+from lca.EM_production_environmental_impact import EM_PEI_KG
+
+
+""" Gradient-based optimisation of dl_ratio and average shear stress for given torque/speed requirements.
+Gradients of the objectives and constraints are exact: the batch sizing engine is evaluated with complex-step
+perturbations, d f/d x = Im(f(x + i h)) / h, which has no subtractive cancellation so h can be tiny.
+Many starting points (and, for the Pareto front, many objective weightings) are optimised at once as one array."""
+
+OBJECTIVES = ('total_motor_weight', 'climate_change')
+DESIGN_VARIABLES = ('dl_ratio', 'average_shear_stress')
+# typical range of dl_ratio of radial flux E-machines, and range of the split ratio curve fit of the shear stress
+DEFAULT_BOUNDS = {'dl_ratio': (0.5, 3.0), 'average_shear_stress': (40.0, 120.0)}
+TIP_SPEED_LIMIT = 110.0
+STACK_LENGTH_LIMIT = 0.3
+COMPLEX_STEP = 1e-30
+
+
+def evaluate_design(dl_ratio, average_shear_stress, max_torque=200.0, base_speed=3000.0,
+                    maximum_rotor_speed=12000.0, PM_case=True, radial_case=True) -> dict:
+    """Objectives and constraint values of designs, arrays may be complex for complex-step differentiation.
+    Constraints are normalised, a design is feasible when both are below zero"""
+
+    result = size_motor_batch(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio,
+                              PM_case, radial_case)
+    return {'total_motor_weight': result['total_motor_weight'],
+            'climate_change': get_bom_array_batch(result) @ EM_PEI_KG[0],
+            'tip_speed_constraint': result['tip_speed'] / TIP_SPEED_LIMIT - 1.0,
+            'stack_length_constraint': result['rotor_stack_length'] / STACK_LENGTH_LIMIT - 1.0}
+
+
+def evaluate_with_gradients(x, requirements: dict):
+    """
+    Values and gradients of evaluate_design with respect to (dl_ratio, average_shear_stress)
+
+    :param x: (N x 2) array of designs, columns as in DESIGN_VARIABLES
+    :param dict requirements: keyword arguments of evaluate_design other than the design variables
+    :return: (values, gradients), dicts of (N,) and (N x 2) arrays
+    """
+
+    x = np.asarray(x, dtype=float)
+    values = evaluate_design(x[:, 0], x[:, 1], **requirements)
+    gradients = {name: np.empty(x.shape) for name in values}
+    for variable in range(x.shape[1]):
+        perturbed = x.astype(complex)
+        perturbed[:, variable] += 1j * COMPLEX_STEP
+        perturbed_values = evaluate_design(perturbed[:, 0], perturbed[:, 1], **requirements)
+        for name, value in perturbed_values.items():
+            gradients[name][:, variable] = value.imag / COMPLEX_STEP
+    return values, gradients
+
+
+class _PenaltyProblem:
+    """Weighted sum of the normalised objectives plus a quadratic penalty on violated constraints"""
+
+    def __init__(self, requirements, scales, penalty, margin):
+        self.requirements = requirements
+        self.scales = scales
+        self.penalty = penalty
+        self.margin = margin
+        self.evaluations = 0
+
+    def __call__(self, x, weights):
+        values, gradients = evaluate_with_gradients(x, self.requirements)
+        self.evaluations += x.shape[0] * (1 + x.shape[1])
+        merit = np.zeros(x.shape[0])
+        merit_gradient = np.zeros(x.shape)
+        for column, objective in enumerate(OBJECTIVES):
+            weight = weights[:, column] / self.scales[column]
+            merit += weight * values[objective]
+            merit_gradient += weight[:, None] * gradients[objective]
+        for constraint in ('tip_speed_constraint', 'stack_length_constraint'):
+            violation = np.maximum(values[constraint] + self.margin, 0.0)
+            merit += self.penalty * violation ** 2
+            merit_gradient += (2.0 * self.penalty * violation)[:, None] * gradients[constraint]
+        return merit, merit_gradient, values
+
+
+def _optimise(requirements, weights, starts, bounds, max_iterations, tolerance, penalty, margin):
+    lower = np.array([bounds[name][0] for name in DESIGN_VARIABLES], dtype=float)
+    upper = np.array([bounds[name][1] for name in DESIGN_VARIABLES], dtype=float)
+    span = upper - lower
+
+    # objectives are scaled with their value at the centre of the design space, so weights are comparable
+    centre = evaluate_design(*(lower + span / 2), **requirements)
+    scales = np.array([np.real(centre[objective])[0] for objective in OBJECTIVES])
+    # the penalty only pushes designs to within about 1/penalty of a constraint, so the constraints are tightened by
+    # margin to end up on the feasible side
+    problem = _PenaltyProblem(requirements, scales, penalty, margin)
+
+    # projected steepest descent in the unit box, with a step length per design which grows on success and
+    # shrinks on failure
+    u = starts
+    merit, gradient, values = problem(lower + u * span, weights)
+    step = np.full(u.shape[0], 0.1)
+    for _ in range(max_iterations):
+        active = step > tolerance
+        if not np.any(active):
+            break
+        unit_gradient = gradient[active] * span
+        norm = np.linalg.norm(unit_gradient, axis=1)
+        norm[norm == 0.0] = 1.0
+        candidate = np.clip(u[active] - step[active, None] * unit_gradient / norm[:, None], 0.0, 1.0)
+        candidate_merit, candidate_gradient, candidate_values = problem(lower + candidate * span, weights[active])
+
+        improved = candidate_merit < merit[active]
+        indices = np.flatnonzero(active)
+        accepted = indices[improved]
+        u[accepted] = candidate[improved]
+        merit[accepted] = candidate_merit[improved]
+        gradient[accepted] = candidate_gradient[improved]
+        for name in values:
+            values[name][accepted] = candidate_values[name][improved]
+        step[accepted] *= 1.5
+        step[indices[~improved]] *= 0.5
+
+    x = lower + u * span
+    return {'dl_ratio': x[:, 0],
+            'average_shear_stress': x[:, 1],
+            'total_motor_weight': values['total_motor_weight'],
+            'climate_change': values['climate_change'],
+            'feasible': (values['tip_speed_constraint'] < 0.0) & (values['stack_length_constraint'] <= 0.0),
+            'merit': merit,
+            'evaluations': problem.evaluations}
+
+
+def minimise_design(objective: str = 'total_motor_weight', max_torque=200.0, base_speed=3000.0,
+                    maximum_rotor_speed=12000.0, PM_case=True, radial_case=True, bounds: dict = None,
+                    number_of_starts: int = 8, max_iterations: int = 100, tolerance: float = 1e-6,
+                    penalty: float = 1e4, margin: float = 1e-3, seed=None) -> dict:
+    """
+    Lightest (objective='total_motor_weight') or lowest climate change impact (objective='climate_change') design
+    which meets the tip speed (< 110 m/s) and stack length (<= 0.3 m) limits
+
+    :param str objective: one of OBJECTIVES
+    :param dict bounds: design variable -> (lower, upper), defaults to DEFAULT_BOUNDS
+    :param int number_of_starts: number of random starting points optimised side by side
+    :param float penalty: weight of the quadratic constraint violation penalty
+    :param float margin: relative distance designs are kept away from the tip speed and stack length limits
+    :param seed: seed of the starting points
+    :return: dict of the best design: dl_ratio, average_shear_stress, both objectives, feasible, and evaluations,
+        the number of single-design model evaluations used
+    """
+
+    bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+    requirements = dict(max_torque=max_torque, base_speed=base_speed, maximum_rotor_speed=maximum_rotor_speed,
+                        PM_case=PM_case, radial_case=radial_case)
+    weights = np.zeros((number_of_starts, len(OBJECTIVES)))
+    weights[:, OBJECTIVES.index(objective)] = 1.0
+    starts = np.random.default_rng(seed).random((number_of_starts, len(DESIGN_VARIABLES)))
+    result = _optimise(requirements, weights, starts, bounds, max_iterations, tolerance, penalty, margin)
+
+    best = np.argmin(np.where(result['feasible'], result['merit'], np.inf)) if np.any(result['feasible']) \
+        else np.argmin(result['merit'])
+    design = {name: value[best].item() for name, value in result.items() if name != 'evaluations'}
+    design['evaluations'] = result['evaluations']
+    del design['merit']
+    return design
+
+
+def pareto_front(max_torque=200.0, base_speed=3000.0, maximum_rotor_speed=12000.0, PM_case=True, radial_case=True,
+                 bounds: dict = None, number_of_weights: int = 21, starts_per_weight: int = 2,
+                 max_iterations: int = 100, tolerance: float = 1e-6, penalty: float = 1e4, margin: float = 1e-3,
+                 seed=None) -> dict:
+    """
+    Feasible, non-dominated designs trading off total motor weight against climate change impact, found by
+    optimising weighted sums of the two objectives for number_of_weights weightings at once
+
+    :return: dict of arrays (dl_ratio, average_shear_stress, total_motor_weight, climate_change) sorted by weight,
+        and evaluations, the number of single-design model evaluations used
+    """
+
+    bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+    requirements = dict(max_torque=max_torque, base_speed=base_speed, maximum_rotor_speed=maximum_rotor_speed,
+                        PM_case=PM_case, radial_case=radial_case)
+    mass_weight = np.repeat(np.linspace(0.0, 1.0, number_of_weights), starts_per_weight)
+    weights = np.column_stack([mass_weight, 1.0 - mass_weight])
+    starts = np.random.default_rng(seed).random((weights.shape[0], len(DESIGN_VARIABLES)))
+    result = _optimise(requirements, weights, starts, bounds, max_iterations, tolerance, penalty, margin)
+
+    mass = result['total_motor_weight']
+    impact = result['climate_change']
+    candidates = np.flatnonzero(result['feasible'])
+    dominated = np.array([np.any((mass[candidates] <= mass[i]) & (impact[candidates] <= impact[i]) &
+                                 ((mass[candidates] < mass[i]) | (impact[candidates] < impact[i])))
+                          for i in candidates], dtype=bool)
+    front = candidates[~dominated]
+    front = front[np.argsort(mass[front], kind='stable')]
+    # the same design can be reached from several starting points, only keep points which improve the impact of the
+    # previous (lighter) point by more than a relative tolerance
+    distinct = []
+    for index in front:
+        if not distinct or impact[index] < impact[distinct[-1]] * (1.0 - 1e-6):
+            distinct.append(index)
+    front = np.array(distinct, dtype=int)
+
+    pareto = {name: result[name][front] for name in ('dl_ratio', 'average_shear_stress', 'total_motor_weight',
+                                                      'climate_change')}
+    pareto['evaluations'] = result['evaluations']
+    return pareto
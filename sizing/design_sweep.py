@@ -0,0 +1,157 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch, get_bom_array_batch, get_design_indices
+from sizing.material_database import TOPOLOGIES, get_topology_from_flags
+from sizing.thermal_network import calc_thermal_screening_batch
+from lca.EM_production_environmental_impact import get_pei_matrix_batch, EM_PEI_FIELDS
+
+
+""" Design-space sweeps over the batch sizing engine. Samples are plain dicts of 1D arrays keyed by the
+MotorSizingTool input names, they are cut into chunks and every chunk is sized (and optionally run through the LCA)
+in one vectorized call, either in-process or on a pool of worker processes."""
+
+# MotorSizingTool defaults, used for inputs which are not swept
+SWEEP_DEFAULTS = {'max_torque': 200.0,
+                  'base_speed': 3000.0,
+                  'maximum_rotor_speed': 12000.0,
+                  'average_shear_stress': 80.0,
+                  'dl_ratio': 1.0,
+                  'PM_case': True,
+                  'radial_case': True}
+
+
+def grid_samples(**ranges) -> dict:
+    """
+    Full factorial grid of the given input values, e.g. grid_samples(dl_ratio=np.linspace(0.5, 3.0, 26),
+    average_shear_stress=np.linspace(40, 120, 81))
+
+    :return: dict of flattened 1D arrays, one entry per grid point
+    """
+
+    names = list(ranges)
+    grids = np.meshgrid(*[np.asarray(ranges[name]) for name in names], indexing='ij')
+    return {name: grid.ravel() for name, grid in zip(names, grids)}
+
+
+def latin_hypercube_samples(bounds: dict, number_of_samples: int, seed=None) -> dict:
+    """
+    Latin-hypercube samples of continuous inputs
+
+    :param dict bounds: input name -> (lower bound, upper bound)
+    :param int number_of_samples: number of samples
+    :param seed: seed or numpy Generator, for reproducible samples
+    :return: dict of 1D arrays of length number_of_samples
+    """
+
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for name, (lower, upper) in bounds.items():
+        strata = (rng.permutation(number_of_samples) + rng.random(number_of_samples)) / number_of_samples
+        samples[name] = lower + strata * (upper - lower)
+    return samples
+
+
+def sweep_length(samples: dict) -> int:
+    return max(np.size(value) for value in samples.values())
+
+
+def get_sweep_inputs(samples: dict, length: int = None) -> dict:
+    """
+    Inputs of every sample as they are sized: the SWEEP_DEFAULTS inputs, with PM_case and radial_case those of the
+    topology, and the topology and material indices (DESIGN_INDEX_FIELDS)
+
+    :param int length: number of samples, defaults to sweep_length(samples)
+    :return: dict of 1D arrays of that length
+    """
+
+    length = sweep_length(samples) if length is None else length
+    inputs = {name: np.broadcast_to(samples.get(name, default), (length,)) for name, default in SWEEP_DEFAULTS.items()}
+    indices = get_design_indices(inputs['PM_case'], inputs['radial_case'], samples.get('topology'),
+                                 samples.get('electrical_steel'), samples.get('conductor'), samples.get('magnet'))
+    inputs.update({field: np.broadcast_to(index, (length,)) for field, index in indices.items()})
+    inputs['PM_case'] = TOPOLOGIES['PM_case'][inputs['topology_index']]
+    inputs['radial_case'] = TOPOLOGIES['radial_case'][inputs['topology_index']]
+    return inputs
+
+
+def iter_sample_chunks(samples: dict, chunk_size: int):
+    """Yields (start index, chunk) where chunk is a dict of at most chunk_size samples. Scalar entries are
+    passed through to every chunk"""
+
+    length = sweep_length(samples)
+    for start in range(0, length, chunk_size):
+        yield start, {name: value[start:start + chunk_size] if np.ndim(value) else value
+                      for name, value in samples.items()}
+
+
+def size_sweep_chunk(chunk: dict, lca: bool = False, fields=None, thermal: bool = False) -> dict:
+    """Sizes one chunk of samples, missing inputs take the values in SWEEP_DEFAULTS. If fields is given only
+    those result columns are returned. thermal adds the sizing.thermal_network.THERMAL_FIELDS columns"""
+
+    inputs = dict(SWEEP_DEFAULTS)
+    inputs.update(chunk)
+    result = size_motor_batch(**inputs)
+    if lca:
+        em_pei = get_pei_matrix_batch(get_bom_array_batch(result))
+        for column, field in enumerate(EM_PEI_FIELDS):
+            result[field] = em_pei[:, column]
+    if thermal:
+        topology = inputs.get('topology')
+        if topology is None:
+            topology = get_topology_from_flags(inputs['PM_case'], inputs['radial_case'])
+        result.update(calc_thermal_screening_batch(result, inputs['max_torque'], inputs['base_speed'],
+                                                   inputs['average_shear_stress'], topology=topology,
+                                                   electrical_steel=inputs.get('electrical_steel'),
+                                                   conductor=inputs.get('conductor')))
+    if fields is not None:
+        result = {field: result[field] for field in fields}
+    return result
+
+
+def run_sweep(samples: dict, chunk_size: int = 100000, workers: int = None, lca: bool = False, fields=None,
+              thermal: bool = False):
+    """
+    Sizes all samples, chunk by chunk, and streams the results back in sample order
+
+    :param dict samples: input name -> 1D array (or scalar), see grid_samples and latin_hypercube_samples
+    :param int chunk_size: number of designs sized per vectorized call
+    :param int workers: number of worker processes, defaults to the cpu count; 1 runs in this process
+    :param bool lca: add the production environmental impact columns (EM_PEI_FIELDS) to the results
+    :param fields: result columns to return, defaults to all. Selecting only the needed columns keeps the cost of
+        sending results back from the worker processes down, which is what limits scaling on many cores
+    :param bool thermal: add the thermal screening columns (sizing.thermal_network.THERMAL_FIELDS), e.g. to drop
+        designs with thermal_limit_exceeded_flag
+    :return: generator of (start index, result dict of the chunk)
+    """
+
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_sample_chunks(samples, chunk_size)
+
+    if workers == 1:
+        for start, chunk in chunks:
+            yield start, size_sweep_chunk(chunk, lca, fields, thermal)
+        return
+
+    # only keep a few chunks per worker in flight, so that the results of a huge sweep are streamed rather than
+    # piling up in memory before the caller consumes them
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for start, chunk in chunks:
+            in_flight.append((start, executor.submit(size_sweep_chunk, chunk, lca, fields, thermal)))
+            if len(in_flight) >= 2 * workers:
+                start, future = in_flight.popleft()
+                yield start, future.result()
+        while in_flight:
+            start, future = in_flight.popleft()
+            yield start, future.result()
+
+
+def collect_sweep(sweep) -> dict:
+    """Concatenates the chunk results of run_sweep into one result dict"""
+
+    chunks = [result for _, result in sweep]
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in chunks[0]}
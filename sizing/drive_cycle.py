@@ -0,0 +1,204 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+
+
+""" Derives the MotorSizingTool requirements (max_torque, base_speed, maximum_rotor_speed) from drive-cycle
+torque-speed traces. Traces are read in chunks and folded into a TorqueSpeedEnvelope, so traces of any length are
+processed in bounded memory, and the requirements of a whole fleet go straight into size_motor_batch.
+
+Trace files hold one sample per row with the motor torque [Nm] and the rotor speed [rpm] in two columns:
+    - .csv: comma separated text, optionally with a header line
+    - .npy: (N x 2) float array, memory-mapped
+    - any other extension: raw little-endian float64 values, two per sample
+Samples with a non-finite torque or speed (logger dropouts) are skipped, speeds above the maximum speed of the
+envelope are rejected.
+"""
+
+# rpm, speeds above it are taken as corrupt samples rather than binned
+MAXIMUM_TRACE_SPEED = 100000.0
+
+
+def _iter_csv_chunks(path, chunk_size, columns):
+    with open(path) as trace_file:
+        first_line = trace_file.readline()
+        try:
+            [float(value) for value in first_line.split(',')]
+            lines = itertools.chain([first_line], trace_file)
+        except ValueError:
+            lines = trace_file
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            data = np.loadtxt(chunk, delimiter=',', ndmin=2)
+            yield data[:, columns[0]], data[:, columns[1]]
+
+
+def iter_trace_chunks(path: str, chunk_size: int = 1000000, columns=(0, 1)):
+    """
+    Yields (torque, speed) arrays of at most chunk_size samples of a trace file
+
+    :param str path: trace file, see the module docstring for the formats
+    :param int chunk_size: number of samples per chunk
+    :param columns: column indices of the torque and the speed
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        yield from _iter_csv_chunks(path, chunk_size, columns)
+        return
+    if extension == '.npy':
+        data = np.load(path, mmap_mode='r')
+    else:
+        data = np.memmap(path, dtype='<f8', mode='r')
+        data = data.reshape(-1, max(columns) + 1) if data.size else data.reshape(0, max(columns) + 1)
+    for start in range(0, data.shape[0], chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size], dtype=float)
+        yield chunk[:, columns[0]], chunk[:, columns[1]]
+
+
+class TorqueSpeedEnvelope:
+    """
+    Incrementally updated torque-speed envelope of a drive cycle. Motoring and regenerating samples are both taken
+    into account, by their absolute torque and speed.
+
+    :param float speed_bin_width: width of the speed bins of the envelope [rpm]
+    :param float maximum_speed: highest plausible speed [rpm], update raises a ValueError for faster samples
+    """
+
+    def __init__(self, speed_bin_width: float = 100.0, maximum_speed: float = MAXIMUM_TRACE_SPEED):
+        self.speed_bin_width = speed_bin_width
+        self.maximum_speed = maximum_speed
+        self.number_of_samples = 0
+        self.number_of_skipped_samples = 0
+        self.max_torque = 0.0
+        self.maximum_rotor_speed = 0.0
+        self.peak_power = 0.0
+        self.speed_at_peak_power = 0.0
+        self.envelope_torque = np.zeros(0)
+
+    def update(self, torque, speed):
+        """Folds a chunk of samples into the envelope, skipping samples with a non-finite torque or speed. A chunk
+        with a speed above maximum_speed raises a ValueError and leaves the envelope unchanged"""
+
+        torque = np.abs(np.asarray(torque, dtype=float))
+        speed = np.abs(np.asarray(speed, dtype=float))
+        finite = np.isfinite(torque) & np.isfinite(speed)
+        skipped = int(finite.size - np.count_nonzero(finite))
+        if skipped:
+            torque, speed = torque[finite], speed[finite]
+        if speed.size and speed.max() > self.maximum_speed:
+            raise ValueError(F"speed of {speed.max()} rpm is above the maximum speed of {self.maximum_speed} rpm")
+        self.number_of_skipped_samples += skipped
+        if torque.size == 0:
+            return self
+        self.number_of_samples += torque.size
+        self.max_torque = max(self.max_torque, float(torque.max()))
+        self.maximum_rotor_speed = max(self.maximum_rotor_speed, float(speed.max()))
+
+        power = torque * speed * math.pi / 30.0
+        peak = int(np.argmax(power))
+        if power[peak] > self.peak_power:
+            self.peak_power = float(power[peak])
+            self.speed_at_peak_power = float(speed[peak])
+
+        bins = (speed // self.speed_bin_width).astype(np.int64)
+        if bins.max() >= self.envelope_torque.size:
+            self.envelope_torque = np.pad(self.envelope_torque, (0, int(bins.max()) + 1 - self.envelope_torque.size))
+        np.maximum.at(self.envelope_torque, bins, torque)
+        return self
+
+    def merge(self, other):
+        """Combines the envelope of another part of the same trace (or of another trace) into this one"""
+
+        if other.speed_bin_width != self.speed_bin_width:
+            raise ValueError("envelopes have different speed bin widths")
+        self.number_of_samples += other.number_of_samples
+        self.number_of_skipped_samples += other.number_of_skipped_samples
+        self.max_torque = max(self.max_torque, other.max_torque)
+        self.maximum_rotor_speed = max(self.maximum_rotor_speed, other.maximum_rotor_speed)
+        if other.peak_power > self.peak_power:
+            self.peak_power = other.peak_power
+            self.speed_at_peak_power = other.speed_at_peak_power
+        size = max(self.envelope_torque.size, other.envelope_torque.size)
+        self.envelope_torque = np.maximum(np.pad(self.envelope_torque, (0, size - self.envelope_torque.size)),
+                                          np.pad(other.envelope_torque, (0, size - other.envelope_torque.size)))
+        return self
+
+    @property
+    def base_speed(self):
+        """Corner speed of a constant torque / constant power envelope through the maximum torque and the peak
+        power, so that MotorSizingTool's power, base_speed * pi / 30 * max_torque, equals the peak power [rpm]"""
+
+        if self.max_torque == 0.0:
+            return 0.0
+        return self.peak_power / self.max_torque * 30.0 / math.pi
+
+    def get_requirements(self) -> dict:
+        """Sizing requirements, keyword arguments of MotorSizingTool / size_motor_batch"""
+
+        return {'max_torque': self.max_torque,
+                'base_speed': self.base_speed,
+                'maximum_rotor_speed': self.maximum_rotor_speed}
+
+
+def read_trace_envelope(path: str, chunk_size: int = 1000000, speed_bin_width: float = 100.0,
+                        columns=(0, 1), maximum_speed: float = MAXIMUM_TRACE_SPEED) -> TorqueSpeedEnvelope:
+    """Streams a trace file into a TorqueSpeedEnvelope"""
+
+    envelope = TorqueSpeedEnvelope(speed_bin_width, maximum_speed)
+    for torque, speed in iter_trace_chunks(path, chunk_size, columns):
+        envelope.update(torque, speed)
+    return envelope
+
+
+def get_fleet_requirements(paths, chunk_size: int = 1000000, workers: int = 1, columns=(0, 1),
+                           speed_bin_width: float = 100.0, maximum_speed: float = MAXIMUM_TRACE_SPEED) -> dict:
+    """
+    Sizing requirements of a fleet, one trace file per vehicle
+
+    :param paths: trace files
+    :param int workers: number of worker processes reading traces in parallel
+    :param float speed_bin_width: width of the speed bins of the envelopes [rpm]
+    :param float maximum_speed: highest plausible speed [rpm], a trace with a faster sample raises a ValueError
+    :return: dict of arrays max_torque, base_speed, maximum_rotor_speed and peak_power, one element per trace
+    :raises ValueError: for traces without power (no sample with both torque and speed), which have no base speed
+    """
+
+    paths = list(paths)
+    arguments = (paths, [chunk_size] * len(paths), [speed_bin_width] * len(paths), [columns] * len(paths),
+                 [maximum_speed] * len(paths))
+    if workers == 1:
+        envelopes = list(map(read_trace_envelope, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            envelopes = list(executor.map(read_trace_envelope, *arguments))
+
+    without_power = [path for path, envelope in zip(paths, envelopes) if envelope.peak_power <= 0.0]
+    if without_power:
+        raise ValueError(F"traces without any power, no base speed can be derived: {without_power}")
+
+    requirements = {name: np.array([envelope.get_requirements()[name] for envelope in envelopes])
+                    for name in ('max_torque', 'base_speed', 'maximum_rotor_speed')}
+    requirements['peak_power'] = np.array([envelope.peak_power for envelope in envelopes])
+    return requirements
+
+
+def size_fleet(paths, average_shear_stress=80.0, dl_ratio=1.0, PM_case=True, radial_case=True,
+               chunk_size: int = 1000000, workers: int = 1, columns=(0, 1),
+               speed_bin_width: float = 100.0, maximum_speed: float = MAXIMUM_TRACE_SPEED) -> dict:
+    """Derives the requirements of every trace and sizes the whole fleet in one size_motor_batch call. The returned
+    dict holds the size_motor_batch columns plus the requirements"""
+
+    requirements = get_fleet_requirements(paths, chunk_size, workers, columns, speed_bin_width, maximum_speed)
+    result = size_motor_batch(requirements['max_torque'], requirements['base_speed'],
+                              requirements['maximum_rotor_speed'], average_shear_stress, dl_ratio, PM_case,
+                              radial_case)
+    result.update(requirements)
+    return result
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+
+from sizing.batch_sizing import calc_split_ratio_from_curve_batch
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import HOUSING_DIAMETER_ALLOWANCE, HOUSING_END_PLATE_LENGTH, SPLIT_RATIO_SLOPE
+
+
+""" Inverse sizing: the largest motor fitting a given housing envelope. MotorSizingTool goes from the torque, shear
+stress and dl ratio to the rotor (T = 500 pi sigma Dro^2 Lstk), the stator (Dso = Dro / split ratio(sigma)) and the
+housing (D_housing = Dso + 0.035, L_housing = 2 Lstk - 0.02). Here it is the other way round: for arrays of housing
+diameters and lengths the torque is maximised over the shear stress and the dl ratio, within their ranges and the
+tip speed and stacking limits.
+
+For a given shear stress the best rotor is closed form, the envelope bounds Dro and Lstk independently and the dl
+ratio range cuts the corner of the (Dro, Lstk) box. The torque of the best rotor is unimodal in the shear stress (the
+slope of its log decreases monotonically), so the optimal shear stress is found by a vectorized bisection on the sign
+of that slope, all envelopes at once.
+
+    fit = size_for_envelope(housing_diameter=[0.25, 0.3], housing_length=[0.2, 0.3])
+    size_motor_batch(fit['max_torque'], 3000.0, 12000.0, fit['average_shear_stress'], fit['dl_ratio'])
+"""
+
+# calc_tip_speed flags tip speeds of 110 m/s and above, the inverse sizing stays just below
+MAXIMUM_TIP_SPEED = 110.0 * (1.0 - 1e-9)
+# calc_stacking_limit flags stack lengths above 0.3 m, rounding of Dro / dl ratio must not push the stack over it
+MAXIMUM_STACK_LENGTH = 0.3 * (1.0 - 1e-9)
+# range of the split ratio curve fit of calc_split_ratio_from_curve
+SHEAR_STRESS_RANGE = (40.0, 120.0)
+# typical dl ratios of radial flux machines, see the example
+DL_RATIO_RANGE = (0.5, 3.0)
+
+INVERSE_SIZING_FIELDS = ('max_torque', 'average_shear_stress', 'dl_ratio', 'rotor_outer_diameter',
+                         'rotor_stack_length', 'stator_outer_diameter', 'housing_diameter', 'housing_length',
+                         'feasible')
+
+
+def _best_rotor(average_shear_stress, maximum_stator_diameter, maximum_diameter, maximum_stack_length, dl_ratio_min,
+                dl_ratio_max):
+    """
+    Largest torque rotor for given shear stresses
+
+    :return: (rotor outer diameter, stack length, slope of the log of the torque over the shear stress)
+    """
+
+    split_ratio = calc_split_ratio_from_curve_batch(1.0, average_shear_stress)[0]
+    stator_limited = split_ratio * maximum_stator_diameter < maximum_diameter
+    diameter = np.where(stator_limited, split_ratio * maximum_stator_diameter, maximum_diameter)
+
+    # T ~ Dro^2 Lstk: a too slim box is cut at dl_ratio_min (Lstk = Dro / dl_ratio_min, T ~ Dro^3), a too flat one
+    # at dl_ratio_max (Dro = dl_ratio_max Lstk, T independent of the diameter limit)
+    too_slim = diameter < dl_ratio_min * maximum_stack_length
+    too_flat = diameter > dl_ratio_max * maximum_stack_length
+    stack_length = np.where(too_slim, diameter / dl_ratio_min, maximum_stack_length)
+    diameter = np.where(too_flat, dl_ratio_max * maximum_stack_length, diameter)
+
+    # d log(T) / d sigma = 1 / sigma + elasticity * d log(Dro) / d sigma, with d log(Dro) / d sigma the split ratio
+    # slope over the split ratio where the stator diameter is the limit
+    elasticity = np.where(too_slim, 3.0, np.where(too_flat, 0.0, 2.0))
+    slope = 1.0 / average_shear_stress + np.where(stator_limited, elasticity * SPLIT_RATIO_SLOPE / split_ratio, 0.0)
+    return diameter, stack_length, slope
+
+
+@instrumented()
+def size_for_envelope(housing_diameter, housing_length, maximum_rotor_speed=12000.0,
+                      shear_stress_range=SHEAR_STRESS_RANGE, dl_ratio_range=DL_RATIO_RANGE,
+                      iterations: int = 60) -> dict:
+    """
+    Maximum torque motors fitting housing envelopes. Inputs can be scalars or arrays, they are broadcast against
+    each other; pass equal bounds in a range to fix the shear stress or the dl ratio
+
+    :param housing_diameter: array of maximum housing outer diameters [m]
+    :param housing_length: array of maximum housing lengths [m]
+    :param maximum_rotor_speed: array of maximum rotor speeds [rpm], for the tip speed limit
+    :param shear_stress_range: (lower, upper) average shear stress [kPa], scalars or arrays
+    :param dl_ratio_range: (lower, upper) rotor diameter-length ratio, scalars or arrays
+    :param int iterations: bisection steps, every step halves the shear stress interval
+    :return: dict of 1D arrays keyed by INVERSE_SIZING_FIELDS, the torque, dl ratio and geometry are NaN where
+        nothing fits (feasible False)
+    """
+
+    housing_diameter, housing_length, maximum_rotor_speed, shear_stress_min, shear_stress_max, dl_ratio_min, \
+        dl_ratio_max = (np.ravel(value) for value in np.broadcast_arrays(
+            np.asarray(housing_diameter, dtype=float), np.asarray(housing_length, dtype=float),
+            np.asarray(maximum_rotor_speed, dtype=float), *(np.asarray(value, dtype=float) for value in
+                                                            (*shear_stress_range, *dl_ratio_range))))
+
+    maximum_stator_diameter = housing_diameter - HOUSING_DIAMETER_ALLOWANCE
+    maximum_diameter = MAXIMUM_TIP_SPEED * 60.0 / math.pi / maximum_rotor_speed
+    maximum_stack_length = np.minimum((housing_length + 2 * HOUSING_END_PLATE_LENGTH) / 2, MAXIMUM_STACK_LENGTH)
+    limits = (maximum_stator_diameter, maximum_diameter, maximum_stack_length, dl_ratio_min, dl_ratio_max)
+
+    # the slope is positive below the optimum and negative above it
+    lower, upper = shear_stress_min.copy(), shear_stress_max.copy()
+    for _ in range(iterations):
+        middle = (lower + upper) / 2
+        rising = _best_rotor(middle, *limits)[2] > 0
+        lower = np.where(rising, middle, lower)
+        upper = np.where(rising, upper, middle)
+    average_shear_stress = (lower + upper) / 2
+
+    diameter, stack_length, _ = _best_rotor(average_shear_stress, *limits)
+    feasible = (maximum_stator_diameter > 0) & (maximum_stack_length > 0)
+    diameter = np.where(feasible, diameter, np.nan)
+    stack_length = np.where(feasible, stack_length, np.nan)
+    max_torque = 500.0 * math.pi * average_shear_stress * np.square(diameter) * stack_length
+    stator_outer_diameter = diameter / calc_split_ratio_from_curve_batch(1.0, average_shear_stress)[0]
+    return {'max_torque': max_torque,
+            'average_shear_stress': average_shear_stress,
+            'dl_ratio': diameter / stack_length,
+            'rotor_outer_diameter': diameter,
+            'rotor_stack_length': stack_length,
+            'stator_outer_diameter': stator_outer_diameter,
+            'housing_diameter': stator_outer_diameter + HOUSING_DIAMETER_ALLOWANCE,
+            'housing_length': stack_length * 2 - HOUSING_END_PLATE_LENGTH * 2,
+            'feasible': feasible}
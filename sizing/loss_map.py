@@ -0,0 +1,359 @@
+import math
+
+import numpy as np
+
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import DEFAULT_MATERIALS, get_conductor_property, get_density, get_topology_from_flags, \
+    get_topology_parameter
+from sizing.sizing_cache import LRUCache
+
+
+""" Copper, iron and mechanical loss maps and efficiency maps of sized motors on a torque-speed grid.
+The losses are estimated from the geometry of material_size_wieght_cal (stator slots, yoke and teeth, copper volume
+including the end windings) and the sizing requirements:
+    - copper: the electric loading which gives the average shear stress at maximum torque sets the slot current
+      density, J ~ torque, plus a demagnetising current above base speed. P = resistivity * J^2 * winding volume,
+      with the resistivity of the winding conductor
+    - iron: Steinmetz hysteresis and eddy current terms in the stator teeth and yoke, with the flux weakened by
+      base_speed / speed above base speed
+    - mechanical: bearing friction and rotor windage
+Maps of many designs are computed at once as (N x torque x speed) arrays. Grid points outside the
+constant torque / constant power envelope of a design are NaN. The slot geometry and fill factor are those of the
+topology of a design and the masses those of its electrical steel, see get_stator_parameters."""
+
+RESISTIVITY_COPPER = get_conductor_property('copper', 'resistivity')     # ohm m, at about 120 degC
+HYSTERESIS_COEFFICIENT = 0.02       # W/kg/Hz/T^2, M235-35A class electrical steel
+EDDY_CURRENT_COEFFICIENT = 5e-5     # W/kg/Hz^2/T^2
+FIELD_WEAKENING_CURRENT = 0.3       # demagnetising current at very high speed, relative to the maximum torque current
+BEARING_FRICTION = 0.0015
+WINDAGE_FRICTION = 0.005
+AIR_DENSITY = 1.2
+POLE_PAIRS = 4
+# stator of the default MotorSizingTool design (IPM, M235-35A, copper winding), as in material_size_wieght_cal;
+# other topologies and materials are looked up by get_stator_parameters
+KFILL = get_topology_parameter('IPM', 'fill_factor')
+SLOT_END_DIAMETER_RATIO = get_topology_parameter('IPM', 'slot_end_diameter_ratio')
+MASS_DENSITY_M235_35A = get_density('M235-35A')
+
+
+class LossMaps:
+    """
+    Loss maps of N designs on an n_torque x n_speed grid, losses in W
+
+    :ivar torque: (N x n_torque) torque axes [Nm], from 0 to the maximum torque of each design
+    :ivar speed: (N x n_speed) speed axes [rpm], from 0 to the maximum rotor speed of each design
+    :ivar copper_loss: (N x n_torque x n_speed)
+    :ivar iron_loss: (N x 1 x n_speed), does not depend on torque
+    :ivar mechanical_loss: (N x 1 x n_speed)
+    :ivar feasible: (N x n_torque x n_speed) grid points inside the torque-speed envelope
+    :ivar base_speed: (N,) base speeds [rpm], the corner of the envelope
+    """
+
+    def __init__(self, torque, speed, copper_loss, iron_loss, mechanical_loss, feasible, base_speed):
+        self.torque = torque
+        self.speed = speed
+        self.copper_loss = copper_loss
+        self.iron_loss = iron_loss
+        self.mechanical_loss = mechanical_loss
+        self.feasible = feasible
+        self.base_speed = base_speed
+
+    def __len__(self):
+        return self.torque.shape[0]
+
+    def __getitem__(self, index):
+        index = slice(index, index + 1) if isinstance(index, (int, np.integer)) else index
+        return LossMaps(self.torque[index], self.speed[index], self.copper_loss[index], self.iron_loss[index],
+                        self.mechanical_loss[index], self.feasible[index], self.base_speed[index])
+
+    @property
+    def total_loss(self):
+        return np.where(self.feasible, self.copper_loss + self.iron_loss + self.mechanical_loss, np.nan)
+
+    @property
+    def output_power(self):
+        return self.torque[:, :, None] * self.speed[:, None, :] * math.pi / 30.0
+
+    @property
+    def efficiency(self):
+        """Motoring efficiency, output / (output + losses)"""
+
+        output_power = self.output_power
+        with np.errstate(invalid='ignore'):
+            return output_power / (output_power + self.total_loss)
+
+
+def get_stator_parameters(topology=None, electrical_steel=None, conductor=None) -> tuple:
+    """
+    Slot end diameter ratio, fill factor, electrical steel density and winding resistivity of designs, from
+    sizing.material_database
+
+    :param topology: indices into TOPOLOGIES or a topology name, defaults to the IPM machine
+    :param electrical_steel: indices into MATERIALS or a material name, defaults to DEFAULT_MATERIALS
+    :param conductor: winding conductor indices into MATERIALS or a material name, defaults to DEFAULT_MATERIALS
+    :return: (slot end diameter ratio, fill factor, electrical steel density [kg/m^3], resistivity [ohm m]),
+        scalars or arrays
+    """
+
+    topology = get_topology_from_flags(True, True) if topology is None else topology
+    electrical_steel = DEFAULT_MATERIALS['electrical_steel'] if electrical_steel is None else electrical_steel
+    conductor = DEFAULT_MATERIALS['conductor'] if conductor is None else conductor
+    return get_topology_parameter(topology, 'slot_end_diameter_ratio'), \
+        get_topology_parameter(topology, 'fill_factor'), get_density(electrical_steel), \
+        get_conductor_property(conductor, 'resistivity')
+
+
+def _get_loss_coefficients(Dso, Dsi, Lstk, average_shear_stress, airgap_flux_density, end_winding_length,
+                           slot_end_diameter_ratio=SLOT_END_DIAMETER_RATIO, fill_factor=KFILL,
+                           electrical_steel_density=MASS_DENSITY_M235_35A, resistivity=RESISTIVITY_COPPER):
+    """
+    :return: (copper loss at maximum torque [W], tooth and yoke flux density^2 * mass [T^2 kg]) of every design
+    """
+
+    # geometry as in material_size_wieght_cal
+    stator_area = np.pi / 4 * (np.square(Dso) - np.square(Dsi))
+    yoke_area = np.pi / 4 * (np.square(Dso) - np.square(slot_end_diameter_ratio * Dso))
+    slot_area = (stator_area - yoke_area) * 0.5
+    copper_area = slot_area * fill_factor
+    copper_volume = copper_area * (Lstk + 2 * end_winding_length)
+    teeth_mass = slot_area * Lstk * electrical_steel_density
+    yoke_mass = yoke_area * Lstk * electrical_steel_density
+
+    # copper: shear stress = electric loading * airgap flux density / sqrt(2) at maximum torque
+    electric_loading = average_shear_stress * 1000.0 * math.sqrt(2) / airgap_flux_density
+    current_density = electric_loading * np.pi * Dsi / copper_area
+    copper_loss_at_max_torque = resistivity * np.square(current_density) * copper_volume
+
+    # iron: the teeth carry the airgap flux through half of the circumference, the yoke half the flux of a pole
+    tooth_flux_density = airgap_flux_density / 0.5
+    yoke_flux_density = airgap_flux_density * Dsi / (2 * POLE_PAIRS * (1 - slot_end_diameter_ratio) * Dso)
+    return copper_loss_at_max_torque, np.square(tooth_flux_density) * teeth_mass, \
+        np.square(yoke_flux_density) * yoke_mass
+
+
+def _get_mechanical_loss(Dsi, Lstk, Dsh, speed, electrical_steel_density=MASS_DENSITY_M235_35A):
+    # mechanical: bearing friction of the rotor and shaft weight, windage of the rotor surface
+    omega = speed * math.pi / 30.0
+    rotor_mass = np.pi / 4 * np.square(Dsi) * Lstk * electrical_steel_density
+    bearing_loss = 0.5 * BEARING_FRICTION * (rotor_mass * 9.81 * Dsh) * omega
+    windage_loss = WINDAGE_FRICTION * np.pi * AIR_DENSITY * (np.power(Dsi / 2, 4) * Lstk) * omega ** 3
+    return bearing_loss + windage_loss
+
+
+@instrumented()
+def compute_loss_maps(stator_outer_diameter, stator_inner_diameter, stack_length, shaft_diameter, max_torque,
+                      base_speed, maximum_rotor_speed, average_shear_stress=80.0, airgap_flux_density=1.0,
+                      end_winding_length=0.03, n_torque: int = 200, n_speed: int = 200, topology=None,
+                      electrical_steel=None, conductor=None) -> LossMaps:
+    """
+    Loss maps of sized designs, all arguments broadcast to N designs
+
+    :param stator_outer_diameter: Dso [m]
+    :param stator_inner_diameter: Dsi, equal to the rotor outer diameter [m]
+    :param stack_length: Lstk [m]
+    :param shaft_diameter: Dsh [m]
+    :param max_torque: [Nm]
+    :param base_speed: [rpm]
+    :param maximum_rotor_speed: [rpm]
+    :param average_shear_stress: [kPa], as used to size the rotor
+    :param airgap_flux_density: peak airgap flux density [T]
+    :param end_winding_length: axial length of the end windings at each end [m]
+    :param topology: topology indices or name, sets the slot geometry and fill factor, see get_stator_parameters
+    :param electrical_steel: electrical steel material indices or name, sets the iron and rotor masses
+    :param conductor: winding conductor material indices or name, sets the winding resistivity
+    """
+
+    (Dso, Dsi, Lstk, Dsh, max_torque, base_speed, maximum_rotor_speed, average_shear_stress, airgap_flux_density,
+     end_winding_length, slot_end_diameter_ratio, fill_factor, electrical_steel_density, resistivity) = \
+        (np.atleast_1d(np.asarray(value, dtype=float)) for value in np.broadcast_arrays(
+            stator_outer_diameter, stator_inner_diameter, stack_length, shaft_diameter, max_torque, base_speed,
+            maximum_rotor_speed, average_shear_stress, airgap_flux_density, end_winding_length,
+            *get_stator_parameters(topology, electrical_steel, conductor)))
+
+    torque = max_torque[:, None] * np.linspace(0.0, 1.0, n_torque)[None, :]
+    speed = maximum_rotor_speed[:, None] * np.linspace(0.0, 1.0, n_speed)[None, :]
+    # 1 up to base speed, base_speed / speed above
+    weakening = np.minimum(1.0, base_speed[:, None] / np.maximum(speed, 1e-12))
+
+    copper_loss_at_max_torque, teeth_flux_squared_mass, yoke_flux_squared_mass = _get_loss_coefficients(
+        Dso, Dsi, Lstk, average_shear_stress, airgap_flux_density, end_winding_length, slot_end_diameter_ratio,
+        fill_factor, electrical_steel_density, resistivity)
+    relative_current_squared = np.square(np.linspace(0.0, 1.0, n_torque))[None, :, None] + \
+        np.square(FIELD_WEAKENING_CURRENT * (1.0 - weakening))[:, None, :]
+    copper_loss = copper_loss_at_max_torque[:, None, None] * relative_current_squared
+
+    frequency = POLE_PAIRS * speed / 60.0
+    flux_squared_mass = teeth_flux_squared_mass + yoke_flux_squared_mass
+    iron_loss = (HYSTERESIS_COEFFICIENT * frequency + EDDY_CURRENT_COEFFICIENT * np.square(frequency)) * \
+        np.square(weakening) * flux_squared_mass[:, None]
+
+    mechanical_loss = _get_mechanical_loss(Dsi[:, None], Lstk[:, None], Dsh[:, None], speed,
+                                           electrical_steel_density[:, None])
+
+    feasible = torque[:, :, None] <= max_torque[:, None, None] * weakening[:, None, :] * (1 + 1e-12)
+    return LossMaps(torque, speed, copper_loss, iron_loss[:, None, :], mechanical_loss[:, None, :], feasible,
+                    base_speed)
+
+
+@instrumented()
+def compute_operating_point_losses(stator_outer_diameter, stator_inner_diameter, stack_length, shaft_diameter,
+                                   max_torque, base_speed, torque, speed, average_shear_stress=80.0,
+                                   airgap_flux_density=1.0, end_winding_length=0.03, topology=None,
+                                   electrical_steel=None, conductor=None) -> dict:
+    """
+    Losses of sized designs at one operating point each, arguments as in compute_loss_maps and broadcast to N
+    designs
+
+    :param torque: operating torque [Nm]
+    :param speed: operating speed [rpm]
+    :param topology: topology indices or name, sets the slot geometry and fill factor, see get_stator_parameters
+    :param electrical_steel: electrical steel material indices or name, sets the iron and rotor masses
+    :param conductor: winding conductor material indices or name, sets the winding resistivity
+    :return: dict of (N,) arrays [W]: copper_loss, teeth_iron_loss, yoke_iron_loss and mechanical_loss
+    """
+
+    (Dso, Dsi, Lstk, Dsh, max_torque, base_speed, torque, speed, average_shear_stress, airgap_flux_density,
+     end_winding_length, slot_end_diameter_ratio, fill_factor, electrical_steel_density, resistivity) = \
+        (np.atleast_1d(np.asarray(value, dtype=float)) for value in np.broadcast_arrays(
+            stator_outer_diameter, stator_inner_diameter, stack_length, shaft_diameter, max_torque, base_speed,
+            torque, speed, average_shear_stress, airgap_flux_density, end_winding_length,
+            *get_stator_parameters(topology, electrical_steel, conductor)))
+
+    weakening = np.minimum(1.0, base_speed / np.maximum(speed, 1e-12))
+    copper_loss_at_max_torque, teeth_flux_squared_mass, yoke_flux_squared_mass = _get_loss_coefficients(
+        Dso, Dsi, Lstk, average_shear_stress, airgap_flux_density, end_winding_length, slot_end_diameter_ratio,
+        fill_factor, electrical_steel_density, resistivity)
+    relative_current_squared = np.square(torque / max_torque) + np.square(FIELD_WEAKENING_CURRENT * (1.0 - weakening))
+    frequency = POLE_PAIRS * speed / 60.0
+    iron_loss_per_flux_squared_mass = (HYSTERESIS_COEFFICIENT * frequency + EDDY_CURRENT_COEFFICIENT *
+                                       np.square(frequency)) * np.square(weakening)
+    return {'copper_loss': copper_loss_at_max_torque * relative_current_squared,
+            'teeth_iron_loss': iron_loss_per_flux_squared_mass * teeth_flux_squared_mass,
+            'yoke_iron_loss': iron_loss_per_flux_squared_mass * yoke_flux_squared_mass,
+            'mechanical_loss': _get_mechanical_loss(Dsi, Lstk, Dsh, speed, electrical_steel_density)}
+
+
+def get_loss_maps_batch(batch_result: dict, max_torque, base_speed, maximum_rotor_speed, average_shear_stress=80.0,
+                        airgap_flux_density=1.0, end_winding_length=0.03, n_torque: int = 200,
+                        n_speed: int = 200, topology=None, electrical_steel=None, conductor=None) -> LossMaps:
+    """Loss maps of the designs of a sizing.batch_sizing.size_motor_batch result, sized for the given requirements.
+    topology, electrical_steel and conductor are those passed to size_motor_batch"""
+
+    return compute_loss_maps(batch_result['stator_outer_diameter'], batch_result['stator_inner_diameter'],
+                             batch_result['stator_stack_length'], batch_result['shaft_diameter'], max_torque,
+                             base_speed, maximum_rotor_speed, average_shear_stress, airgap_flux_density,
+                             end_winding_length, n_torque, n_speed, topology, electrical_steel, conductor)
+
+
+def _get_sizing_tool_arguments(sizing_tool) -> tuple:
+    stator = sizing_tool.electrical_motor_assembly.stator
+    rotor = sizing_tool.electrical_motor_assembly.rotor
+    return (stator.outer_diameter, stator.inner_diameter, stator.stack_length, rotor.shaft_diameter,
+            sizing_tool.max_torque, sizing_tool.base_speed, sizing_tool.maximum_rotor_speed,
+            sizing_tool.average_shear_stress, sizing_tool.airgap_flux_density, stator.end_winding_length)
+
+
+def _get_sizing_tool_materials(sizing_tool) -> dict:
+    return {'topology': get_topology_from_flags(sizing_tool.PM_case, sizing_tool.radial_case),
+            'electrical_steel': sizing_tool.electrical_steel,
+            'conductor': sizing_tool.conductor}
+
+
+def get_loss_map(sizing_tool, n_torque: int = 200, n_speed: int = 200) -> LossMaps:
+    """Loss map of the motor assembly of a MotorSizingTool after size_motor"""
+
+    return compute_loss_maps(*_get_sizing_tool_arguments(sizing_tool), n_torque=n_torque, n_speed=n_speed,
+                             **_get_sizing_tool_materials(sizing_tool))
+
+
+class LossMapCache(LRUCache):
+    """
+    LRU cache of loss maps of single designs, keyed by the quantized geometry and requirements and the topology and
+    material indices, so that identical designs (e.g. the same motor in many vehicles of a fleet) share one map
+
+    :param int maxsize: maximum number of maps held, a 200 x 200 map takes about 1 MB
+    :param float quantization: step float inputs are rounded to when building keys
+    """
+
+    def __init__(self, maxsize: int = 256, quantization: float = 1e-9):
+        super().__init__(maxsize, quantization)
+
+    def get_loss_map(self, sizing_tool, n_torque: int = 200, n_speed: int = 200) -> LossMaps:
+        arguments = _get_sizing_tool_arguments(sizing_tool)
+        materials = _get_sizing_tool_materials(sizing_tool)
+        key = self.make_key('loss_map', arguments) + (n_torque, n_speed) + \
+            tuple(int(index) for index in materials.values())
+        loss_maps = self._get(key)
+        if loss_maps is None:
+            loss_maps = compute_loss_maps(*arguments, n_torque=n_torque, n_speed=n_speed, **materials)
+            self._put(key, loss_maps)
+        return loss_maps
+
+
+def _interpolate(loss_maps: LossMaps, torque_index, speed_index):
+    """Bilinear interpolation of the total loss (without the envelope mask) at fractional grid indices, (N x M)"""
+
+    n_torque = loss_maps.torque.shape[1]
+    n_speed = loss_maps.speed.shape[1]
+    torque_lower = np.minimum(np.floor(torque_index).astype(np.intp), n_torque - 2)
+    speed_lower = np.minimum(np.floor(speed_index).astype(np.intp), n_speed - 2)
+    torque_fraction = torque_index - torque_lower
+    speed_fraction = speed_index - speed_lower
+    designs = np.arange(len(loss_maps))[:, None]
+
+    def bilinear(values, torque_lower, torque_fraction):
+        lower = values[designs, torque_lower, speed_lower] * (1 - speed_fraction) + \
+            values[designs, torque_lower, speed_lower + 1] * speed_fraction
+        if values.shape[1] == 1:
+            return lower
+        upper = values[designs, torque_lower + 1, speed_lower] * (1 - speed_fraction) + \
+            values[designs, torque_lower + 1, speed_lower + 1] * speed_fraction
+        return lower * (1 - torque_fraction) + upper * torque_fraction
+
+    zeros = np.zeros_like(torque_lower)
+    return {'copper_loss': bilinear(loss_maps.copper_loss, torque_lower, torque_fraction),
+            'iron_loss': bilinear(loss_maps.iron_loss, zeros, torque_fraction),
+            'mechanical_loss': bilinear(loss_maps.mechanical_loss, zeros, torque_fraction)}
+
+
+@instrumented()
+def integrate_drive_cycle(loss_maps: LossMaps, torque, speed, time_step=1.0) -> dict:
+    """
+    Energy flows of every design over a drive cycle, losses interpolated bilinearly in the maps. Motoring and
+    regenerating samples use the loss at the absolute torque and speed. The values are sums over the samples, so
+    the results of the chunks of a streamed trace (sizing.drive_cycle.iter_trace_chunks) can simply be added up.
+
+    :param LossMaps loss_maps: maps of N designs
+    :param torque: (M,) torque samples [Nm]
+    :param speed: (M,) speed samples [rpm]
+    :param time_step: duration of the samples [s], scalar or (M,)
+    :return: dict of (N,) arrays: mechanical_energy (negative when regenerating), copper_loss_energy,
+        iron_loss_energy, mechanical_loss_energy, loss_energy, electrical_energy (battery side) in J, and
+        samples_outside_envelope, the number of samples clipped to the envelope of the design
+    """
+
+    torque = np.asarray(torque, dtype=float)
+    speed = np.asarray(speed, dtype=float)
+    time_step = np.broadcast_to(np.asarray(time_step, dtype=float), torque.shape)
+    absolute_speed = np.abs(speed)
+    max_torque = loss_maps.torque[:, -1:]
+    maximum_speed = loss_maps.speed[:, -1:]
+    base_speed_torque = np.minimum(max_torque, max_torque * loss_maps.base_speed[:, None] /
+                                   np.maximum(absolute_speed[None, :], 1e-12))
+    outside = (np.abs(torque)[None, :] > base_speed_torque * (1 + 1e-9)) | (absolute_speed[None, :] > maximum_speed)
+    absolute_torque = np.minimum(np.abs(torque)[None, :], base_speed_torque)
+    clipped_speed = np.minimum(absolute_speed[None, :], maximum_speed)
+
+    torque_index = absolute_torque / max_torque * (loss_maps.torque.shape[1] - 1)
+    speed_index = clipped_speed / maximum_speed * (loss_maps.speed.shape[1] - 1)
+    losses = _interpolate(loss_maps, torque_index, speed_index)
+
+    mechanical_energy = (torque * speed * math.pi / 30.0 * time_step).sum()
+    energy = {'mechanical_energy': np.full(len(loss_maps), mechanical_energy)}
+    for name, loss in losses.items():
+        energy[name + '_energy'] = loss @ time_step
+    energy['loss_energy'] = energy['copper_loss_energy'] + energy['iron_loss_energy'] + \
+        energy['mechanical_loss_energy']
+    energy['electrical_energy'] = energy['mechanical_energy'] + energy['loss_energy']
+    energy['samples_outside_envelope'] = outside.sum(axis=1)
+    return energy
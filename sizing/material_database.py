@@ -0,0 +1,167 @@
+import numpy as np
+
+
+""" Material and topology database of the sizing and LCA engines. The tables are built once at import, they are
+read-only structured arrays, and materials and topologies are referred to by their integer row index, so that batch
+runs can sweep material grades and topologies as ordinary integer arrays (MATERIALS['density'][index] looks the
+densities of a whole batch up at once).
+
+    steel = get_material_index('M270-35A')
+    size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, electrical_steel=[steel, 0])
+"""
+
+# BOM columns, as in ElectricMachineBom.get_bom_as_array
+BOM_COLUMNS = ('electrical_steel', 'other_steel', 'aluminum', 'copper', 'insulation_materials', 'insulation_resins',
+               'paint', 'plastics', 'ndfeb', 'ferrite')
+
+MATERIAL_DTYPE = np.dtype([('name', 'U24'), ('density', '<f8'), ('bom_column', '<i8')])
+# name, mass density [kg/m^3], BOM column the mass of the material is booked to
+MATERIALS = np.array([
+    ('M235-35A', 7650.0, 0),
+    ('M270-35A', 7650.0, 0),
+    ('NO20', 7600.0, 0),
+    ('copper', 8933.0, 3),
+    ('aluminum conductor', 2700.0, 2),
+    ('N42UH', 7500.0, 8),
+    ('N48SH', 7550.0, 8),
+    ('ferrite', 5000.0, 9),
+    ('mild steel', 7800.0, 1),
+    ('pole piece steel', 7850.0, 0),    # got it from FREMAT tool
+    ('bolt steel', 7870.0, 1),
+    ('aluminum alloy', 2790.0, 2),
+    # please refer to https://vodoprovod.blogspot.com/2017/12/convert-kg-paint-to-liters-online.html
+    ('paint', 1600.0, 6),
+], dtype=MATERIAL_DTYPE)
+MATERIALS.flags.writeable = False
+MATERIAL_INDEX = {name: index for index, name in enumerate(MATERIALS['name'].tolist())}
+
+CONDUCTOR_DTYPE = np.dtype([('material', '<i8'), ('resistivity', '<f8'), ('thermal_conductivity', '<f8'),
+                            ('specific_heat', '<f8')])
+# properties of the winding conductor materials: material index, electrical resistivity [ohm m] at about 120 degC
+# winding temperature, thermal conductivity along the conductors [W/m/K] and specific heat [J/kg/K]
+CONDUCTORS = np.array([
+    (MATERIAL_INDEX['copper'], 2.3e-8, 400.0, 385.0),
+    (MATERIAL_INDEX['aluminum conductor'], 3.8e-8, 237.0, 900.0),
+], dtype=CONDUCTOR_DTYPE)
+CONDUCTORS.flags.writeable = False
+# row of CONDUCTORS of every material, -1 for materials which are not winding conductors
+CONDUCTOR_ROWS = np.full(len(MATERIALS), -1)
+CONDUCTOR_ROWS[CONDUCTORS['material']] = np.arange(len(CONDUCTORS))
+CONDUCTOR_ROWS.flags.writeable = False
+
+TOPOLOGY_DTYPE = np.dtype([('name', 'U16'), ('PM_case', '?'), ('radial_case', '?'),
+                           ('slot_end_diameter_ratio', '<f8'), ('fill_factor', '<f8'), ('pole_arc_ratio', '<f8'),
+                           ('rotor_pm_fraction', '<f8'), ('rotor_cage_fraction', '<f8'),
+                           ('rotor_barrier_fraction', '<f8'), ('magnet', '<i8')])
+# slot_end_diameter_ratio (d): ratio between the slot end diameter and the outer stator diameter. From the benchmark
+# data and MotorCAD EV examples d ranges from 0.86 (IM) over 0.88 (IPM) to 0.9 (PMaSynRel); the sizing has used 0.88
+# for all machines so far, which is kept for the IPM, induction and X-motor rows.
+# pole_arc_ratio (alpha_p): pole arc to pole pitch ratio of the X-motor, see the paper by Prof Kias in IEEE
+# transactions on magnetics.
+# rotor_pm_fraction, rotor_cage_fraction: share of the rotor cylinder volume taken by magnets and by the cage, from
+# the MotorCAD templates for EV applications. rotor_barrier_fraction: share of the rotor cylinder volume cut out as
+# flux barriers of reluctance machines (including the magnets in them).
+# magnet: default magnet material of the topology
+TOPOLOGIES = np.array([
+    ('IPM', True, True, 0.88, 0.4, 0.0, 0.2, 0.0, 0.0, MATERIAL_INDEX['N42UH']),
+    ('induction', False, True, 0.88, 0.4, 0.0, 0.0, 0.5, 0.0, MATERIAL_INDEX['N42UH']),
+    ('X-motor', True, False, 0.88, 0.4, 0.8, 0.0, 0.0, 0.0, MATERIAL_INDEX['ferrite']),
+    ('SynRel', False, True, 0.9, 0.4, 0.0, 0.0, 0.0, 0.3, MATERIAL_INDEX['ferrite']),
+    ('PMaSynRel', True, True, 0.9, 0.4, 0.0, 0.1, 0.0, 0.3, MATERIAL_INDEX['ferrite']),
+], dtype=TOPOLOGY_DTYPE)
+TOPOLOGIES.flags.writeable = False
+TOPOLOGY_INDEX = {name: index for index, name in enumerate(TOPOLOGIES['name'].tolist())}
+
+# plain Python copies of the tables for scalar code like MotorSizingTool, where numpy lookups would cost more than
+# the sizing itself
+MATERIAL_DENSITIES = tuple(MATERIALS['density'].tolist())
+MATERIAL_BOM_COLUMNS = tuple(MATERIALS['bom_column'].tolist())
+TOPOLOGY_PARAMETERS = tuple(dict(zip(TOPOLOGY_DTYPE.names, row)) for row in TOPOLOGIES.tolist())
+
+# materials of the components, the grades of electrical steel, conductor and magnet can be chosen per design
+DEFAULT_MATERIALS = {'electrical_steel': MATERIAL_INDEX['M235-35A'],
+                     'conductor': MATERIAL_INDEX['copper'],
+                     'shaft': MATERIAL_INDEX['mild steel'],
+                     'pole_pieces': MATERIAL_INDEX['pole piece steel'],
+                     'bolt': MATERIAL_INDEX['bolt steel'],
+                     'housing': MATERIAL_INDEX['aluminum alloy'],
+                     'paint': MATERIAL_INDEX['paint']}
+
+# geometry allowances
+END_WINDING_LENGTH = 0.03           # axial length of the end windings at each end
+# this value has been achieved from Benchmark data and from MotorCAD templates for EV motors
+HOUSING_DIAMETER_ALLOWANCE = 0.035
+HOUSING_END_PLATE_LENGTH = 0.01     # 10 mm has been assumed for front and end plate of the motor housing
+END_CAP_THICKNESS = 5 / 1000
+PAINT_THICKNESS = 1 / 1000
+X_MOTOR_AXIAL_PM_LENGTH = 0.012
+X_MOTOR_END_RING_LENGTH = 0.005
+X_MOTOR_BOLT_DIAMETER = 0.012       # please refer to the Edison motor prototype data
+# masses relative to the stator copper mass, please refer to the sizing confluence page benchmark data and to the
+# Environmental impact paper
+WINDING_INSULATION_RATIO = 1/100
+IMPREGNATION_RATIO = 31.2/100
+PLASTIC_RATIO = 5/100
+# curve fit of the stator split ratio (rotor over stator outer diameter) against the average shear stress [kPa], from
+# benchmark data, valid from 40 to 120 kPa
+SPLIT_RATIO_SLOPE = -0.0018
+SPLIT_RATIO_INTERCEPT = 0.8062
+
+
+def get_material_index(name: str) -> int:
+    try:
+        return MATERIAL_INDEX[name]
+    except KeyError:
+        raise KeyError(F"unknown material {name!r}, known materials are {sorted(MATERIAL_INDEX)}") from None
+
+
+def get_topology_index(name: str) -> int:
+    try:
+        return TOPOLOGY_INDEX[name]
+    except KeyError:
+        raise KeyError(F"unknown topology {name!r}, known topologies are {sorted(TOPOLOGY_INDEX)}") from None
+
+
+def get_density(material) -> float:
+    """Density [kg/m^3] of a material given by name or index, an array of indices gives an array of densities"""
+
+    if isinstance(material, str):
+        material = get_material_index(material)
+    if np.ndim(material):
+        return MATERIALS['density'][material]
+    return MATERIAL_DENSITIES[material]
+
+
+def get_conductor_property(conductor, name: str):
+    """Property of a winding conductor material (see CONDUCTORS) given by name or index, an array of indices gives
+    an array of values"""
+
+    if isinstance(conductor, str):
+        conductor = get_material_index(conductor)
+    rows = CONDUCTOR_ROWS[conductor]
+    if np.any(rows < 0):
+        raise KeyError(F"not a winding conductor material: {np.unique(np.asarray(conductor)[rows < 0]).tolist()}")
+    if np.ndim(rows):
+        return CONDUCTORS[name][rows]
+    return CONDUCTORS[name][rows].item()
+
+
+def get_topology_from_flags(PM_case, radial_case):
+    """Topology indices of the PM_case / radial_case flags of MotorSizingTool"""
+
+    if np.ndim(PM_case) == 0 and np.ndim(radial_case) == 0:
+        if radial_case:
+            return TOPOLOGY_INDEX['IPM'] if PM_case else TOPOLOGY_INDEX['induction']
+        return TOPOLOGY_INDEX['X-motor']
+    return np.where(radial_case, np.where(PM_case, TOPOLOGY_INDEX['IPM'], TOPOLOGY_INDEX['induction']),
+                    TOPOLOGY_INDEX['X-motor'])
+
+
+def get_topology_parameter(topology, name: str):
+    """Parameter of a topology given by name or index, an array of indices gives an array of values"""
+
+    if isinstance(topology, str):
+        topology = get_topology_index(topology)
+    if np.ndim(topology):
+        return TOPOLOGIES[name][topology]
+    return TOPOLOGY_PARAMETERS[topology][name]
@@ -0,0 +1,44 @@
+from sizing.batch_sizing import MASS_FIELDS, BOM_FIELDS
+
+
+class MotorMassResult:
+    """
+    Masses [kg] of every component and BOM category of a sized motor, as calculated by
+    MotorSizingTool.material_size_wieght_cal. Components which do not exist for the topology
+    (e.g. the cage of a PM machine) are zero.
+
+    :param bool PM_case: True for PM machines, False for induction machines
+    :param bool radial_case: True for radial machines, False for X-motors
+    :param float housing_diameter: outer diameter of the housing
+    :param float housing_length: length of the housing
+    """
+
+    __slots__ = ('PM_case', 'radial_case', 'housing_diameter', 'housing_length') + MASS_FIELDS + BOM_FIELDS
+
+    def __init__(self, PM_case: bool = True, radial_case: bool = True, housing_diameter: float = 0.0,
+                 housing_length: float = 0.0, **masses):
+        self.PM_case = PM_case
+        self.radial_case = radial_case
+        self.housing_diameter = housing_diameter
+        self.housing_length = housing_length
+        for field in MASS_FIELDS + BOM_FIELDS:
+            setattr(self, field, masses.pop(field, 0.0))
+        if masses:
+            raise TypeError(F"unknown mass fields {sorted(masses)}")
+
+    @classmethod
+    def from_batch(cls, batch_result: dict, index: int, PM_case: bool, radial_case: bool):
+        """Pulls design `index` out of a size_motor_batch result"""
+
+        masses = {field: batch_result[field][index].item() for field in MASS_FIELDS + BOM_FIELDS}
+        return cls(PM_case=PM_case, radial_case=radial_case,
+                   housing_diameter=batch_result['housing_diameter'][index].item(),
+                   housing_length=batch_result['housing_length'][index].item(), **masses)
+
+    def get_bom_as_array(self):
+        """Prepares a 1x10 array for LCA calculations, same layout as ElectricMachineBom.get_bom_as_array"""
+
+        return [[getattr(self, field)] for field in BOM_FIELDS]
+
+    def __repr__(self):
+        return F"MotorMassResult(total_motor_weight={self.total_motor_weight})"
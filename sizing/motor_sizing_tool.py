@@ -1,6 +1,14 @@
 import numpy as np
 import math
 from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.motor_mass_result import MotorMassResult
+from sizing.sizing_report import print_sizing_report
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import DEFAULT_MATERIALS, END_WINDING_LENGTH, HOUSING_DIAMETER_ALLOWANCE, \
+    HOUSING_END_PLATE_LENGTH, END_CAP_THICKNESS, PAINT_THICKNESS, X_MOTOR_AXIAL_PM_LENGTH, X_MOTOR_END_RING_LENGTH, \
+    X_MOTOR_BOLT_DIAMETER, WINDING_INSULATION_RATIO, IMPREGNATION_RATIO, PLASTIC_RATIO, MATERIAL_DENSITIES, \
+    MATERIAL_BOM_COLUMNS, BOM_COLUMNS, TOPOLOGY_PARAMETERS, SPLIT_RATIO_SLOPE, SPLIT_RATIO_INTERCEPT, \
+    get_topology_from_flags
 
 
 class MotorSizingTool:
@@ -12,6 +20,11 @@ class MotorSizingTool:
     :param float maximum_rotor_speed: max rotor speed calculated from torque speed curve
     :param float max_torque: Calculated from torque speed curve
     :param float base_speed: Calculated from torque speed curve - speed at which you reach maximum power
+    :param bool verbose: print a sizing report (see sizing.sizing_report) after size_motor
+    :param int electrical_steel: index of the electrical steel grade in sizing.material_database.MATERIALS,
+        defaults to M235-35A
+    :param int conductor: index of the stator winding (and cage) conductor material, defaults to copper
+    :param int magnet: index of the magnet material, defaults to the magnet of the topology
     """
 
     """ In the following, the EV requirements results from Jack's tool can be imported as the main design requirements of the EV E-Motor"""
@@ -24,6 +37,10 @@ class MotorSizingTool:
                  airgap_flux_density=1.0,
                  PM_case=True,
                  radial_case=True,
+                 verbose=False,
+                 electrical_steel=None,
+                 conductor=None,
+                 magnet=None,
                  ):
 
 
@@ -38,9 +55,15 @@ class MotorSizingTool:
         self.stacking_limit_exceeded_flag = False
         self.radial_case = radial_case
         self.PM_case = PM_case
+        self.verbose = verbose
+        self.electrical_steel = DEFAULT_MATERIALS['electrical_steel'] if electrical_steel is None else electrical_steel
+        self.conductor = DEFAULT_MATERIALS['conductor'] if conductor is None else conductor
+        self.magnet = magnet
+        self.power = None
+        self.mass_result = None
 
 
-
+    @instrumented()
     def calc_rot_dimensions(self):
         """ The rotor volume computation using the reported equation in the confluence page.
         Note that, the dl.ratio is an inout in the main file at line 31 and it ranges from 0.5 to 2,
@@ -55,6 +78,7 @@ class MotorSizingTool:
             self.electrical_motor_assembly.rotor.outer_diameter / self.electrical_motor_assembly.rotor.dl_ratio
 
 
+    @instrumented()
     def calc_tip_speed(self):
         ''' Calculates rotor tip speed, compares value to maximum for silicon iron and
         returns error if tip speed is exceded'''
@@ -66,6 +90,7 @@ class MotorSizingTool:
         else:
             self.tip_speed_error_flag = False
 
+    @instrumented()
     def calc_stacking_limit(self):
 
         # if the stack length is above 300 mm two separate stacks will be required
@@ -74,8 +99,9 @@ class MotorSizingTool:
         else:
             self.stacking_limit_exceeded_flag = False
 
+    @instrumented()
     def calc_split_ratio_from_curve(self):
-        # the stator ID should be linked to the rotor OD; figure out if this can be done using a link object
+        # the stator ID is linked to the rotor OD, sizing.sizing_graph.SizingGraph tracks this link between the stages
         self.electrical_motor_assembly.stator.inner_diameter = \
             self.electrical_motor_assembly.rotor.outer_diameter
         self.electrical_motor_assembly.stator.stack_length = self.electrical_motor_assembly.rotor.stack_length
@@ -86,7 +112,7 @@ class MotorSizingTool:
         else:
             self.shear_stress_out_of_range = False
 
-        stator_split_ratio = -0.0018 * self.average_shear_stress + 0.8062
+        stator_split_ratio = SPLIT_RATIO_SLOPE * self.average_shear_stress + SPLIT_RATIO_INTERCEPT
         self.electrical_motor_assembly.stator.split_ratio = stator_split_ratio
 
         inner_diameter = self.electrical_motor_assembly.stator.inner_diameter
@@ -96,13 +122,13 @@ class MotorSizingTool:
         """ In the previous piece of code, for more details of the used Benchmark equation, or linear assumption, please follow the confluence page"""
 
 
+    @instrumented()
     def calc_rotor_inner_diameter(self):
 
         """ This function for estimating the rotor inner diameter, which will not be the same as the shaft diameter in case of X-motor. Besides, this function computes the shaft diameter"""
 
         Power =  self.base_speed * np.pi /30 * self.max_torque
-        print(F"power = {Power/1000} kW")
-        # print("{}{}{}".format("power = ", Power/1000, " kw"))
+        self.power = Power
 
         shaft_diameter = np.power((1330*Power/self.base_speed), 1.0 / 3.0)/1000
 
@@ -116,21 +142,25 @@ class MotorSizingTool:
             D_Bush_inner = shaft_diameter
 
 
+    @instrumented()
     def add_end_winding_length(self):
         self.electrical_motor_assembly.stator.end_winding_length = 0.03
 
 
+    @instrumented()
     def material_size_wieght_cal(self):
 
-        mass_density_copper = 8933
-        mass_density_M235_25A = 7650
-        mass_density_Mild_steel = 7800
-        mass_density_N42UH = 7500
-        mass_density_Aluminum_alloy= 2790
-        pole_piece_density = 7850   # got it from FREMAT tool
-        magnet_density = 5000
-        bolt_density = 7870
-        kfill = 0.4
+        # materials and topology constants, see sizing.material_database
+        topology = TOPOLOGY_PARAMETERS[get_topology_from_flags(self.PM_case, self.radial_case)]
+        magnet = topology['magnet'] if self.magnet is None else self.magnet
+        conductor_density = MATERIAL_DENSITIES[self.conductor]
+        electrical_steel_density = MATERIAL_DENSITIES[self.electrical_steel]
+        mass_density_Mild_steel = MATERIAL_DENSITIES[DEFAULT_MATERIALS['shaft']]
+        mass_density_Aluminum_alloy = MATERIAL_DENSITIES[DEFAULT_MATERIALS['housing']]
+        pole_piece_density = MATERIAL_DENSITIES[DEFAULT_MATERIALS['pole_pieces']]
+        magnet_density = MATERIAL_DENSITIES[magnet]
+        bolt_density = MATERIAL_DENSITIES[DEFAULT_MATERIALS['bolt']]
+        kfill = topology['fill_factor']
 
         # stator side
 
@@ -140,73 +170,54 @@ class MotorSizingTool:
         Dsh = self.electrical_motor_assembly.rotor.shaft_diameter
         Lstk = self.electrical_motor_assembly.rotor.stack_length
         Dri = self.electrical_motor_assembly.rotor.inner_diameter
-        D_Bush_outer = Dri
-        D_Bush_inner = Dsh
-
-        d = 0.88    # ration between the slot end diameter to the outer stator diameter, please refer to more details in the following script lines.
-
-        print(F"Dso = {Dso} m")
-        print(F"Dsi = {Dsi} m")
-        print(F"Dro = {Dro} m")
-
-        if self.radial_case == True:
-            print(F"Dri = Dsh =  {Dri} m")
-        else:
-            D_B_o = D_Bush_outer
-            D_B_i = D_Bush_inner
-            alpha_p = 0.8 # the pole arc to pole pitch ratio. This value has been chosen based on the Paper published by Prof Kias In IEEE transaction on magnetics, please, refer to this paper for more details.
-            print(F"Dri =  {Dri} m")
-            print(F"Dsh =  {Dsh} m")
-            print(F"D_B_o = Dri =  {D_B_o} m")
-            print(F"D_B_i = Dsh =   {D_B_i} m")
-
-        print(F"Lstk =  {Lstk} m")
+        d = topology['slot_end_diameter_ratio']    # ration between the slot end diameter to the outer stator diameter
 
-        """ from the benchmark data and MotorCAD EV examples, d is ranging from 0.86 to .9, where d = 0.86 for IM, d = 0.88 for IPM and d = 0.9 for PMaSynRel E-machines"""
+        if self.radial_case == False:
+            alpha_p = topology['pole_arc_ratio'] # the pole arc to pole pitch ratio.
         # stator side
 
-        stator_cylinder_vol = np.pi/4 * (Dso**2 - Dsi**2) * Lstk
-        stator_yoke_vol = np.pi/4 * (Dso**2 - (d*Dso)**2) * Lstk
+        stator_cylinder_vol = np.pi/4 * (np.square(Dso) - np.square(Dsi)) * Lstk
+        stator_yoke_vol = np.pi/4 * (np.square(Dso) - np.square(d*Dso)) * Lstk
         stator_teeth_slots_vol = stator_cylinder_vol - stator_yoke_vol
         stator_teeth_vol = stator_teeth_slots_vol * 0.5
         stator_slots_vol = stator_teeth_vol
         stator_core_lamination_vol = stator_teeth_vol + stator_yoke_vol
-        copper_winding_vol = stator_slots_vol * (1/Lstk) * (Lstk + 0.03*2) * kfill
+        copper_winding_vol = stator_slots_vol * (1/Lstk) * (Lstk + END_WINDING_LENGTH*2) * kfill
 
-        stator_core_weight = stator_core_lamination_vol * mass_density_M235_25A
-        stator_copper_weight = copper_winding_vol * mass_density_copper
+        stator_core_weight = stator_core_lamination_vol * electrical_steel_density
+        stator_copper_weight = copper_winding_vol * conductor_density
 
         # rotor side
-        rotor_cylinder_vol = np.pi / 4 * (Dsi ** 2 - Dri ** 2) * Lstk
+        rotor_cylinder_vol = np.pi / 4 * (np.square(Dsi) - np.square(Dri)) * Lstk
 
         if self.radial_case == True:
-            PM_vol = 0.2 * rotor_cylinder_vol
-            Cage_vol = 0.5 * rotor_cylinder_vol
-            shaft_vol = np.pi / 4 * (Dri ** 2) * (Lstk * 2)  # please refer to Benchmark data or MotorCAD templates for EV
+            PM_vol = topology['rotor_pm_fraction'] * rotor_cylinder_vol
+            Cage_vol = topology['rotor_cage_fraction'] * rotor_cylinder_vol
+            shaft_vol = np.pi / 4 * (np.square(Dri)) * (Lstk * 2)  # please refer to Benchmark data or MotorCAD templates for EV
             shaft_weight = shaft_vol * mass_density_Mild_steel
             """For these figures, please refer to MotorCAD Templates for EV applications"""
             if self.PM_case == True:
                 rotor_lamination_vol = rotor_cylinder_vol - PM_vol
-                rotor_core_weight = rotor_lamination_vol * mass_density_M235_25A
-                PM_weight = PM_vol * mass_density_N42UH
+                rotor_core_weight = rotor_lamination_vol * electrical_steel_density
+                PM_weight = PM_vol * magnet_density
                 E_machine_active_component_weight = shaft_weight + rotor_core_weight + PM_weight + stator_core_weight + stator_copper_weight
 
             else:
                 rotor_lamination_vol = rotor_cylinder_vol - Cage_vol
-                rotor_core_weight = rotor_lamination_vol * mass_density_M235_25A
-                Cage_weight = Cage_vol * mass_density_copper
+                rotor_core_weight = rotor_lamination_vol * electrical_steel_density
+                Cage_weight = Cage_vol * conductor_density
                 E_machine_active_component_weight = shaft_weight + rotor_core_weight + Cage_weight + stator_core_weight + stator_copper_weight
 
         else:
-            LaPM = 0.012
-            L_end_ring = 0.005
-            Dbo = 0.012      # please refer to the Edison motor prototype data
+            LaPM = X_MOTOR_AXIAL_PM_LENGTH
+            L_end_ring = X_MOTOR_END_RING_LENGTH
+            Dbo = X_MOTOR_BOLT_DIAMETER
             pole_pieces_vol = rotor_cylinder_vol * alpha_p
             circumferential_PM_vol = rotor_cylinder_vol * (1-alpha_p)
             axial_PM_vol = rotor_cylinder_vol/Lstk * LaPM
-            Bush_vol = np.pi / 4 * (Dri ** 2 - Dsh ** 2) * Lstk
-            shaft_vol = np.pi / 4 * (Dsh ** 2) * (Lstk * 2)
-            Bolt_vol = np.pi / 4 * (Dbo ** 2) * (Lstk * 2)
+            Bush_vol = np.pi / 4 * (np.square(Dri) - np.square(Dsh)) * Lstk
+            shaft_vol = np.pi / 4 * (np.square(Dsh)) * (Lstk * 2)
+            Bolt_vol = np.pi / 4 * (np.square(Dbo)) * (Lstk * 2)
             end_ring_vol = rotor_cylinder_vol/Lstk * L_end_ring * 2
 
             pole_pieces_weight = pole_pieces_vol * pole_piece_density
@@ -221,15 +232,15 @@ class MotorSizingTool:
 
         # Housing
 
-        D_housing = Dso + 0.035      # this value has been achieved from Benchmark data and from MotorCAD templates for EV motors
-        L_housing = Lstk * 2 - 0.01*2  # 10 mm has been assumed for front and end plate of the motor housing
-        Housing_vol = np.pi/4 * (D_housing**2 - Dso**2) * L_housing
+        D_housing = Dso + HOUSING_DIAMETER_ALLOWANCE
+        L_housing = Lstk * 2 - HOUSING_END_PLATE_LENGTH*2
+        Housing_vol = np.pi/4 * (np.square(D_housing) - np.square(Dso)) * L_housing
         Housing_weight = Housing_vol * mass_density_Aluminum_alloy
 
         # End caps
 
-        end_cap_thickness = 5 / 1000
-        Front_end_cap_volume = np.pi/4 * (D_housing**2 - Dri**2) * end_cap_thickness
+        end_cap_thickness = END_CAP_THICKNESS
+        Front_end_cap_volume = np.pi/4 * (np.square(D_housing) - np.square(Dri)) * end_cap_thickness
         Front_end_cap_weight = Front_end_cap_volume * mass_density_Aluminum_alloy
         rear_end_cap_weight = Front_end_cap_weight
         total_end_caps_weight = Front_end_cap_weight + rear_end_cap_weight
@@ -242,86 +253,84 @@ class MotorSizingTool:
 
         # insulation, painting, and plastic materials
 
-        winding_insulation_weight = 1/100 * stator_copper_weight    # please, refer to the sizing confluence page benchmark data
+        winding_insulation_weight = WINDING_INSULATION_RATIO * stator_copper_weight
         Insulation_materials = winding_insulation_weight            # rename for BOM class
-        impregnation_weight = 31.2/100 * stator_copper_weight       # please, refer to the sizing confluence page benchmark data
+        impregnation_weight = IMPREGNATION_RATIO * stator_copper_weight
         Insulation_resins = impregnation_weight                     # rename for BOM class
-        plastic_weight = 5/100 * stator_copper_weight               # please, refer to the Environmental impact paper
+        plastic_weight = PLASTIC_RATIO * stator_copper_weight
         Plastics = plastic_weight                                   # rename for BOM class
 
-        Housing_paint_thickness = 1/1000
-        end_caps_paint_thickness = 1/1000
+        Housing_paint_thickness = PAINT_THICKNESS
+        end_caps_paint_thickness = PAINT_THICKNESS
 
-        painting_material_mass_density = 1600    # please refer to https://vodoprovod.blogspot.com/2017/12/convert-kg-paint-to-liters-online.html
-        Housing_paint_weight = np.pi/4 * ((D_housing+2*Housing_paint_thickness)**2 - D_housing**2) * L_housing * painting_material_mass_density
-        End_cap_paint_weight = np.pi/4 * (D_housing**2 - Dri**2) * end_caps_paint_thickness * 2 * 2   # I multiply by 2 for both front and rear end caps and then multiply again by 2 for considering both inner and outer surface of the caps
+        painting_material_mass_density = MATERIAL_DENSITIES[DEFAULT_MATERIALS['paint']]
+        Housing_paint_weight = np.pi/4 * (np.square(D_housing+2*Housing_paint_thickness) - np.square(D_housing)) * L_housing * painting_material_mass_density
+        End_cap_paint_weight = np.pi/4 * (np.square(D_housing) - np.square(Dri)) * end_caps_paint_thickness * 2 * 2   # I multiply by 2 for both front and rear end caps and then multiply again by 2 for considering both inner and outer surface of the caps
 
         total_paint_weight = Housing_paint_weight + End_cap_paint_weight
         Paint = total_paint_weight                                  # rename for BOM class
 
         total_motor_weight = total_motor_weight + winding_insulation_weight + impregnation_weight + plastic_weight + total_paint_weight
 
-        print(F"stator_core_weight =  {stator_core_weight} kg")
-        print(F"stator_copper_weight =  {stator_copper_weight} kg")
-        print(F"shaft_weight = {shaft_weight} kg")
-        print(F"winding_insulation_weight =  {winding_insulation_weight} kg")
-        print(F"impregnation_weight =  {impregnation_weight} kg")
-        print(F"plastic_weight =  {plastic_weight} kg")
-        print(F"paint_weight =  {total_paint_weight} kg")
-
+        mass_result = MotorMassResult(PM_case=self.PM_case, radial_case=self.radial_case,
+                                      housing_diameter=D_housing, housing_length=L_housing,
+                                      stator_core_weight=stator_core_weight,
+                                      stator_copper_weight=stator_copper_weight,
+                                      shaft_weight=shaft_weight,
+                                      e_machine_active_component_weight=E_machine_active_component_weight,
+                                      housing_weight=Housing_weight,
+                                      total_end_caps_weight=total_end_caps_weight,
+                                      winding_insulation_weight=winding_insulation_weight,
+                                      impregnation_weight=impregnation_weight,
+                                      plastic_weight=plastic_weight,
+                                      total_paint_weight=total_paint_weight,
+                                      total_motor_weight=total_motor_weight,
+                                      aluminum=Aluminum,
+                                      insulation_materials=Insulation_materials,
+                                      insulation_resins=Insulation_resins,
+                                      paint=Paint,
+                                      plastics=Plastics)
+
+        """ In the following, the required parameters for the BOM Class are stored with the same names used in the BOM class as shared by Radu"""
         if self.radial_case == True:
+            mass_result.rotor_core_weight = rotor_core_weight
+            mass_result.electrical_steel = stator_core_weight + rotor_core_weight
+            mass_result.other_steel = shaft_weight
             if self.PM_case == True:
-                print(F"PM_weight = {PM_weight} kg")
-                print(F"rotor_core_weight = {rotor_core_weight} kg")
-                Electrical_steel = stator_core_weight + rotor_core_weight
-                Copper = stator_copper_weight
-                Other_steel = shaft_weight
-                NdFeB = PM_weight
+                mass_result.pm_weight = PM_weight
+                conductor_weight = stator_copper_weight
+                magnet_weight = PM_weight
             else:
-                print(F"Cage_weight = {Cage_weight} kg")
-                print(F"rotor_core_weight = {rotor_core_weight} kg")
-                Electrical_steel = stator_core_weight + rotor_core_weight
-                Copper = stator_copper_weight + Cage_weight
-                Other_steel = shaft_weight
+                mass_result.cage_weight = Cage_weight
+                conductor_weight = stator_copper_weight + Cage_weight
+                magnet_weight = 0.0
         else:
-            print(F"pole_pieces_weight = {pole_pieces_weight} kg")
-            print(F"circumferential_PM_weight = {circumferential_PM_weight} kg")
-            print(F"axial_PM_weight = {axial_PM_weight} kg")
-            print(F"PM_weight = {PM_weight} kg")
-            print(F"Bush_weight = {Bush_weight} kg")
-            print(F"bolt_weight = {bolt_weight} kg")
-            print(F"end_ring_weight = {end_ring_weight} kg")
-            Electrical_steel = stator_core_weight + pole_pieces_weight + end_ring_weight
-            Copper = stator_copper_weight
-            Other_steel = shaft_weight + Bush_weight + bolt_weight
-            Ferrite = PM_weight
-
-        print(F"E_machine_active_component_weight = {E_machine_active_component_weight} kg")
-        print(F"Housing_weight = {Housing_weight} kg")
-        print(F"total_end_caps_weight = {total_end_caps_weight} kg")
-        print(F"total_motor_weight = {total_motor_weight} kg")
-
-        """ In the following, the required parameters for the BOM Class has been printed with the same names used in the BOM class as shared by Radu"""
-        print(F"")
-        print(F"========================================================")
-        print(F"Print BOM Variable")
-        print(F"========================================================")
-        print(F"Electrical_steel = {Electrical_steel} kg")
-        print(F"Other_steel = {Other_steel} kg")
-        print(F"Aluminum = {Aluminum} kg")
-        print(F"Copper = {Copper} kg")
-        print(F"Insulation_materials = {Insulation_materials} kg")
-        print(F"Insulation_resins = {Insulation_resins} kg")
-        print(F"Paint = {Paint} kg")
-        print(F"Plastics = {Plastics} kg")
-        if self.radial_case == True:
-            if self.PM_case == True:
-                print(F"NdFeB = {NdFeB} kg")
-            else:
-                pass
+            mass_result.pole_pieces_weight = pole_pieces_weight
+            mass_result.circumferential_pm_weight = circumferential_PM_weight
+            mass_result.axial_pm_weight = axial_PM_weight
+            mass_result.pm_weight = PM_weight
+            mass_result.bush_weight = Bush_weight
+            mass_result.bolt_weight = bolt_weight
+            mass_result.end_ring_weight = end_ring_weight
+            mass_result.electrical_steel = stator_core_weight + pole_pieces_weight + end_ring_weight
+            mass_result.other_steel = shaft_weight + Bush_weight + bolt_weight
+            conductor_weight = stator_copper_weight
+            magnet_weight = PM_weight
+
+        # the conductor and magnet masses are booked to the BOM column of their material
+        if MATERIAL_BOM_COLUMNS[self.conductor] == BOM_COLUMNS.index('aluminum'):
+            mass_result.aluminum = Aluminum + conductor_weight
         else:
-            print(F"Ferrite = {Ferrite} kg")
+            mass_result.copper = conductor_weight
+        if MATERIAL_BOM_COLUMNS[magnet] == BOM_COLUMNS.index('ndfeb'):
+            mass_result.ndfeb = magnet_weight
+        else:
+            mass_result.ferrite = magnet_weight
+
+        self.mass_result = mass_result
+        return mass_result
 
+    @instrumented()
     def size_motor(self):
         # size rotor
         MotorSizingTool.calc_rot_dimensions(self)
@@ -331,9 +340,9 @@ class MotorSizingTool:
         MotorSizingTool.calc_split_ratio_from_curve(self)
         MotorSizingTool.calc_rotor_inner_diameter(self)
         # weight calculation
-        MotorSizingTool.material_size_wieght_cal(self)
-
+        mass_result = MotorSizingTool.material_size_wieght_cal(self)
 
-# TODO we need to have a class to contain all the paramters that Radu needs to do his calculations. Please, ask Radu to give you a list of the Kg of the material that he needs to do his calculations.
+        if self.verbose:
+            print_sizing_report(self)
 
-# insulation of the copper and resin
+        return mass_result
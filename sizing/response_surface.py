@@ -0,0 +1,245 @@
+import json
+import os
+
+import numpy as np
+
+from sizing.batch_sizing import GEOMETRY_FIELDS, MASS_FIELDS, BOM_FIELDS
+from sizing.design_sweep import SWEEP_DEFAULTS, size_sweep_chunk
+from instrumentation.stage_timers import instrumented
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS
+
+
+""" Precomputed response surface of the sizing and LCA results over max_torque, base_speed, average_shear_stress and
+dl_ratio, for interactive tools which query far more often than the inputs change. The surface is a rectilinear grid:
+every axis has its own breakpoints, refined where the multilinear interpolation between them is not accurate enough.
+Each refinement round sizes the midpoints of all grid edges along an axis and splits the intervals whose midpoint
+error exceeds the tolerance (relative to the range of the result column).
+
+The midpoint errors also give the reported error estimate: multilinear interpolation is exact for mixed terms, its
+error in a cell is at most sum_k h_k^2 / 8 max|d2f/dx_k2|, and h_k^2 / 8 |d2f/dx_k2| is what the midpoint of a cell
+edge along axis k measures. The estimate of a cell is the sum over the axes of the largest midpoint error of its
+edges. It is not a bound: the midpoints sample the second derivatives at the edges only, not their maximum inside
+the cell.
+
+The grid values and cell error estimates are raw binary files next to a surface.json, they are memory-mapped when a
+surface is opened. Queries outside the grid are sized exactly, and so are batches of more than INTERPOLATION_LIMIT
+queries. A single query is interpolated in about 0.1 ms against 0.17 ms for the exact sizing and LCA, but the
+interpolation gathers 16 grid rows per query and falls behind the vectorized exact path beyond a few dozen queries
+(test_response_surface_query in benchmarks/bench_sizing.py).
+
+    surface = ResponseSurface.build('surfaces/ipm', tolerance=1e-3)
+    result = ResponseSurface('surfaces/ipm').query(max_torque=250.0, dl_ratio=[1.0, 1.5])
+    result['total_motor_weight'], result['total_motor_weight_error_estimate']
+"""
+
+SURFACE_FILE_NAME = 'surface.json'
+VALUES_FILE_NAME = 'values.bin'
+ERRORS_FILE_NAME = 'errors.bin'
+
+RESPONSE_SURFACE_AXES = ('max_torque', 'base_speed', 'average_shear_stress', 'dl_ratio')
+RESPONSE_SURFACE_BOUNDS = {'max_torque': (50.0, 500.0),
+                           'base_speed': (1000.0, 6000.0),
+                           'average_shear_stress': (40.0, 120.0),
+                           'dl_ratio': (0.5, 3.0)}
+# continuous result columns, the flags cannot be interpolated
+RESPONSE_SURFACE_FIELDS = GEOMETRY_FIELDS + MASS_FIELDS + BOM_FIELDS + EM_PEI_FIELDS
+# largest batch of queries which is interpolated, larger batches are sized exactly
+INTERPOLATION_LIMIT = 32
+
+
+def _evaluate(axes_values: dict, fixed_inputs: dict, fields) -> np.ndarray:
+    """Exact (number of points x number of fields) results"""
+
+    chunk = dict(fixed_inputs)
+    chunk.update(axes_values)
+    result = size_sweep_chunk(chunk, lca=any(field in EM_PEI_FIELDS for field in fields), fields=fields)
+    values = np.empty((np.size(result[fields[0]]), len(fields)))
+    for column, field in enumerate(fields):
+        values[:, column] = result[field]
+    return values
+
+
+def _evaluate_grid(axes, fixed_inputs: dict, fields) -> np.ndarray:
+    """Exact results on the grid spanned by axes, shape (*grid shape, number of fields)"""
+
+    grids = np.meshgrid(*axes, indexing='ij')
+    values = _evaluate({name: grid.ravel() for name, grid in zip(RESPONSE_SURFACE_AXES, grids)}, fixed_inputs, fields)
+    return values.reshape(grids[0].shape + (len(fields),))
+
+
+def _take(array, axis, start, stop):
+    index = [slice(None)] * array.ndim
+    index[axis] = slice(start, stop)
+    return array[tuple(index)]
+
+
+def _get_midpoint_errors(axes, values, fixed_inputs: dict, fields) -> list:
+    """Per axis, the absolute interpolation errors at the midpoints of the grid edges along that axis"""
+
+    errors = []
+    for axis, breakpoints in enumerate(axes):
+        midpoint_axes = list(axes)
+        midpoint_axes[axis] = (breakpoints[:-1] + breakpoints[1:]) / 2
+        exact = _evaluate_grid(midpoint_axes, fixed_inputs, fields)
+        interpolated = (_take(values, axis, None, -1) + _take(values, axis, 1, None)) / 2
+        errors.append(np.abs(exact - interpolated))
+    return errors
+
+
+def _get_cell_errors(midpoint_errors: list) -> np.ndarray:
+    """Error estimate of every cell, the sum over the axes of the largest midpoint error of the cell edges"""
+
+    cell_errors = 0.0
+    for axis, errors in enumerate(midpoint_errors):
+        for other_axis in range(len(midpoint_errors)):
+            if other_axis != axis:
+                errors = np.maximum(_take(errors, other_axis, None, -1), _take(errors, other_axis, 1, None))
+        cell_errors = cell_errors + errors
+    return cell_errors
+
+
+class ResponseSurface:
+    """
+    Response surface stored in a directory, see build
+
+    :param str directory: directory written by ResponseSurface.build
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, SURFACE_FILE_NAME)) as surface_file:
+            metadata = json.load(surface_file)
+        self.axes = tuple(np.array(metadata['axes'][name]) for name in RESPONSE_SURFACE_AXES)
+        self.fields = tuple(metadata['fields'])
+        self.fixed_inputs = metadata['fixed_inputs']
+        self.tolerance = metadata['tolerance']
+        shape = tuple(axis.size for axis in self.axes)
+        self.values = np.memmap(os.path.join(directory, VALUES_FILE_NAME), dtype='<f8', mode='r',
+                                shape=shape + (len(self.fields),))
+        self.errors = np.memmap(os.path.join(directory, ERRORS_FILE_NAME), dtype='<f4', mode='r',
+                                shape=tuple(size - 1 for size in shape) + (len(self.fields),))
+        # flat (plain ndarray) views and row strides of the grid points and cells, and the row offsets of the corners
+        # of a cell
+        self._grid_values = self.values.view(np.ndarray).reshape(-1, len(self.fields))
+        self._cell_errors = self.errors.view(np.ndarray).reshape(-1, len(self.fields))
+        self._strides = np.cumprod((1,) + shape[:0:-1])[::-1]
+        self._cell_strides = np.cumprod((1,) + tuple(size - 1 for size in shape[:0:-1]))[::-1]
+        self._corners = np.array(list(np.ndindex(*(2,) * len(shape))), dtype=bool)
+        self._corner_offsets = self._corners @ self._strides
+
+    @classmethod
+    @instrumented()
+    def build(cls, directory: str, bounds: dict = None, tolerance: float = 1e-3, initial_points: int = 5,
+              max_points: int = 200000, max_iterations: int = 10, fields=RESPONSE_SURFACE_FIELDS,
+              **fixed_inputs):
+        """
+        Sizes the adaptive grid and writes it to directory
+
+        :param dict bounds: axis name -> (lower, upper), defaults to RESPONSE_SURFACE_BOUNDS for missing axes
+        :param float tolerance: midpoint interpolation error allowed, relative to the range of each result column
+        :param int initial_points: breakpoints per axis of the initial uniform grid
+        :param int max_points: refinement stops before the grid grows beyond this number of points
+        :param int max_iterations: maximum number of refinement rounds
+        :param fields: result columns, size_motor_batch columns and EM_PEI_FIELDS
+        :param fixed_inputs: the other MotorSizingTool inputs (maximum_rotor_speed, PM_case, radial_case), defaults
+            as in SWEEP_DEFAULTS
+        :return: the ResponseSurface
+        """
+
+        unknown = set(fixed_inputs) - (set(SWEEP_DEFAULTS) - set(RESPONSE_SURFACE_AXES))
+        if unknown:
+            raise ValueError(F"unknown fixed inputs {sorted(unknown)}")
+        fields = tuple(fields)
+        bounds = dict(RESPONSE_SURFACE_BOUNDS, **(bounds or {}))
+        fixed_inputs = {name: SWEEP_DEFAULTS[name] for name in SWEEP_DEFAULTS if name not in RESPONSE_SURFACE_AXES} | \
+            fixed_inputs
+        axes = [np.linspace(*bounds[name], initial_points) for name in RESPONSE_SURFACE_AXES]
+
+        for iteration in range(max_iterations + 1):
+            values = _evaluate_grid(axes, fixed_inputs, fields)
+            midpoint_errors = _get_midpoint_errors(axes, values, fixed_inputs, fields)
+            value_range = np.ptp(values.reshape(-1, len(fields)), axis=0)
+            scale = np.where(value_range > 0, value_range, 1.0)
+            # intervals to split: the largest relative midpoint error over the other axes and the fields
+            split = [np.max(np.moveaxis(errors / scale, axis, 0).reshape(errors.shape[axis], -1), axis=1) > tolerance
+                     for axis, errors in enumerate(midpoint_errors)]
+            refined_size = np.prod([axis.size + np.count_nonzero(mask) for axis, mask in zip(axes, split)])
+            if not any(mask.any() for mask in split) or iteration == max_iterations or refined_size > max_points:
+                break
+            axes = [np.sort(np.concatenate([axis, ((axis[:-1] + axis[1:]) / 2)[mask]])) for axis, mask in
+                    zip(axes, split)]
+
+        os.makedirs(directory, exist_ok=True)
+        np.ascontiguousarray(values, dtype='<f8').tofile(os.path.join(directory, VALUES_FILE_NAME))
+        np.ascontiguousarray(_get_cell_errors(midpoint_errors), dtype='<f4').tofile(
+            os.path.join(directory, ERRORS_FILE_NAME))
+        # the metadata is written last, a directory without it is not a surface
+        surface_path = os.path.join(directory, SURFACE_FILE_NAME)
+        with open(surface_path + '.tmp', 'w') as surface_file:
+            json.dump({'axes': {name: axis.tolist() for name, axis in zip(RESPONSE_SURFACE_AXES, axes)},
+                       'fields': fields, 'fixed_inputs': fixed_inputs, 'tolerance': tolerance}, surface_file)
+        os.replace(surface_path + '.tmp', surface_path)
+        return cls(directory)
+
+    @property
+    def number_of_points(self) -> int:
+        return int(np.prod([axis.size for axis in self.axes]))
+
+    def contains(self, **inputs) -> np.ndarray:
+        """True for the queries inside the grid, inputs as in query"""
+
+        inside = True
+        for name, axis in zip(RESPONSE_SURFACE_AXES, self.axes):
+            value = np.asarray(inputs.get(name, SWEEP_DEFAULTS[name]))
+            inside = inside & (value >= axis[0]) & (value <= axis[-1])
+        return inside
+
+    def _interpolate(self, queries: list) -> tuple:
+        """(values, error estimates) of queries inside the grid, both (number of queries x number of fields)"""
+
+        cells = np.empty((queries[0].size, len(self.axes)), dtype=np.intp)
+        weights = np.empty((queries[0].size, len(self.axes)))
+        for axis, (value, breakpoints) in enumerate(zip(queries, self.axes)):
+            # the queries are inside the grid, only the upper end of an axis needs to be moved into the last cell
+            cells[:, axis] = np.minimum(breakpoints.searchsorted(value, side='right') - 1, breakpoints.size - 2)
+            lower, upper = breakpoints[cells[:, axis]], breakpoints[cells[:, axis] + 1]
+            weights[:, axis] = (value - lower) / (upper - lower)
+
+        # weights of the 2^4 cell corners, the corners are gathered as rows of the flattened grid
+        corner_weights = np.prod(np.where(self._corners, weights[:, None, :], 1.0 - weights[:, None, :]), axis=2)
+        corner_values = self._grid_values[(cells @ self._strides)[:, None] + self._corner_offsets]
+        return np.einsum('qc,qcf->qf', corner_weights, corner_values), self._cell_errors[cells @ self._cell_strides]
+
+    @instrumented()
+    def query(self, **inputs) -> dict:
+        """
+        Interpolated results, inputs are RESPONSE_SURFACE_AXES arrays (or scalars) broadcast against each other,
+        missing ones take the SWEEP_DEFAULTS values
+
+        :return: dict of 1D arrays: the fields, <field>_error_estimate the estimated interpolation error of every
+            field (zero for exact results), and exact, True for the queries which were sized exactly: queries
+            outside the grid, and all queries of batches larger than INTERPOLATION_LIMIT
+        """
+
+        unknown = set(inputs) - set(RESPONSE_SURFACE_AXES)
+        if unknown:
+            raise ValueError(F"unknown inputs {sorted(unknown)}, the surface is built for {self.fixed_inputs}")
+        queries = [np.ravel(value) for value in np.broadcast_arrays(
+            *(np.asarray(inputs.get(name, SWEEP_DEFAULTS[name]), dtype=float) for name in RESPONSE_SURFACE_AXES))]
+        if queries[0].size > INTERPOLATION_LIMIT:
+            exact = np.ones(queries[0].size, dtype=bool)
+        else:
+            exact = ~self.contains(**dict(zip(RESPONSE_SURFACE_AXES, queries)))
+
+        values = np.empty((queries[0].size, len(self.fields)))
+        errors = np.zeros((queries[0].size, len(self.fields)))
+        if not exact.all():
+            values[~exact], errors[~exact] = self._interpolate([value[~exact] for value in queries])
+        if exact.any():
+            values[exact] = _evaluate({name: value[exact] for name, value in zip(RESPONSE_SURFACE_AXES, queries)},
+                                      self.fixed_inputs, self.fields)
+        result = {'exact': exact}
+        for column, field in enumerate(self.fields):
+            result[field] = values[:, column]
+            result[field + '_error_estimate'] = errors[:, column]
+        return result
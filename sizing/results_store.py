@@ -0,0 +1,167 @@
+import json
+import os
+
+import numpy as np
+
+from sizing.batch_sizing import SIZING_INPUT_FIELDS, SIZING_OUTPUT_FIELDS, FLAG_FIELDS, DESIGN_INDEX_FIELDS
+from sizing.design_sweep import get_sweep_inputs
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS
+
+
+""" Append-only columnar store for sweep results. Every column is a raw little-endian binary file next to a
+schema.json holding the column dtypes and the number of committed rows. Readers memory-map the columns, so
+filtering and aggregation run chunk by chunk without loading a result set into RAM."""
+
+SCHEMA_FILE_NAME = 'schema.json'
+BOOLEAN_FIELDS = ('PM_case', 'radial_case') + FLAG_FIELDS
+
+
+def get_results_schema(lca: bool = True) -> dict:
+    """
+    Column name -> dtype of a sizing (+ LCA) result set. Inputs are MotorSizingTool inputs and the topology and
+    material indices (DESIGN_INDEX_FIELDS), outputs are the size_motor_batch columns, which include the
+    ElectricMachineBom materials, and optionally the 12 impact categories
+
+    :param bool lca: include the EM_PEI_FIELDS impact columns
+    """
+
+    schema = {field: '|b1' if field in BOOLEAN_FIELDS else '<f8' for field in SIZING_INPUT_FIELDS}
+    schema.update({field: '<i8' for field in DESIGN_INDEX_FIELDS})
+    schema.update({field: '|b1' if field in BOOLEAN_FIELDS else '<f8' for field in
+                   SIZING_OUTPUT_FIELDS + (EM_PEI_FIELDS if lca else ())})
+    return schema
+
+
+class ResultsStore:
+    """
+    Columnar, memory-mapped store of fixed-schema records
+
+    :param str directory: directory of the store, created if it does not exist
+    :param dict schema: column name -> numpy dtype string, only needed when creating a new store
+    """
+
+    def __init__(self, directory: str, schema: dict = None):
+        self.directory = directory
+        if schema is not None:
+            schema = {name: np.dtype(dtype).str for name, dtype in schema.items()}
+        schema_path = os.path.join(directory, SCHEMA_FILE_NAME)
+        if os.path.exists(schema_path):
+            with open(schema_path) as schema_file:
+                metadata = json.load(schema_file)
+            if schema is not None and schema != metadata['columns']:
+                raise ValueError(F"schema does not match the existing store in {directory}")
+            self.schema = metadata['columns']
+            self.number_of_rows = metadata['number_of_rows']
+        else:
+            if schema is None:
+                raise ValueError(F"{directory} is not a results store and no schema was given")
+            os.makedirs(directory, exist_ok=True)
+            self.schema = schema
+            self.number_of_rows = 0
+            for name in self.schema:
+                open(self._column_path(name), 'wb').close()
+            self._write_metadata()
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, name + '.bin')
+
+    def _write_metadata(self):
+        # written to a temporary file first, the row count only moves on once all column data is on disk
+        schema_path = os.path.join(self.directory, SCHEMA_FILE_NAME)
+        with open(schema_path + '.tmp', 'w') as schema_file:
+            json.dump({'columns': self.schema, 'number_of_rows': self.number_of_rows}, schema_file, indent=1)
+        os.replace(schema_path + '.tmp', schema_path)
+
+    def __len__(self):
+        return self.number_of_rows
+
+    def append(self, columns: dict):
+        """Appends records, columns must contain every column of the schema with equal lengths"""
+
+        missing = set(self.schema) - set(columns)
+        if missing:
+            raise KeyError(F"missing columns {sorted(missing)}")
+        lengths = {np.size(columns[name]) for name in self.schema}
+        if len(lengths) != 1:
+            raise ValueError(F"columns have different lengths {sorted(lengths)}")
+        length = lengths.pop()
+
+        for name, dtype in self.schema.items():
+            with open(self._column_path(name), 'r+b') as column_file:
+                # overwrite anything left behind by an append which did not complete
+                column_file.seek(self.number_of_rows * np.dtype(dtype).itemsize)
+                column_file.truncate()
+                np.ascontiguousarray(columns[name], dtype=dtype).tofile(column_file)
+        self.number_of_rows += length
+        self._write_metadata()
+
+    def append_sweep(self, samples: dict, sweep):
+        """Appends the chunks of sizing.design_sweep.run_sweep together with the inputs they were sized with,
+        including the topology and material indices
+
+        :param dict samples: samples passed to run_sweep
+        :param sweep: generator returned by run_sweep
+        """
+
+        for start, result in sweep:
+            length = np.size(next(iter(result.values())))
+            chunk = {name: value[start:start + length] if np.ndim(value) else value for name, value in samples.items()}
+            columns = get_sweep_inputs(chunk, length)
+            columns.update(result)
+            self.append(columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory map of a column"""
+
+        dtype = np.dtype(self.schema[name])
+        if self.number_of_rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(self.number_of_rows,))
+
+    def iter_chunks(self, columns=None, chunk_size: int = 1000000):
+        """Yields dicts of memory-mapped column slices of at most chunk_size rows"""
+
+        columns = list(self.schema) if columns is None else list(columns)
+        maps = {name: self.column(name) for name in columns}
+        for start in range(0, self.number_of_rows, chunk_size):
+            yield {name: column[start:start + chunk_size] for name, column in maps.items()}
+
+    def filter(self, where, columns=None, where_columns=None, chunk_size: int = 1000000) -> dict:
+        """
+        Rows for which where(chunk) is True, e.g. store.filter(lambda c: ~c['tip_speed_error_flag'],
+        columns=['total_motor_weight'], where_columns=['tip_speed_error_flag'])
+
+        :param where: function of a chunk dict returning a boolean mask
+        :param columns: columns to return, defaults to all
+        :param where_columns: columns read by where, defaults to all
+        :return: dict of in-memory arrays holding only the matching rows
+        """
+
+        columns = list(self.schema) if columns is None else list(columns)
+        where_columns = list(self.schema) if where_columns is None else list(where_columns)
+        selected = {name: [] for name in columns}
+        for chunk in self.iter_chunks(set(columns) | set(where_columns), chunk_size):
+            mask = np.asarray(where(chunk), dtype=bool)
+            for name in columns:
+                selected[name].append(np.asarray(chunk[name][mask]))
+        return {name: np.concatenate(parts) if parts else np.empty(0, dtype=self.schema[name])
+                for name, parts in selected.items()}
+
+    def aggregate(self, column: str, where=None, where_columns=None, chunk_size: int = 1000000) -> dict:
+        """
+        count, sum, mean, min and max of a column, optionally over the rows for which where(chunk) is True
+        """
+
+        where_columns = [] if where is None else (list(self.schema) if where_columns is None else list(where_columns))
+        count, total, minimum, maximum = 0, 0.0, np.inf, -np.inf
+        for chunk in self.iter_chunks(set(where_columns) | {column}, chunk_size):
+            values = chunk[column]
+            if where is not None:
+                values = values[np.asarray(where(chunk), dtype=bool)]
+            if values.size:
+                count += values.size
+                total += float(np.sum(values, dtype=float))
+                minimum = min(minimum, float(np.min(values)))
+                maximum = max(maximum, float(np.max(values)))
+        return {'count': count, 'sum': total, 'mean': total / count if count else np.nan,
+                'min': minimum if count else np.nan, 'max': maximum if count else np.nan}
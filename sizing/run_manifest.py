@@ -0,0 +1,299 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+import lca.EM_production_environmental_impact
+import physical_objects.motors.concept_motor
+import sizing.batch_sizing
+import sizing.design_sweep
+import sizing.motor_sizing_tool
+import sizing.topologies
+from lca.EM_production_environmental_impact import EM_PEI_KG
+from sizing import material_database
+from sizing.batch_sizing import SIZING_INPUT_FIELDS, DESIGN_INDEX_FIELDS
+from sizing.design_sweep import SWEEP_DEFAULTS, get_sweep_inputs, size_sweep_chunk, sweep_length
+from instrumentation.stage_timers import instrumented
+from sizing.material_database import MATERIALS, TOPOLOGIES, DEFAULT_MATERIALS, get_topology_from_flags, \
+    get_topology_index
+from sizing.results_store import ResultsStore, get_results_schema
+
+
+""" Reproducible batch runs with content-addressed results. Every result row is stored under a 128 bit hash of
+everything it depends on:
+    - its inputs, with the default materials and topology filled in
+    - the rows of the material and topology tables it uses, so that a new magnet density only invalidates the rows
+      with that magnet
+    - the model: the source of the sizing, BOM and LCA code, the other material database constants, the LCA impact
+      factors and the numpy version
+A run looks the hashes of its rows up in the store and only sizes the rows which are not there. Every run writes a
+manifest with the model hashes, a digest of the row hashes and a digest of the results, so two runs with the same
+manifest digests have bit for bit the same results.
+
+Rows of earlier models stay in the store, so that going back to an earlier version reuses them. prune removes the
+rows of every other model:
+
+    runs = ContentAddressedRuns('studies/fleet')
+    results, manifest = runs.run(samples)
+    runs.prune()
+"""
+
+RESULTS_DIRECTORY_NAME = 'results'
+MANIFESTS_DIRECTORY_NAME = 'manifests'
+ROW_HASH_FIELDS = ('row_hash_0', 'row_hash_1')
+# first 64 bits of the model hash of the row, see ContentAddressedRuns.prune
+MODEL_HASH_FIELD = 'model_hash'
+# inputs which select rows of the material and topology tables
+MATERIAL_INPUT_FIELDS = ('electrical_steel', 'conductor', 'magnet')
+RUN_INPUT_FIELDS = SIZING_INPUT_FIELDS + MATERIAL_INPUT_FIELDS + ('topology',)
+# modules whose source defines the results
+MODEL_MODULES = (sizing.batch_sizing, sizing.topologies, sizing.motor_sizing_tool, sizing.design_sweep,
+                 material_database, physical_objects.motors.concept_motor, lca.EM_production_environmental_impact)
+# material database constants other than the tables
+MODEL_CONSTANTS = ('BOM_COLUMNS', 'END_WINDING_LENGTH', 'HOUSING_DIAMETER_ALLOWANCE', 'HOUSING_END_PLATE_LENGTH',
+                   'END_CAP_THICKNESS', 'PAINT_THICKNESS', 'X_MOTOR_AXIAL_PM_LENGTH', 'X_MOTOR_END_RING_LENGTH',
+                   'X_MOTOR_BOLT_DIAMETER', 'WINDING_INSULATION_RATIO', 'IMPREGNATION_RATIO', 'PLASTIC_RATIO')
+
+# seeds of the two 64 bit hash lanes
+_LANE_SEEDS = (np.uint64(0x243F6A8885A308D3), np.uint64(0x13198A2E03707344))
+
+
+def _sha256(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part).view(np.uint8)
+        digest.update(part if isinstance(part, (bytes, np.ndarray)) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _sort_keys(keys) -> np.ndarray:
+    """Order of (N x 2) uint64 keys, sorted by the first and then the second lane"""
+
+    return np.lexsort((keys[:, 1], keys[:, 0]))
+
+
+def _mix(values):
+    """splitmix64 finaliser, on uint64 arrays (wrapping arithmetic)"""
+
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _hash_to_lanes(hex_digest: str) -> tuple:
+    return tuple(np.uint64(int(hex_digest[16 * lane:16 * lane + 16], 16)) for lane in range(2))
+
+
+def get_run_model_fingerprint(lca: bool = True) -> dict:
+    """
+    Hashes of the model: code (source of MODEL_MODULES), constants (MODEL_CONSTANTS, the default materials and the
+    materials of the components which cannot be chosen per design), lca_factors (EM_PEI_KG, empty without lca),
+    numpy (version), and model, the hash of them all. The material and topology tables are hashed row by row, see
+    get_table_row_hashes
+    """
+
+    fingerprint = {'code': _sha256(*(inspect.getsource(module) for module in MODEL_MODULES)),
+                   'constants': _sha256(*(repr(getattr(material_database, name)) for name in MODEL_CONSTANTS),
+                                        json.dumps(DEFAULT_MATERIALS, sort_keys=True),
+                                        MATERIALS[[DEFAULT_MATERIALS[name] for name in sorted(DEFAULT_MATERIALS)
+                                                   if name not in MATERIAL_INPUT_FIELDS]].tobytes()),
+                   'lca_factors': _sha256(np.ascontiguousarray(EM_PEI_KG, dtype='<f8').tobytes()) if lca else '',
+                   'numpy': np.__version__}
+    fingerprint['model'] = _sha256(*(fingerprint[name] for name in ('code', 'constants', 'lca_factors', 'numpy')))
+    return fingerprint
+
+
+def get_table_row_hashes(table) -> np.ndarray:
+    """(rows x 2) uint64 hashes of the rows of a structured table"""
+
+    return np.array([_hash_to_lanes(_sha256(row.tobytes())) for row in table], dtype=np.uint64).reshape(-1, 2)
+
+
+def _get_run_inputs(samples: dict) -> dict:
+    """1D input columns of all rows, defaults and the default materials of the topology filled in, PM_case and
+    radial_case those of the topology"""
+
+    length = sweep_length(samples)
+    unknown = set(samples) - set(RUN_INPUT_FIELDS)
+    if unknown:
+        raise ValueError(F"unknown inputs {sorted(unknown)}")
+    inputs = {name: np.broadcast_to(np.asarray(samples.get(name, default), dtype=float), (length,))
+              for name, default in SWEEP_DEFAULTS.items()}
+    topology = samples.get('topology')
+    if topology is None:
+        topology = get_topology_from_flags(inputs['PM_case'] != 0, inputs['radial_case'] != 0)
+    elif isinstance(topology, str):
+        topology = get_topology_index(topology)
+    inputs['topology'] = np.broadcast_to(np.asarray(topology, dtype=np.int64), (length,))
+    # the flags are those of the topology, as sized
+    inputs['PM_case'] = TOPOLOGIES['PM_case'][inputs['topology']].astype(float)
+    inputs['radial_case'] = TOPOLOGIES['radial_case'][inputs['topology']].astype(float)
+    defaults = {'electrical_steel': DEFAULT_MATERIALS['electrical_steel'], 'conductor': DEFAULT_MATERIALS['conductor'],
+                'magnet': TOPOLOGIES['magnet'][inputs['topology']]}
+    for name in MATERIAL_INPUT_FIELDS:
+        value = samples.get(name)
+        inputs[name] = np.broadcast_to(np.asarray(defaults[name] if value is None else value, dtype=np.int64),
+                                       (length,))
+    return inputs
+
+
+@instrumented()
+def get_row_hashes(samples: dict, fingerprint: dict = None, lca: bool = True) -> np.ndarray:
+    """
+    (N x 2) uint64 content hashes of the rows of samples (inputs as in RUN_INPUT_FIELDS, see
+    sizing.design_sweep.run_sweep)
+    """
+
+    inputs = _get_run_inputs(samples)
+    fingerprint = get_run_model_fingerprint(lca) if fingerprint is None else fingerprint
+    material_hashes = get_table_row_hashes(MATERIALS)
+    topology_hashes = get_table_row_hashes(TOPOLOGIES)
+
+    columns = []
+    for name in SWEEP_DEFAULTS:
+        # +0.0 turns -0.0 into 0.0, all NaNs hash alike
+        values = np.where(np.isnan(inputs[name]), np.nan, inputs[name] + 0.0)
+        columns.append(np.ascontiguousarray(values, dtype='<f8').view(np.uint64))
+    columns.append(inputs['topology'].astype(np.uint64))
+    columns.extend(inputs[name].astype(np.uint64) for name in MATERIAL_INPUT_FIELDS)
+
+    length = inputs['topology'].size
+    hashes = np.empty((length, 2), dtype=np.uint64)
+    for lane, (seed, model_lane) in enumerate(zip(_LANE_SEEDS, _hash_to_lanes(fingerprint['model']))):
+        row_hash = np.full(length, _mix(np.array([seed ^ model_lane]))[0])
+        for salt, values in enumerate(columns + [topology_hashes[inputs['topology'], lane]] +
+                                      [material_hashes[inputs[name], lane] for name in MATERIAL_INPUT_FIELDS]):
+            row_hash = _mix(row_hash ^ _mix(values + np.uint64(salt)))
+        hashes[:, lane] = row_hash
+    return hashes
+
+
+def get_results_digest(results: dict) -> str:
+    """sha256 of the result columns, in sorted column order"""
+
+    return _sha256(*(part for name in sorted(results) for part in (name, np.asarray(results[name]))))
+
+
+class ContentAddressedRuns:
+    """
+    Sizing (+ LCA) runs reusing the results of earlier runs with the same row hashes
+
+    :param str directory: directory of the result store and the run manifests, created if missing
+    :param bool lca: add the production environmental impact columns
+    """
+
+    def __init__(self, directory: str, lca: bool = True):
+        self.directory = directory
+        self.lca = lca
+        schema = dict({name: '<u8' for name in ROW_HASH_FIELDS + (MODEL_HASH_FIELD,)}, **get_results_schema(lca))
+        self.store = ResultsStore(os.path.join(directory, RESULTS_DIRECTORY_NAME), schema)
+        os.makedirs(os.path.join(directory, MANIFESTS_DIRECTORY_NAME), exist_ok=True)
+
+    def _lookup(self, keys) -> np.ndarray:
+        """Store rows of the keys, -1 for keys not in the store"""
+
+        rows = np.full(len(keys), -1)
+        if len(self.store) == 0:
+            return rows
+        stored = np.column_stack([self.store.column(name) for name in ROW_HASH_FIELDS])
+        order = _sort_keys(stored)
+        stored = stored[order]
+        # the first lanes almost never collide, the second lane of the first match is checked and the rare keys
+        # whose first lane appears more than once in the store are looked up one by one. Sorted needles keep the
+        # binary searches cache friendly
+        stored_first = np.ascontiguousarray(stored[:, 0])
+        needles = np.argsort(keys[:, 0])
+        first, last = np.empty(len(keys), dtype=np.intp), np.empty(len(keys), dtype=np.intp)
+        first[needles] = np.searchsorted(stored_first, keys[needles, 0], side='left')
+        last[needles] = np.searchsorted(stored_first, keys[needles, 0], side='right')
+        single = (last - first == 1) & np.all(stored[np.minimum(first, len(order) - 1)] == keys, axis=1)
+        rows[single] = order[first[single]]
+        for key in np.flatnonzero(last - first > 1):
+            match = np.flatnonzero(stored[first[key]:last[key], 1] == keys[key, 1])
+            if match.size:
+                rows[key] = order[first[key] + match[0]]
+        return rows
+
+    @instrumented()
+    def run(self, samples: dict, chunk_size: int = 100000) -> tuple:
+        """
+        Results of all samples, sizing only the rows not in the store yet
+
+        :param dict samples: input name -> 1D array (or scalar), RUN_INPUT_FIELDS
+        :param int chunk_size: rows sized per vectorized call
+        :return: (results, manifest): dict of 1D arrays in sample order (the results store columns without the
+            hashes), and the manifest dict, which is also written to manifests/<run>.json
+        """
+
+        fingerprint = get_run_model_fingerprint(self.lca)
+        keys = get_row_hashes(samples, fingerprint, self.lca)
+        rows = self._lookup(keys)
+
+        # rows missing from the store, every distinct row is sized once
+        missing = np.flatnonzero(rows < 0)
+        order = _sort_keys(keys[missing])
+        distinct = np.ones(order.size, dtype=bool)
+        distinct[1:] = np.any(np.diff(keys[missing[order]], axis=0) != 0, axis=1)
+        missing = missing[np.sort(order[distinct])]
+        inputs = {name: np.asarray(value) for name, value in samples.items()}
+        for start in range(0, missing.size, chunk_size):
+            chunk_rows = missing[start:start + chunk_size]
+            chunk = {name: value[chunk_rows] if np.ndim(value) else value for name, value in inputs.items()}
+            result = size_sweep_chunk(chunk, lca=self.lca)
+            columns = {name: keys[chunk_rows, lane] for lane, name in enumerate(ROW_HASH_FIELDS)}
+            columns[MODEL_HASH_FIELD] = np.full(chunk_rows.size, _hash_to_lanes(fingerprint['model'])[0])
+            chunk_inputs = get_sweep_inputs(chunk, chunk_rows.size)
+            columns.update({name: chunk_inputs[name] for name in SIZING_INPUT_FIELDS + DESIGN_INDEX_FIELDS})
+            columns.update(result)
+            self.store.append(columns)
+        if missing.size:
+            rows = self._lookup(keys)
+
+        results = {name: np.asarray(self.store.column(name)[rows]) for name in self.store.schema
+                   if name not in ROW_HASH_FIELDS + (MODEL_HASH_FIELD,)}
+        manifest = {'model': fingerprint,
+                    'materials': _sha256(MATERIALS.tobytes()),
+                    'topologies': _sha256(TOPOLOGIES.tobytes()),
+                    'python': sys.version.split()[0],
+                    'lca': self.lca,
+                    'rows': int(len(rows)),
+                    'computed': int(missing.size),
+                    'reused': int(len(rows) - missing.size),
+                    'inputs': _sha256(np.ascontiguousarray(keys).tobytes()),
+                    'results': get_results_digest(results)}
+        manifest['run'] = _sha256(manifest['model']['model'], manifest['inputs'])
+        with open(os.path.join(self.directory, MANIFESTS_DIRECTORY_NAME, manifest['run'] + '.json'), 'w') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        return results, manifest
+
+    @instrumented()
+    def prune(self, model: str = None, chunk_size: int = 1000000) -> int:
+        """
+        Removes the rows of all other models from the store, e.g. the rows superseded by a change of the sizing code.
+        The kept rows are copied to a new store which then replaces the old one
+
+        :param str model: model hash to keep (manifest['model']['model']), defaults to the current model
+        :param int chunk_size: rows copied at a time
+        :return: number of rows removed
+        """
+
+        model_hash = _hash_to_lanes(get_run_model_fingerprint(self.lca)['model'] if model is None else model)[0]
+        directory = self.store.directory
+        shutil.rmtree(directory + '.pruned', ignore_errors=True)
+        pruned = ResultsStore(directory + '.pruned', self.store.schema)
+        for chunk in self.store.iter_chunks(chunk_size=chunk_size):
+            keep = chunk[MODEL_HASH_FIELD] == model_hash
+            pruned.append({name: column[keep] for name, column in chunk.items()})
+
+        removed = len(self.store) - len(pruned)
+        os.replace(directory, directory + '.old')
+        os.replace(directory + '.pruned', directory)
+        shutil.rmtree(directory + '.old')
+        self.store = ResultsStore(directory)
+        return removed
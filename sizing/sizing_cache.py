@@ -0,0 +1,193 @@
+import copy
+import hashlib
+import inspect
+import shelve
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import lca.EM_production_environmental_impact
+import physical_objects.motors.concept_motor
+import sizing.material_database
+import sizing.motor_mass_result
+import sizing.motor_sizing_tool
+from lca.EM_production_environmental_impact import get_pei_matrix
+from sizing.sizing_report import print_sizing_report
+
+
+ROTOR_SNAPSHOT_FIELDS = ('outer_diameter', 'stack_length', 'inner_diameter', 'shaft_diameter')
+STATOR_SNAPSHOT_FIELDS = ('inner_diameter', 'outer_diameter', 'stack_length', 'split_ratio')
+TOOL_SNAPSHOT_FIELDS = ('tip_speed_error_flag', 'stacking_limit_exceeded_flag', 'shear_stress_out_of_range', 'power')
+# modules whose code and constants define the cached results, entries of the on-disk tier are keyed by their source
+CACHED_MODEL_MODULES = (sizing.motor_sizing_tool, sizing.motor_mass_result, sizing.material_database,
+                        physical_objects.motors.concept_motor, lca.EM_production_environmental_impact)
+
+
+@lru_cache(maxsize=None)
+def get_model_fingerprint() -> str:
+    """sha256 of the source of CACHED_MODEL_MODULES and the numpy version"""
+
+    digest = hashlib.sha256(np.__version__.encode())
+    for module in CACHED_MODEL_MODULES:
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+
+class CacheStatistics:
+    """Hit, miss and eviction counters of an LRUCache"""
+
+    FIELDS = ('hits', 'misses', 'evictions')
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return F"{type(self).__name__}({self.as_dict()})"
+
+
+class TieredCacheStatistics(CacheStatistics):
+    """CacheStatistics of a SizingCache, disk_hits counts the hits of the on-disk tier"""
+
+    FIELDS = ('hits', 'disk_hits', 'misses', 'evictions')
+    __slots__ = ('disk_hits',)
+
+
+class LRUCache:
+    """
+    Size-bounded LRU mapping of quantized keys to results.
+    Float inputs are quantized before they are used as keys, so requirements which only differ by
+    less than the quantization step share one entry (the entry holds the result of the first of them).
+
+    :param int maxsize: maximum number of entries held in memory
+    :param float quantization: step float inputs are rounded to when building keys
+    """
+
+    def __init__(self, maxsize: int, quantization: float = 1e-9, statistics: CacheStatistics = None):
+        self.maxsize = maxsize
+        self.quantization = quantization
+        self.statistics = CacheStatistics() if statistics is None else statistics
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _quantize(self, value):
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        return int(round(float(value) / self.quantization))
+
+    def make_key(self, kind: str, values) -> tuple:
+        return (kind,) + tuple(self._quantize(value) for value in values)
+
+    def _get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.statistics.hits += 1
+            return self._entries[key]
+        self.statistics.misses += 1
+        return None
+
+    def _put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.statistics.evictions += 1
+
+
+class SizingCache(LRUCache):
+    """
+    LRUCache in front of MotorSizingTool.size_motor and get_pei_matrix.
+
+    :param int maxsize: maximum number of entries held in memory
+    :param float quantization: step float inputs are rounded to when building keys
+    :param str persistent_path: optional shelve file used as a second, on-disk tier which survives between runs.
+        Its keys include get_model_fingerprint, entries written by another version of the model are never read
+    """
+
+    def __init__(self, maxsize: int = 4096, quantization: float = 1e-9, persistent_path: str = None):
+        super().__init__(maxsize, quantization, TieredCacheStatistics())
+        self._shelf = shelve.open(persistent_path) if persistent_path is not None else None
+        self._shelf_prefix = get_model_fingerprint() + ':'
+
+    def close(self):
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get(self, key):
+        if key not in self._entries and self._shelf is not None:
+            value = self._shelf.get(self._shelf_prefix + repr(key))
+            if value is not None:
+                self.statistics.disk_hits += 1
+                self._put(key, value, persist=False)
+                return value
+        return super()._get(key)
+
+    def _put(self, key, value, persist=True):
+        super()._put(key, value)
+        if persist and self._shelf is not None:
+            self._shelf[self._shelf_prefix + repr(key)] = value
+
+    def size_motor(self, sizing_tool):
+        """
+        Cached MotorSizingTool.size_motor. On a hit the cached geometry, flags and masses are written back onto
+        the sizing tool and its motor assembly, exactly as size_motor would have set them.
+
+        :param MotorSizingTool sizing_tool: sizing tool to size
+        :return: MotorMassResult
+        """
+
+        rotor = sizing_tool.electrical_motor_assembly.rotor
+        stator = sizing_tool.electrical_motor_assembly.stator
+        key = self.make_key('size_motor', (sizing_tool.max_torque, sizing_tool.base_speed,
+                                           sizing_tool.maximum_rotor_speed, sizing_tool.average_shear_stress,
+                                           rotor.dl_ratio, sizing_tool.PM_case, sizing_tool.radial_case,
+                                           sizing_tool.electrical_steel, sizing_tool.conductor,
+                                           -1 if sizing_tool.magnet is None else sizing_tool.magnet))
+        snapshot = self._get(key)
+        if snapshot is None:
+            mass_result = sizing_tool.size_motor()
+            snapshot = ({field: getattr(rotor, field) for field in ROTOR_SNAPSHOT_FIELDS},
+                        {field: getattr(stator, field) for field in STATOR_SNAPSHOT_FIELDS},
+                        {field: getattr(sizing_tool, field) for field in TOOL_SNAPSHOT_FIELDS},
+                        copy.copy(mass_result))
+            self._put(key, snapshot)
+            return mass_result
+
+        rotor_fields, stator_fields, tool_fields, mass_result = snapshot
+        for field, value in rotor_fields.items():
+            setattr(rotor, field, value)
+        for field, value in stator_fields.items():
+            setattr(stator, field, value)
+        for field, value in tool_fields.items():
+            setattr(sizing_tool, field, value)
+        sizing_tool.mass_result = copy.copy(mass_result)
+        if sizing_tool.verbose:
+            print_sizing_report(sizing_tool)
+        return sizing_tool.mass_result
+
+    def get_pei_matrix(self, em_bom_object):
+        """Cached lca.EM_production_environmental_impact.get_pei_matrix, keyed on the quantized BOM"""
+
+        key = self.make_key('get_pei_matrix', [row[0] for row in em_bom_object.get_bom_as_array()])
+        em_pei = self._get(key)
+        if em_pei is None:
+            em_pei = get_pei_matrix(em_bom_object)
+            self._put(key, em_pei)
+        return copy.deepcopy(em_pei)
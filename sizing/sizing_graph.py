@@ -0,0 +1,131 @@
+import numpy as np
+
+from lca.EM_production_environmental_impact import EM_PEI_KG, get_bom_array
+from instrumentation.stage_timers import instrumented
+
+
+""" Dependency-tracked, incremental evaluation of the MotorSizingTool stages. Every stage declares the parameters it
+reads; a stage is re-run only when one of them differs from the value it last ran with. Upstream outputs are
+parameters of the downstream stages, so a change only propagates as far as it actually changes intermediate values:
+changing PM_case re-runs the weight calculation only, changing the LCA impact factors only the LCA stage.
+
+    graph = SizingGraph(sizing_tool)
+    graph.evaluate()
+    graph.set('rotor.dl_ratio', 1.5)
+    graph.evaluate()    # re-runs the rotor dimensions and everything depending on them
+
+Parameters are named '<owner>.<attribute>' with owner one of rotor, stator, tool (the MotorSizingTool) and lca.
+Attributes can also be changed on the objects directly, evaluate() picks the changes up as well."""
+
+# stage -> (parameters read, parameters written), in topological order
+SIZING_STAGES = (
+    ('calc_rot_dimensions', ('tool.max_torque', 'tool.average_shear_stress', 'rotor.dl_ratio'),
+     ('rotor.outer_diameter', 'rotor.stack_length')),
+    ('calc_tip_speed', ('rotor.outer_diameter', 'tool.maximum_rotor_speed'),
+     ('tool.tip_speed_error_flag',)),
+    ('calc_stacking_limit', ('rotor.stack_length',),
+     ('tool.stacking_limit_exceeded_flag',)),
+    # the stator inner diameter and stack length are linked to the rotor outer diameter and stack length here
+    ('calc_split_ratio_from_curve', ('rotor.outer_diameter', 'rotor.stack_length', 'tool.average_shear_stress'),
+     ('stator.inner_diameter', 'stator.stack_length', 'stator.split_ratio', 'stator.outer_diameter',
+      'tool.shear_stress_out_of_range')),
+    ('calc_rotor_inner_diameter', ('tool.base_speed', 'tool.max_torque', 'tool.radial_case', 'rotor.outer_diameter'),
+     ('tool.power', 'rotor.shaft_diameter', 'rotor.inner_diameter')),
+    ('material_size_wieght_cal', ('stator.outer_diameter', 'stator.inner_diameter', 'rotor.shaft_diameter',
+                                  'rotor.stack_length', 'rotor.inner_diameter', 'tool.radial_case', 'tool.PM_case',
+                                  'tool.electrical_steel', 'tool.conductor', 'tool.magnet'),
+     ('tool.mass_result',)),
+    ('calc_pei', ('tool.mass_result', 'lca.impact_factors'),
+     ('lca.pei',)),
+)
+
+
+def _same(value, other) -> bool:
+    if isinstance(value, np.ndarray) or isinstance(other, np.ndarray):
+        return isinstance(value, np.ndarray) and isinstance(other, np.ndarray) and np.array_equal(value, other)
+    if value is other:
+        return True
+    # results like the mass result are compared by identity, numbers by value
+    return isinstance(value, (int, float, bool, np.number, np.bool_)) and \
+        isinstance(other, (int, float, bool, np.number, np.bool_)) and value == other
+
+
+class _LcaParameters:
+    def __init__(self, impact_factors):
+        self.impact_factors = impact_factors
+        self.pei = None
+
+
+class SizingGraph:
+    """
+    Incremental evaluation of a MotorSizingTool and the production environmental impact of its motor
+
+    :param MotorSizingTool sizing_tool: the tool, its motor assembly and requirements are the graph parameters
+    :param impact_factors: 12x10 per kg impact factors, defaults to EM_PEI_KG
+    """
+
+    STAGES = SIZING_STAGES
+
+    def __init__(self, sizing_tool, impact_factors=EM_PEI_KG):
+        self.sizing_tool = sizing_tool
+        self.lca = _LcaParameters(impact_factors)
+        # parameter values each stage last ran with, None for stages which have not run yet
+        self._stage_inputs = {stage: None for stage, _, _ in self.STAGES}
+        self.stage_calls = {stage: 0 for stage, _, _ in self.STAGES}
+
+    def _get_owner(self, owner: str):
+        if owner == 'tool':
+            return self.sizing_tool
+        if owner == 'rotor':
+            return self.sizing_tool.electrical_motor_assembly.rotor
+        if owner == 'stator':
+            return self.sizing_tool.electrical_motor_assembly.stator
+        if owner == 'lca':
+            return self.lca
+        raise KeyError(owner)
+
+    def get(self, name: str):
+        owner, attribute = name.split('.')
+        return getattr(self._get_owner(owner), attribute)
+
+    def set(self, name: str, value):
+        """Sets a parameter, e.g. set('tool.PM_case', False). The affected stages run at the next evaluate()"""
+
+        owner, attribute = name.split('.')
+        setattr(self._get_owner(owner), attribute, value)
+
+    def get_dirty_stages(self) -> list:
+        """Stages whose parameters differ from their last run. Stages downstream of a dirty stage are only
+        listed if their parameters already differ, they may become dirty once the upstream stage has run"""
+
+        return [stage for stage, inputs, _ in self.STAGES if self._is_dirty(stage, inputs)]
+
+    def _is_dirty(self, stage, inputs) -> bool:
+        last_inputs = self._stage_inputs[stage]
+        return last_inputs is None or not all(_same(self.get(name), value) for name, value in zip(inputs, last_inputs))
+
+    def calc_pei(self):
+        bom = get_bom_array([self.sizing_tool.mass_result])[0]
+        self.lca.pei = np.asarray(self.lca.impact_factors, dtype=float) @ bom
+
+    @instrumented()
+    def evaluate(self) -> dict:
+        """
+        Runs the stages whose parameters changed since their last run
+
+        :return: dict with mass_result (MotorMassResult) and pei, the (12,) production environmental impact
+        """
+
+        for stage, inputs, _ in self.STAGES:
+            if not self._is_dirty(stage, inputs):
+                continue
+            if stage == 'calc_pei':
+                self.calc_pei()
+            else:
+                getattr(self.sizing_tool, stage)()
+            self.stage_calls[stage] += 1
+            values = tuple(self.get(name) for name in inputs)
+            # arrays are copied, so that changing them in place is detected
+            self._stage_inputs[stage] = tuple(value.copy() if isinstance(value, np.ndarray) else value
+                                              for value in values)
+        return {'mass_result': self.sizing_tool.mass_result, 'pei': self.lca.pei}
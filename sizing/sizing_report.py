@@ -0,0 +1,87 @@
+""" Opt-in text report of a sized motor. MotorSizingTool itself does not print anything, call print_sizing_report
+(or construct the tool with verbose=True) when the report is wanted, e.g. in examples or while debugging."""
+
+from instrumentation.stage_timers import instrumented
+
+
+@instrumented()
+def print_sizing_report(sizing_tool, file=None):
+    """
+    Prints the power, the main dimensions and the masses of a motor sized by a MotorSizingTool
+
+    :param MotorSizingTool sizing_tool: sizing tool after size_motor has been called
+    :param file: stream to print to, defaults to stdout
+    """
+
+    rotor = sizing_tool.electrical_motor_assembly.rotor
+    stator = sizing_tool.electrical_motor_assembly.stator
+    print(F"power = {sizing_tool.power/1000} kW", file=file)
+    print(F"Dso = {stator.outer_diameter} m", file=file)
+    print(F"Dsi = {stator.inner_diameter} m", file=file)
+    print(F"Dro = {stator.inner_diameter} m", file=file)
+    if sizing_tool.radial_case == True:
+        print(F"Dri = Dsh =  {rotor.inner_diameter} m", file=file)
+    else:
+        print(F"Dri =  {rotor.inner_diameter} m", file=file)
+        print(F"Dsh =  {rotor.shaft_diameter} m", file=file)
+        print(F"D_B_o = Dri =  {rotor.inner_diameter} m", file=file)
+        print(F"D_B_i = Dsh =   {rotor.shaft_diameter} m", file=file)
+    print(F"Lstk =  {rotor.stack_length} m", file=file)
+
+    print_mass_result(sizing_tool.mass_result, file=file)
+
+
+@instrumented()
+def print_mass_result(mass_result, file=None):
+    """
+    Prints the component masses and the BOM variables of a MotorMassResult
+
+    :param MotorMassResult mass_result: result of MotorSizingTool.material_size_wieght_cal
+    :param file: stream to print to, defaults to stdout
+    """
+
+    print(F"stator_core_weight =  {mass_result.stator_core_weight} kg", file=file)
+    print(F"stator_copper_weight =  {mass_result.stator_copper_weight} kg", file=file)
+    print(F"shaft_weight = {mass_result.shaft_weight} kg", file=file)
+    print(F"winding_insulation_weight =  {mass_result.winding_insulation_weight} kg", file=file)
+    print(F"impregnation_weight =  {mass_result.impregnation_weight} kg", file=file)
+    print(F"plastic_weight =  {mass_result.plastic_weight} kg", file=file)
+    print(F"paint_weight =  {mass_result.total_paint_weight} kg", file=file)
+
+    if mass_result.radial_case == True:
+        if mass_result.PM_case == True:
+            print(F"PM_weight = {mass_result.pm_weight} kg", file=file)
+        else:
+            print(F"Cage_weight = {mass_result.cage_weight} kg", file=file)
+        print(F"rotor_core_weight = {mass_result.rotor_core_weight} kg", file=file)
+    else:
+        print(F"pole_pieces_weight = {mass_result.pole_pieces_weight} kg", file=file)
+        print(F"circumferential_PM_weight = {mass_result.circumferential_pm_weight} kg", file=file)
+        print(F"axial_PM_weight = {mass_result.axial_pm_weight} kg", file=file)
+        print(F"PM_weight = {mass_result.pm_weight} kg", file=file)
+        print(F"Bush_weight = {mass_result.bush_weight} kg", file=file)
+        print(F"bolt_weight = {mass_result.bolt_weight} kg", file=file)
+        print(F"end_ring_weight = {mass_result.end_ring_weight} kg", file=file)
+
+    print(F"E_machine_active_component_weight = {mass_result.e_machine_active_component_weight} kg", file=file)
+    print(F"Housing_weight = {mass_result.housing_weight} kg", file=file)
+    print(F"total_end_caps_weight = {mass_result.total_end_caps_weight} kg", file=file)
+    print(F"total_motor_weight = {mass_result.total_motor_weight} kg", file=file)
+
+    print(F"", file=file)
+    print(F"========================================================", file=file)
+    print(F"Print BOM Variable", file=file)
+    print(F"========================================================", file=file)
+    print(F"Electrical_steel = {mass_result.electrical_steel} kg", file=file)
+    print(F"Other_steel = {mass_result.other_steel} kg", file=file)
+    print(F"Aluminum = {mass_result.aluminum} kg", file=file)
+    print(F"Copper = {mass_result.copper} kg", file=file)
+    print(F"Insulation_materials = {mass_result.insulation_materials} kg", file=file)
+    print(F"Insulation_resins = {mass_result.insulation_resins} kg", file=file)
+    print(F"Paint = {mass_result.paint} kg", file=file)
+    print(F"Plastics = {mass_result.plastics} kg", file=file)
+    # the magnet lines follow the magnet material, any topology can carry either grade
+    if mass_result.ndfeb != 0.0:
+        print(F"NdFeB = {mass_result.ndfeb} kg", file=file)
+    if mass_result.ferrite != 0.0:
+        print(F"Ferrite = {mass_result.ferrite} kg", file=file)
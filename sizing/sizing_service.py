@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sizing.design_sweep import SWEEP_DEFAULTS, size_sweep_chunk
+from instrumentation.stage_timers import instrumented
+
+
+""" Local asyncio sizing + LCA service, so that many interactive tools share one warm process. Clients connect to a
+Unix socket (or TCP port) and send one JSON request per line, e.g.
+
+    {"id": 1, "max_torque": 250.0, "dl_ratio": 1.2}
+
+Inputs missing from a request take the MotorSizingTool defaults (SWEEP_DEFAULTS). The response line holds the id and
+either "result" (the size_motor_batch columns and the EM_PEI_FIELDS impacts of the design) or "error". Concurrent
+requests arriving within a short window are sized together in one call of the vectorized engine. At most
+max_pending requests are queued, further requests are answered with an "overloaded" error straight away.
+{"command": "statistics"} returns the latency percentiles and batch sizes.
+
+    python -m sizing.sizing_service serve --path /tmp/rubicon.sock
+    python -m sizing.sizing_service load --path /tmp/rubicon.sock --clients 64 --requests 200
+"""
+
+SERVICE_INPUT_FIELDS = tuple(SWEEP_DEFAULTS)
+# inputs given as booleans, all other inputs are numbers
+SERVICE_FLAG_FIELDS = tuple(name for name, default in SWEEP_DEFAULTS.items() if isinstance(default, bool))
+# latencies and batch sizes kept for the statistics, the most recent ones
+STATISTICS_HISTORY = 100000
+
+
+class ServiceOverloaded(Exception):
+    """Raised when the request queue of a MicroBatcher is full"""
+
+
+def get_service_inputs(inputs: dict) -> dict:
+    """
+    Checks the inputs of one request and converts them to floats (booleans for SERVICE_FLAG_FIELDS)
+
+    :raises ValueError: for unknown inputs and values which are not numbers (booleans)
+    """
+
+    unknown = set(inputs) - set(SERVICE_INPUT_FIELDS)
+    if unknown:
+        raise ValueError(F"unknown inputs {sorted(unknown)}")
+    converted = {}
+    for name, value in inputs.items():
+        if name in SERVICE_FLAG_FIELDS:
+            if not isinstance(value, (bool, int)) or value not in (0, 1):
+                raise ValueError(F"{name} must be a boolean, got {value!r}")
+            converted[name] = bool(value)
+        else:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(F"{name} must be a number, got {value!r}")
+            converted[name] = float(value)
+    return converted
+
+
+class LatencyStatistics:
+    """
+    Latencies [s] of the answered requests and sizes of the evaluated batches, the percentiles and the mean batch
+    size are those of the most recent history_size of them
+
+    :param int history_size: latencies and batch sizes kept
+    """
+
+    def __init__(self, history_size: int = STATISTICS_HISTORY):
+        self.latencies = deque(maxlen=history_size)
+        self.batch_sizes = deque(maxlen=history_size)
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def add_batch(self, batch_size: int, latencies):
+        self.latencies.extend(latencies)
+        self.batch_sizes.append(batch_size)
+        self.requests += len(latencies)
+        self.batches += 1
+
+    def report(self) -> dict:
+        latencies = np.asarray(self.latencies)
+        report = {'requests': self.requests, 'rejected': self.rejected, 'batches': self.batches,
+                  'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0}
+        if latencies.size:
+            report['p50'], report['p99'] = (float(value) for value in np.percentile(latencies, (50, 99)))
+            report['max'] = float(latencies.max())
+        return report
+
+
+class MicroBatcher:
+    """
+    Collects sizing requests and evaluates them in batches. A batch is evaluated when max_batch_size requests are
+    queued or window seconds after its first request arrived
+
+    :param float window: time requests are collected for [s]
+    :param int max_batch_size: maximum number of designs per vectorized call
+    :param int max_pending: maximum number of queued requests (backpressure)
+    :param fields: result columns returned, defaults to all
+    """
+
+    def __init__(self, window: float = 0.002, max_batch_size: int = 4096, max_pending: int = 10000, fields=None):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.fields = fields
+        self.statistics = LatencyStatistics()
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        # the engine runs on a thread, so the event loop keeps accepting requests while a batch is evaluated
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, inputs: dict) -> dict:
+        """Sizes one design, inputs as in SERVICE_INPUT_FIELDS. Raises ServiceOverloaded when the queue is full and
+        ValueError for invalid inputs, which are rejected before they can join a batch"""
+
+        inputs = get_service_inputs(inputs)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((time.perf_counter(), inputs, future))
+        except asyncio.QueueFull:
+            self.statistics.rejected += 1
+            raise ServiceOverloaded("too many pending requests") from None
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0 and self._queue.empty():
+                    break
+                try:
+                    batch.append(self._queue.get_nowait() if timeout <= 0 else
+                                 await asyncio.wait_for(self._queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            try:
+                results = await loop.run_in_executor(self._executor, self._evaluate,
+                                                     [inputs for _, inputs, _ in batch])
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            now = time.perf_counter()
+            latencies = []
+            for (received, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+                    latencies.append(now - received)
+            self.statistics.add_batch(len(batch), latencies)
+
+    @instrumented()
+    def _evaluate(self, requests) -> list:
+        chunk = {name: np.array([request.get(name, default) for request in requests])
+                 for name, default in SWEEP_DEFAULTS.items()}
+        result = size_sweep_chunk(chunk, lca=True, fields=self.fields)
+        columns = {field: values.tolist() for field, values in result.items()}
+        return [{field: values[index] for field, values in columns.items()} for index in range(len(requests))]
+
+
+class SizingService:
+    """
+    Serves a MicroBatcher on a Unix socket (path) or a local TCP port
+
+    :param str path: Unix socket path
+    :param str host: TCP host, used when no path is given
+    :param int port: TCP port, 0 picks a free port (see address after start)
+    """
+
+    def __init__(self, path: str = None, host: str = '127.0.0.1', port: int = 0, **batcher_options):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.batcher_options = batcher_options
+        self.batcher = None
+        self._server = None
+
+    @property
+    def address(self) -> dict:
+        return {'path': self.path} if self.path else {'host': self.host, 'port': self.port}
+
+    async def start(self):
+        self.batcher = MicroBatcher(**self.batcher_options)
+        self.batcher.start()
+        if self.path:
+            self._server = await asyncio.start_unix_server(self._handle_client, self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_client(self, reader, writer):
+        pending = set()
+        write_lock = asyncio.Lock()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._answer(line, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes, writer, write_lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.pop('id', None)
+            if request.pop('command', None) == 'statistics':
+                response = {'id': request_id, 'result': self.batcher.statistics.report()}
+            else:
+                response = {'id': request_id, 'result': await self.batcher.submit(request)}
+        except ServiceOverloaded:
+            response = {'id': request_id, 'error': 'overloaded'}
+        except Exception as error:
+            response = {'id': request_id, 'error': F"{type(error).__name__}: {error}"}
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+
+async def _open_connection(address: dict):
+    if 'path' in address:
+        return await asyncio.open_unix_connection(address['path'])
+    return await asyncio.open_connection(address['host'], address['port'])
+
+
+async def request_sizing(address: dict, **inputs) -> dict:
+    """Sizes one design on a running service, returns the response dict"""
+
+    reader, writer = await _open_connection(address)
+    try:
+        writer.write(json.dumps(inputs).encode() + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+async def generate_load(address: dict, clients: int = 32, requests_per_client: int = 100, seed=None) -> dict:
+    """
+    Load generator: clients connections each send requests_per_client random requests one after the other and
+    wait for every answer before sending the next
+
+    :return: dict with the client-side latency percentiles p50 and p99 [s], the throughput [requests/s], the
+        numbers of answered and rejected requests and the service statistics
+    """
+
+    rng = np.random.default_rng(seed)
+    latencies = []
+    errors = []
+
+    async def client(inputs):
+        reader, writer = await _open_connection(address)
+        try:
+            for index in range(requests_per_client):
+                request = {'id': index, 'max_torque': float(inputs[index, 0]), 'dl_ratio': float(inputs[index, 1])}
+                start = time.perf_counter()
+                writer.write(json.dumps(request).encode() + b'\n')
+                await writer.drain()
+                response = json.loads(await reader.readline())
+                latencies.append(time.perf_counter() - start)
+                if 'error' in response:
+                    errors.append(response['error'])
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(np.column_stack([rng.uniform(100.0, 400.0, requests_per_client),
+                                                   rng.uniform(0.5, 3.0, requests_per_client)]))
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await _open_connection(address)
+    try:
+        writer.write(b'{"command": "statistics"}\n')
+        await writer.drain()
+        service_statistics = json.loads(await reader.readline())['result']
+    finally:
+        writer.close()
+    p50, p99 = np.percentile(latencies, (50, 99))
+    return {'p50': float(p50), 'p99': float(p99), 'throughput': len(latencies) / elapsed,
+            'requests': len(latencies), 'rejected': errors.count('overloaded'), 'errors': len(errors),
+            'service': service_statistics}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('serve', 'run the sizing service'), ('load', 'benchmark a running service')):
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument('--path', help='Unix socket path')
+        command_parser.add_argument('--host', default='127.0.0.1')
+        command_parser.add_argument('--port', type=int, default=8765)
+    commands.choices['serve'].add_argument('--window', type=float, default=0.002)
+    commands.choices['serve'].add_argument('--max-batch-size', type=int, default=4096)
+    commands.choices['serve'].add_argument('--max-pending', type=int, default=10000)
+    commands.choices['load'].add_argument('--clients', type=int, default=32)
+    commands.choices['load'].add_argument('--requests', type=int, default=100)
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'serve':
+        service = SizingService(arguments.path, arguments.host, arguments.port, window=arguments.window,
+                                max_batch_size=arguments.max_batch_size, max_pending=arguments.max_pending)
+        asyncio.run(service.serve_forever())
+        return 0
+
+    address = {'path': arguments.path} if arguments.path else {'host': arguments.host, 'port': arguments.port}
+    print(json.dumps(asyncio.run(generate_load(address, arguments.clients, arguments.requests)), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import math
+
+import numpy as np
+
+from instrumentation.stage_timers import instrumented
+from sizing.loss_map import POLE_PAIRS, compute_operating_point_losses, get_stator_parameters
+from sizing.material_database import DEFAULT_MATERIALS, END_WINDING_LENGTH, HOUSING_END_PLATE_LENGTH, \
+    get_conductor_property
+
+
+""" Lumped-parameter thermal network of sized motors, for thermal screening inside sweeps. Six nodes: the winding in
+the slots, the end windings, the stator teeth and yoke, the housing with its end caps, and the rotor (core, magnets
+and shaft, its temperature stands for the magnet temperature). The housing is cooled by a water jacket at the coolant
+temperature. The conductances are built from the geometry of material_size_wieght_cal (slot geometry and fill
+factor of each design's topology, conductivity of its winding conductor), the heat capacities from its masses and the
+losses from sizing.loss_map. The rotor node carries the mechanical losses only: sizing.loss_map has no rotor
+electromagnetic losses, so the cage losses of induction machines are not modelled and their rotor temperatures are
+underestimated.
+
+The networks of N designs are (N x 6 x 6) conductance matrices. With six nodes per design dense batched solves are
+much faster than sparse ones, every steady state is one np.linalg.solve over the whole batch and every transient
+time step (implicit Euler, with the inverse of the step matrix computed once) one batched matrix-vector product.
+
+    network = get_thermal_network_batch(result)
+    temperatures = network.steady_state(network.get_loss_vector(losses))
+"""
+
+THERMAL_NODES = ('winding', 'end_winding', 'stator_teeth', 'stator_yoke', 'housing', 'rotor')
+WINDING, END_WINDING, STATOR_TEETH, STATOR_YOKE, HOUSING, ROTOR = range(len(THERMAL_NODES))
+
+COOLANT_TEMPERATURE = 65.0                          # degC, water-glycol jacket
+WATER_JACKET_HEAT_TRANSFER_COEFFICIENT = 2000.0     # W/m^2/K, on the housing outer surface
+CONTACT_HEAT_TRANSFER_COEFFICIENT = 2500.0          # W/m^2/K, shrink fit of the stator into the housing
+AIRGAP_HEAT_TRANSFER_COEFFICIENT = 100.0            # W/m^2/K, rotor to stator across the air gap
+END_SPACE_HEAT_TRANSFER_COEFFICIENT = 40.0          # W/m^2/K, end windings to the housing through the end space air
+CONDUCTIVITY_LAMINATION = 28.0                      # W/m/K, in the plane of the laminations
+CONDUCTIVITY_COPPER = get_conductor_property('copper', 'thermal_conductivity')   # W/m/K, along the conductors
+CONDUCTIVITY_WINDING = 0.8                          # W/m/K, impregnated winding across the conductors
+CONDUCTIVITY_SLOT_LINER = 0.2                       # W/m/K
+CONDUCTIVITY_SHAFT = 45.0                           # W/m/K
+SLOT_LINER_THICKNESS = 0.3e-3
+SLOTS_PER_POLE = 6                                  # 48 slots for the POLE_PAIRS of sizing.loss_map
+SPECIFIC_HEAT_COPPER = get_conductor_property('copper', 'specific_heat')         # J/kg/K
+SPECIFIC_HEAT_STEEL = 460.0
+SPECIFIC_HEAT_ALUMINUM = 900.0
+# class H winding insulation, and the maximum operating temperature of the magnets (designs with magnets only)
+WINDING_TEMPERATURE_LIMIT = 180.0
+MAGNET_TEMPERATURE_LIMIT = 150.0
+
+THERMAL_FIELDS = ('continuous_winding_temperature', 'continuous_magnet_temperature', 'peak_winding_temperature',
+                  'peak_magnet_temperature', 'thermal_limit_exceeded_flag')
+
+
+class ThermalNetwork:
+    """
+    Thermal networks of N designs, temperatures in degC and losses in W, nodes ordered as THERMAL_NODES
+
+    :ivar conductance: (N x 6 x 6) conductance matrices [W/K], including the conductance to the coolant
+    :ivar coolant_conductance: (N x 6) conductances of the nodes to the coolant [W/K]
+    :ivar capacitance: (N x 6) heat capacities [J/K]
+    :ivar coolant_temperature: (N,) coolant temperatures
+    :ivar winding_length_share: (N,) share of the copper in the slots, the rest is in the end windings
+    """
+
+    def __init__(self, conductance, coolant_conductance, capacitance, coolant_temperature, winding_length_share):
+        self.conductance = conductance
+        self.coolant_conductance = coolant_conductance
+        self.capacitance = capacitance
+        self.coolant_temperature = coolant_temperature
+        self.winding_length_share = winding_length_share
+
+    def __len__(self):
+        return self.conductance.shape[0]
+
+    def get_loss_vector(self, losses: dict) -> np.ndarray:
+        """(N x 6) node losses from the losses of sizing.loss_map.compute_operating_point_losses. The rotor node only
+        gets the mechanical loss, rotor cage losses of induction machines are not included"""
+
+        loss_vector = np.zeros(self.capacitance.shape)
+        loss_vector[:, WINDING] = losses['copper_loss'] * self.winding_length_share
+        loss_vector[:, END_WINDING] = losses['copper_loss'] * (1.0 - self.winding_length_share)
+        loss_vector[:, STATOR_TEETH] = losses['teeth_iron_loss']
+        loss_vector[:, STATOR_YOKE] = losses['yoke_iron_loss']
+        loss_vector[:, ROTOR] = losses['mechanical_loss']
+        return loss_vector
+
+    @instrumented()
+    def steady_state(self, loss_vector) -> np.ndarray:
+        """(N x 6) steady state temperatures for (N x 6) node losses"""
+
+        rise = np.linalg.solve(self.conductance, np.asarray(loss_vector, dtype=float)[..., None])[..., 0]
+        return self.coolant_temperature[:, None] + rise
+
+    @instrumented()
+    def transient(self, loss_vector, duration: float, time_step: float = 1.0, initial_temperature=None,
+                  record: bool = True) -> np.ndarray:
+        """
+        Temperatures over time, implicit Euler
+
+        :param loss_vector: (N x 6) constant node losses, or (number of steps x N x 6) losses of every time step
+        :param float duration: simulated time [s]
+        :param float time_step: [s]
+        :param initial_temperature: (N x 6) temperatures at time 0, defaults to the coolant temperature everywhere
+        :param bool record: return the temperatures of every step, otherwise only the final ones
+        :return: (number of steps + 1 x N x 6) temperatures, or (N x 6) at the end of the duration
+        """
+
+        number_of_steps = int(math.ceil(duration / time_step - 1e-9))
+        loss_vector = np.asarray(loss_vector, dtype=float)
+        if loss_vector.ndim == 2:
+            loss_vector = np.broadcast_to(loss_vector, (number_of_steps,) + loss_vector.shape)
+        capacitance_rate = self.capacitance / time_step
+        step_inverse = np.linalg.inv(self.conductance + capacitance_rate[:, :, None] * np.eye(len(THERMAL_NODES)))
+
+        # temperature rises above the coolant
+        rise = np.zeros(self.capacitance.shape) if initial_temperature is None else \
+            np.asarray(initial_temperature, dtype=float) - self.coolant_temperature[:, None]
+        history = [rise] if record else None
+        for step in range(number_of_steps):
+            rise = np.einsum('nij,nj->ni', step_inverse, capacitance_rate * rise + loss_vector[step])
+            if record:
+                history.append(rise)
+        if record:
+            return np.stack(history) + self.coolant_temperature[:, None]
+        return rise + self.coolant_temperature[:, None]
+
+
+def _add_conductance(conductance, node, other_node, value):
+    conductance[:, node, node] += value
+    conductance[:, other_node, other_node] += value
+    conductance[:, node, other_node] -= value
+    conductance[:, other_node, node] -= value
+
+
+@instrumented()
+def get_thermal_network_batch(batch_result: dict, end_winding_length=END_WINDING_LENGTH,
+                              coolant_temperature=COOLANT_TEMPERATURE, topology=None,
+                              conductor=None) -> ThermalNetwork:
+    """
+    Thermal networks of the designs of a sizing.batch_sizing.size_motor_batch result
+
+    :param end_winding_length: axial length of the end windings at each end [m]
+    :param coolant_temperature: [degC]
+    :param topology: topology indices or name of the designs, as passed to size_motor_batch, defaults to IPM
+    :param conductor: winding conductor indices or name, as passed to size_motor_batch, defaults to copper
+    """
+
+    slot_end_diameter_ratio, fill_factor = get_stator_parameters(topology)[:2]
+    conductor = DEFAULT_MATERIALS['conductor'] if conductor is None else conductor
+    Dso = np.asarray(batch_result['stator_outer_diameter'], dtype=float)
+    Dsi, Lstk, Dsh, end_winding_length, coolant_temperature, slot_end_diameter_ratio, fill_factor, \
+        conductor_conductivity, conductor_specific_heat = \
+        (np.broadcast_to(np.asarray(value, dtype=float), Dso.shape) for value in
+         (batch_result['stator_inner_diameter'], batch_result['stator_stack_length'], batch_result['shaft_diameter'],
+          end_winding_length, coolant_temperature, slot_end_diameter_ratio, fill_factor,
+          get_conductor_property(conductor, 'thermal_conductivity'),
+          get_conductor_property(conductor, 'specific_heat')))
+    inner_radius, slot_end_radius, outer_radius = Dsi / 2, slot_end_diameter_ratio * Dso / 2, Dso / 2
+    teeth_radius, yoke_radius = (inner_radius + slot_end_radius) / 2, (slot_end_radius + outer_radius) / 2
+
+    conductance = np.zeros(Dso.shape + (len(THERMAL_NODES), len(THERMAL_NODES)))
+    # radial conduction through the teeth (half of the circumference) and the yoke
+    teeth_yoke = 1.0 / (np.log(slot_end_radius / teeth_radius) / (np.pi * CONDUCTIVITY_LAMINATION * Lstk) +
+                        np.log(yoke_radius / slot_end_radius) / (2 * np.pi * CONDUCTIVITY_LAMINATION * Lstk))
+    _add_conductance(conductance, STATOR_TEETH, STATOR_YOKE, teeth_yoke)
+    yoke_housing = 1.0 / (np.log(outer_radius / yoke_radius) / (2 * np.pi * CONDUCTIVITY_LAMINATION * Lstk) +
+                          1.0 / (CONTACT_HEAT_TRANSFER_COEFFICIENT * np.pi * Dso * Lstk))
+    _add_conductance(conductance, STATOR_YOKE, HOUSING, yoke_housing)
+
+    # slot copper to the teeth: across a quarter of the slot width and through the slot liner, on both slot walls
+    number_of_slots = 2 * POLE_PAIRS * SLOTS_PER_POLE
+    slot_width = np.pi * (inner_radius + slot_end_radius) / number_of_slots * 0.5
+    slot_wall_area = 2 * (slot_end_radius - inner_radius) * Lstk * number_of_slots
+    winding_teeth = slot_wall_area / (slot_width / 4 / CONDUCTIVITY_WINDING +
+                                      SLOT_LINER_THICKNESS / CONDUCTIVITY_SLOT_LINER)
+    _add_conductance(conductance, WINDING, STATOR_TEETH, winding_teeth)
+    # along the conductors from the middle of the stack to the middle of the end windings, at both ends
+    conductor_area = np.pi / 4 * (np.square(2 * slot_end_radius) - np.square(Dsi)) * 0.5 * fill_factor
+    winding_end_winding = 2 * conductor_conductivity * conductor_area / (Lstk / 2 + end_winding_length / 2)
+    _add_conductance(conductance, WINDING, END_WINDING, winding_end_winding)
+    # inner and outer surfaces of the end windings at both ends
+    end_winding_area = 4 * np.pi * (inner_radius + slot_end_radius) * end_winding_length
+    _add_conductance(conductance, END_WINDING, HOUSING, END_SPACE_HEAT_TRANSFER_COEFFICIENT * end_winding_area)
+
+    _add_conductance(conductance, ROTOR, STATOR_TEETH, AIRGAP_HEAT_TRANSFER_COEFFICIENT * np.pi * Dsi * Lstk)
+    # along the shaft to the bearings in the end plates, at both ends
+    rotor_housing = 2 * CONDUCTIVITY_SHAFT * np.pi / 4 * np.square(Dsh) / (Lstk / 2 + end_winding_length +
+                                                                          HOUSING_END_PLATE_LENGTH)
+    _add_conductance(conductance, ROTOR, HOUSING, rotor_housing)
+
+    coolant_conductance = np.zeros(Dso.shape + (len(THERMAL_NODES),))
+    coolant_conductance[:, HOUSING] = WATER_JACKET_HEAT_TRANSFER_COEFFICIENT * np.pi * \
+        np.asarray(batch_result['housing_diameter']) * np.asarray(batch_result['housing_length'])
+    conductance[:, HOUSING, HOUSING] += coolant_conductance[:, HOUSING]
+
+    # heat capacities from the masses, the stator core split between teeth and yoke by volume
+    winding_length_share = Lstk / (Lstk + 2 * end_winding_length)
+    yoke_area = np.square(outer_radius) - np.square(slot_end_radius)
+    yoke_share = yoke_area / (yoke_area + (np.square(slot_end_radius) - np.square(inner_radius)) * 0.5)
+    stator_core_weight = np.asarray(batch_result['stator_core_weight'])
+    stator_copper_weight = np.asarray(batch_result['stator_copper_weight'])
+    rotor_weight = np.asarray(batch_result['e_machine_active_component_weight']) - stator_core_weight - \
+        stator_copper_weight
+    capacitance = np.column_stack([
+        stator_copper_weight * winding_length_share * conductor_specific_heat,
+        stator_copper_weight * (1.0 - winding_length_share) * conductor_specific_heat,
+        stator_core_weight * (1.0 - yoke_share) * SPECIFIC_HEAT_STEEL,
+        stator_core_weight * yoke_share * SPECIFIC_HEAT_STEEL,
+        (np.asarray(batch_result['housing_weight']) + np.asarray(batch_result['total_end_caps_weight'])) *
+        SPECIFIC_HEAT_ALUMINUM,
+        rotor_weight * SPECIFIC_HEAT_STEEL])
+    return ThermalNetwork(conductance, coolant_conductance, capacitance, np.array(coolant_temperature),
+                          winding_length_share)
+
+
+@instrumented()
+def calc_thermal_screening_batch(batch_result: dict, max_torque, base_speed, average_shear_stress=80.0,
+                                 airgap_flux_density=1.0, continuous_torque_ratio: float = 0.5,
+                                 peak_duration: float = 30.0, time_step: float = 1.0,
+                                 end_winding_length=END_WINDING_LENGTH, coolant_temperature=COOLANT_TEMPERATURE,
+                                 winding_temperature_limit=WINDING_TEMPERATURE_LIMIT,
+                                 magnet_temperature_limit=MAGNET_TEMPERATURE_LIMIT, topology=None,
+                                 electrical_steel=None, conductor=None) -> dict:
+    """
+    Thermal check of the designs of a size_motor_batch result: the steady state at the continuous torque
+    (continuous_torque_ratio * max_torque) and base speed, followed by the maximum torque at base speed for
+    peak_duration seconds. The winding temperature is the hotter of the slot and end winding nodes, the magnet
+    temperature limit only applies to designs with magnets (pm_weight > 0)
+
+    :param topology: topology indices or name of the designs, as passed to size_motor_batch, defaults to IPM
+    :param electrical_steel: electrical steel indices or name, as passed to size_motor_batch
+    :param conductor: winding conductor indices or name, as passed to size_motor_batch
+    :return: dict of (N,) arrays keyed by THERMAL_FIELDS, thermal_limit_exceeded_flag is True where a temperature
+        limit is exceeded
+    """
+
+    network = get_thermal_network_batch(batch_result, end_winding_length, coolant_temperature, topology, conductor)
+    geometry = (batch_result['stator_outer_diameter'], batch_result['stator_inner_diameter'],
+                batch_result['stator_stack_length'], batch_result['shaft_diameter'], max_torque, base_speed)
+    continuous_losses = compute_operating_point_losses(
+        *geometry, np.multiply(max_torque, continuous_torque_ratio), base_speed, average_shear_stress,
+        airgap_flux_density, end_winding_length, topology, electrical_steel, conductor)
+    peak_losses = compute_operating_point_losses(*geometry, max_torque, base_speed, average_shear_stress,
+                                                 airgap_flux_density, end_winding_length, topology, electrical_steel,
+                                                 conductor)
+
+    continuous = network.steady_state(network.get_loss_vector(continuous_losses))
+    # the temperatures rise monotonically under the peak losses, the end of the peak is the hottest point
+    peak = network.transient(network.get_loss_vector(peak_losses), peak_duration, time_step, continuous,
+                             record=False)
+    result = {'continuous_winding_temperature': continuous[:, [WINDING, END_WINDING]].max(axis=1),
+              'continuous_magnet_temperature': continuous[:, ROTOR],
+              'peak_winding_temperature': peak[:, [WINDING, END_WINDING]].max(axis=1),
+              'peak_magnet_temperature': peak[:, ROTOR]}
+    result['thermal_limit_exceeded_flag'] = \
+        (np.maximum(result['continuous_winding_temperature'], result['peak_winding_temperature']) >
+         winding_temperature_limit) | \
+        ((np.asarray(batch_result['pm_weight']) > 0) &
+         (np.maximum(result['continuous_magnet_temperature'], result['peak_magnet_temperature']) >
+          magnet_temperature_limit))
+    return result
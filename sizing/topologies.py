@@ -0,0 +1,196 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from sizing.material_database import TOPOLOGY_INDEX, TOPOLOGY_PARAMETERS, X_MOTOR_AXIAL_PM_LENGTH, \
+    X_MOTOR_END_RING_LENGTH, X_MOTOR_BOLT_DIAMETER
+
+
+""" Registry of the vectorized rotor kernels of the machine topologies. The batch engine (sizing.batch_sizing) sizes
+the stator, housing and auxiliary materials the same way for every topology; what differs per topology is the rotor:
+its inner diameter and the masses of its components. A kernel provides these two for an array of designs of its
+topology. size_motor_batch groups a mixed batch by topology and calls every kernel once on its group, so each design
+only pays for its own topology.
+
+New topologies subclass TopologyKernel, need a row in sizing.material_database.TOPOLOGIES and are registered with
+
+    @register_topology
+    class MyTopology(TopologyKernel):
+        name = 'my topology'
+"""
+
+TOPOLOGY_KERNELS = {}
+
+
+def register_topology(kernel_class):
+    """Class decorator registering a TopologyKernel under the TOPOLOGIES row of the same name"""
+
+    if kernel_class.name not in TOPOLOGY_INDEX:
+        raise KeyError(F"topology {kernel_class.name!r} has no row in sizing.material_database.TOPOLOGIES")
+    TOPOLOGY_KERNELS[TOPOLOGY_INDEX[kernel_class.name]] = kernel_class()
+    return kernel_class
+
+
+def get_topology_kernel(topology: int):
+    try:
+        return TOPOLOGY_KERNELS[topology]
+    except KeyError:
+        raise KeyError(F"no kernel is registered for topology {topology}") from None
+
+
+class TopologyKernel(ABC):
+    """
+    Vectorized rotor geometry and mass kernel of a topology. All arguments are arrays of the designs of the
+    topology; densities is a dict of density arrays (or scalars) keyed by electrical_steel, conductor, magnet,
+    shaft, pole_pieces and bolt.
+    """
+
+    name = None
+
+    @property
+    def parameters(self) -> dict:
+        """Row of sizing.material_database.TOPOLOGIES, as a dict"""
+
+        return TOPOLOGY_PARAMETERS[TOPOLOGY_INDEX[self.name]]
+
+    def calc_rotor_inner_diameter(self, rotor_outer_diameter, shaft_diameter):
+        return shaft_diameter
+
+    @abstractmethod
+    def calc_rotor_masses(self, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities) -> dict:
+        """
+        :return: dict with the rotor mass columns of the topology (other rotor masses are zero), and
+            e_machine_active_component_weight, electrical_steel, other_steel, conductor_weight (stator and rotor
+            conductors) and magnet_weight
+        """
+
+    @staticmethod
+    def calc_rotor_cylinder_volume(Dsi, Dri, Lstk):
+        return np.pi / 4 * (np.square(Dsi) - np.square(Dri)) * Lstk
+
+    @staticmethod
+    def calc_radial_shaft_weight(Dri, Lstk, densities):
+        # please refer to Benchmark data or MotorCAD templates for EV
+        return np.pi / 4 * (np.square(Dri)) * (Lstk * 2) * densities['shaft']
+
+
+@register_topology
+class IpmKernel(TopologyKernel):
+    """Interior PM machine, MotorSizingTool with PM_case and radial_case"""
+
+    name = 'IPM'
+
+    def calc_rotor_masses(self, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities) -> dict:
+        rotor_cylinder_vol = self.calc_rotor_cylinder_volume(Dsi, Dri, Lstk)
+        PM_vol = self.parameters['rotor_pm_fraction'] * rotor_cylinder_vol
+        shaft_weight = self.calc_radial_shaft_weight(Dri, Lstk, densities)
+        rotor_core_weight = (rotor_cylinder_vol - PM_vol) * densities['electrical_steel']
+        PM_weight = PM_vol * densities['magnet']
+        return {'shaft_weight': shaft_weight,
+                'rotor_core_weight': rotor_core_weight,
+                'pm_weight': PM_weight,
+                'e_machine_active_component_weight': shaft_weight + rotor_core_weight + PM_weight +
+                stator_core_weight + stator_copper_weight,
+                'electrical_steel': stator_core_weight + rotor_core_weight,
+                'other_steel': shaft_weight,
+                'conductor_weight': stator_copper_weight,
+                'magnet_weight': PM_weight}
+
+
+@register_topology
+class InductionKernel(TopologyKernel):
+    """Induction machine with a cage rotor, MotorSizingTool with radial_case but not PM_case"""
+
+    name = 'induction'
+
+    def calc_rotor_masses(self, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities) -> dict:
+        rotor_cylinder_vol = self.calc_rotor_cylinder_volume(Dsi, Dri, Lstk)
+        Cage_vol = self.parameters['rotor_cage_fraction'] * rotor_cylinder_vol
+        shaft_weight = self.calc_radial_shaft_weight(Dri, Lstk, densities)
+        rotor_core_weight = (rotor_cylinder_vol - Cage_vol) * densities['electrical_steel']
+        Cage_weight = Cage_vol * densities['conductor']
+        zeros = np.zeros_like(shaft_weight)
+        return {'shaft_weight': shaft_weight,
+                'rotor_core_weight': rotor_core_weight,
+                'cage_weight': Cage_weight,
+                'e_machine_active_component_weight': shaft_weight + rotor_core_weight + Cage_weight +
+                stator_core_weight + stator_copper_weight,
+                'electrical_steel': stator_core_weight + rotor_core_weight,
+                'other_steel': shaft_weight,
+                'conductor_weight': stator_copper_weight + Cage_weight,
+                'magnet_weight': zeros}
+
+
+@register_topology
+class XMotorKernel(TopologyKernel):
+    """X-motor with pole pieces, circumferential and axial magnets on a bush, MotorSizingTool without radial_case"""
+
+    name = 'X-motor'
+
+    def calc_rotor_inner_diameter(self, rotor_outer_diameter, shaft_diameter):
+        # the bush between the shaft and the pole pieces
+        return rotor_outer_diameter * 0.44
+
+    def calc_rotor_masses(self, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities) -> dict:
+        alpha_p = self.parameters['pole_arc_ratio']
+        rotor_cylinder_vol = self.calc_rotor_cylinder_volume(Dsi, Dri, Lstk)
+        pole_pieces_vol = rotor_cylinder_vol * alpha_p
+        circumferential_PM_vol = rotor_cylinder_vol * (1-alpha_p)
+        axial_PM_vol = rotor_cylinder_vol/Lstk * X_MOTOR_AXIAL_PM_LENGTH
+        Bush_vol = np.pi / 4 * (np.square(Dri) - np.square(Dsh)) * Lstk
+        shaft_vol = np.pi / 4 * (np.square(Dsh)) * (Lstk * 2)
+        Bolt_vol = np.pi / 4 * (np.square(X_MOTOR_BOLT_DIAMETER)) * (Lstk * 2)
+        end_ring_vol = rotor_cylinder_vol/Lstk * X_MOTOR_END_RING_LENGTH * 2
+
+        pole_pieces_weight = pole_pieces_vol * densities['pole_pieces']
+        circumferential_PM_weight = densities['magnet'] * circumferential_PM_vol
+        axial_PM_weight = axial_PM_vol * densities['magnet']
+        PM_weight = circumferential_PM_weight + axial_PM_weight
+        Bush_weight = Bush_vol * densities['shaft']
+        bolt_weight = Bolt_vol * densities['bolt']
+        end_ring_weight = end_ring_vol * densities['pole_pieces']
+        shaft_weight = shaft_vol * densities['shaft']
+        return {'shaft_weight': shaft_weight,
+                'pm_weight': PM_weight,
+                'pole_pieces_weight': pole_pieces_weight,
+                'circumferential_pm_weight': circumferential_PM_weight,
+                'axial_pm_weight': axial_PM_weight,
+                'bush_weight': Bush_weight,
+                'bolt_weight': bolt_weight,
+                'end_ring_weight': end_ring_weight,
+                'e_machine_active_component_weight': shaft_weight + pole_pieces_weight + PM_weight + Bush_weight +
+                bolt_weight + end_ring_weight + stator_core_weight + stator_copper_weight,
+                'electrical_steel': stator_core_weight + pole_pieces_weight + end_ring_weight,
+                'other_steel': shaft_weight + Bush_weight + bolt_weight,
+                'conductor_weight': stator_copper_weight,
+                'magnet_weight': PM_weight}
+
+
+@register_topology
+class SynRelKernel(TopologyKernel):
+    """Synchronous reluctance machine, a laminated rotor with flux barriers. In the PM assisted variant (PMaSynRel)
+    part of the barriers is filled with magnets"""
+
+    name = 'SynRel'
+
+    def calc_rotor_masses(self, Dsi, Dri, Dsh, Lstk, stator_core_weight, stator_copper_weight, densities) -> dict:
+        rotor_cylinder_vol = self.calc_rotor_cylinder_volume(Dsi, Dri, Lstk)
+        barrier_vol = self.parameters['rotor_barrier_fraction'] * rotor_cylinder_vol
+        PM_vol = self.parameters['rotor_pm_fraction'] * rotor_cylinder_vol
+        shaft_weight = self.calc_radial_shaft_weight(Dri, Lstk, densities)
+        rotor_core_weight = (rotor_cylinder_vol - barrier_vol) * densities['electrical_steel']
+        PM_weight = PM_vol * densities['magnet']
+        return {'shaft_weight': shaft_weight,
+                'rotor_core_weight': rotor_core_weight,
+                'pm_weight': PM_weight,
+                'e_machine_active_component_weight': shaft_weight + rotor_core_weight + PM_weight +
+                stator_core_weight + stator_copper_weight,
+                'electrical_steel': stator_core_weight + rotor_core_weight,
+                'other_steel': shaft_weight,
+                'conductor_weight': stator_copper_weight,
+                'magnet_weight': PM_weight}
+
+
+@register_topology
+class PmaSynRelKernel(SynRelKernel):
+    name = 'PMaSynRel'
@@ -0,0 +1,143 @@
+import numpy as np
+from lca.EM_production_environmental_impact import get_bom_array
+from instrumentation.stage_timers import instrumented
+
+# Notes: -script that uses the bom of an electric machine and the energy it draws over its duty cycle to calculate its
+#         total cost of ownership (manufacturing cost + discounted lifetime energy cost)
+#        -all quantities are batched: designs on the first axis, price scenarios on the second axis
+
+# variables description
+# em_bom_array          -   electric machine bills of materials (N x 10 array, kg)
+# material_prices       -   price of each BOM material per kg (S x 10 array, one row per price scenario)
+# annual_energy         -   electrical energy drawn by each machine per year (N array, kWh)
+# em_tco                -   total cost of ownership (N x S array)
+
+# 10 materials, columns as in ElectricMachineBom.get_bom_as_array
+EM_TCO_MATERIAL_HEADER = ['Electrical steel', 'Other steel', 'Aluminum', 'Copper', 'Insulation materials',
+                          'Insulation resins', 'Paint', 'Plastics', 'NdFeB', 'Ferrite']
+# default material prices in EUR/kg
+EM_MATERIAL_PRICES = np.array([2.5, 1.0, 2.6, 9.0, 10.0, 6.0, 5.0, 2.5, 80.0, 1.5])
+EM_MATERIAL_PRICES.flags.writeable = False
+# labour, scrap and overheads as a share of the material cost, and the fixed assembly and test cost per machine
+MANUFACTURING_OVERHEAD = 0.3
+ASSEMBLY_COST = 150.0
+ELECTRICITY_PRICE = 0.25        # EUR/kWh
+DISCOUNT_RATE = 0.05
+LIFETIME_YEARS = 10
+# result columns of calc_tco_batch
+EM_TCO_FIELDS = ('material_cost', 'manufacturing_cost', 'operating_cost', 'tco')
+
+
+class PriceScenarios:
+    """
+    S price scenarios, evaluated side by side as the second axis of the TCO arrays
+
+    :param material_prices: (S x 10) material prices [EUR/kg], a single (10,) row is one scenario
+    :param electricity_price: (S,) electricity prices [EUR/kWh]
+    :param discount_rate: (S,) yearly discount rates of the operating cost
+    :param int lifetime_years: years of operation
+    """
+
+    def __init__(self, material_prices=EM_MATERIAL_PRICES, electricity_price=ELECTRICITY_PRICE,
+                 discount_rate=DISCOUNT_RATE, lifetime_years: int = LIFETIME_YEARS):
+        self.material_prices = np.atleast_2d(np.asarray(material_prices, dtype=float))
+        number_of_scenarios = self.material_prices.shape[0]
+        self.electricity_price = np.broadcast_to(np.asarray(electricity_price, dtype=float), (number_of_scenarios,))
+        self.discount_rate = np.broadcast_to(np.asarray(discount_rate, dtype=float), (number_of_scenarios,))
+        self.lifetime_years = lifetime_years
+
+    def __len__(self):
+        return self.material_prices.shape[0]
+
+    @classmethod
+    def random(cls, number_of_scenarios: int, material_volatility: float = 0.3, electricity_volatility: float = 0.2,
+               seed=None, **kwargs):
+        """Scenarios with lognormally distributed prices around the defaults, volatilities are standard deviations
+        of the log prices"""
+
+        rng = np.random.default_rng(seed)
+        material_prices = EM_MATERIAL_PRICES * np.exp(
+            rng.normal(0.0, material_volatility, (number_of_scenarios, EM_MATERIAL_PRICES.size)))
+        electricity_price = ELECTRICITY_PRICE * np.exp(rng.normal(0.0, electricity_volatility, number_of_scenarios))
+        return cls(material_prices, electricity_price, **kwargs)
+
+    def get_present_value_factor(self):
+        """(S,) present value of 1 EUR spent every year of the lifetime"""
+
+        years = np.arange(1, self.lifetime_years + 1)
+        return (1.0 / (1.0 + self.discount_rate[:, None]) ** years[None, :]).sum(axis=1)
+
+
+def get_annual_energy(electrical_energy_per_cycle, cycles_per_year):
+    """Yearly electrical energy [kWh] from the energy per drive cycle [J], e.g. the electrical_energy of
+    sizing.loss_map.integrate_drive_cycle"""
+
+    return np.asarray(electrical_energy_per_cycle, dtype=float) * cycles_per_year / 3.6e6
+
+
+def get_annual_energy_from_efficiency(annual_mechanical_energy, efficiency):
+    """Yearly electrical energy [kWh] from the yearly mechanical energy [kWh] and the average efficiency"""
+
+    return np.asarray(annual_mechanical_energy, dtype=float) / np.asarray(efficiency, dtype=float)
+
+
+@instrumented()
+def calc_tco_batch(em_bom_array, annual_energy, price_scenarios: PriceScenarios = None, fields=EM_TCO_FIELDS) -> dict:
+    """
+    Manufacturing, operating and total cost of ownership of N machines under S price scenarios, without loops:
+    the material cost is one (N x 10) @ (10 x S) matrix multiplication, the operating cost an outer product
+
+    :param em_bom_array: (N x 10) BOM masses [kg]
+    :param annual_energy: (N,) electrical energy per year [kWh]
+    :param PriceScenarios price_scenarios: defaults to a single scenario of the default prices
+    :param fields: subset of EM_TCO_FIELDS to return, each is an (N x S) float64 array
+    :return: dict of (N x S) arrays [EUR]
+    """
+
+    if price_scenarios is None:
+        price_scenarios = PriceScenarios()
+    em_bom_array = np.asarray(em_bom_array, dtype=float).reshape(-1, EM_MATERIAL_PRICES.size)
+    annual_energy = np.broadcast_to(np.asarray(annual_energy, dtype=float), (em_bom_array.shape[0],))
+
+    material_cost = em_bom_array @ price_scenarios.material_prices.T
+    manufacturing_cost = material_cost * (1.0 + MANUFACTURING_OVERHEAD) + ASSEMBLY_COST
+    yearly_cost_factor = price_scenarios.electricity_price * price_scenarios.get_present_value_factor()
+    operating_cost = np.multiply.outer(annual_energy, yearly_cost_factor)
+    result = {'material_cost': material_cost,
+              'manufacturing_cost': manufacturing_cost,
+              'operating_cost': operating_cost,
+              'tco': manufacturing_cost + operating_cost}
+    return {field: result[field] for field in fields}
+
+
+@instrumented()
+def calc_tco_statistics(em_bom_array, annual_energy, price_scenarios: PriceScenarios,
+                        percentiles=(5, 50, 95), chunk_size: int = 100000) -> dict:
+    """
+    Per machine statistics of the TCO over the price scenarios, computed in chunks of designs so that the (N x S)
+    TCO array is never held in memory as a whole (1M designs x 50 scenarios would take 400 MB per array)
+
+    :return: dict of (N,) arrays: mean, min, max and p<percentile> for each percentile
+    """
+
+    em_bom_array = np.asarray(em_bom_array, dtype=float).reshape(-1, EM_MATERIAL_PRICES.size)
+    annual_energy = np.broadcast_to(np.asarray(annual_energy, dtype=float), (em_bom_array.shape[0],))
+    number_of_designs = em_bom_array.shape[0]
+    statistics = {name: np.empty(number_of_designs) for name in ('mean', 'min', 'max')}
+    statistics.update({F"p{percentile}": np.empty(number_of_designs) for percentile in percentiles})
+    for start in range(0, number_of_designs, chunk_size):
+        part = slice(start, start + chunk_size)
+        tco = calc_tco_batch(em_bom_array[part], annual_energy[part], price_scenarios, fields=('tco',))['tco']
+        statistics['mean'][part] = tco.mean(axis=1)
+        statistics['min'][part] = tco.min(axis=1)
+        statistics['max'][part] = tco.max(axis=1)
+        for percentile, values in zip(percentiles, np.percentile(tco, percentiles, axis=1)):
+            statistics[F"p{percentile}"][part] = values
+    return statistics
+
+
+def calc_tco(em_bom_object, annual_energy, price_scenarios: PriceScenarios = None) -> dict:
+    """TCO of one ElectricMachineBom (or MotorMassResult), dict of (S,) arrays"""
+
+    result = calc_tco_batch(get_bom_array([em_bom_object]), annual_energy, price_scenarios)
+    return {field: values[0] for field, values in result.items()}
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.batch_sizing import size_motor_batch, SIZING_OUTPUT_FIELDS, MASS_FIELDS, BOM_FIELDS
+from sizing.motor_sizing_tool import MotorSizingTool
+
+def size_scalar(max_torque, base_speed, maximum_rotor_speed, average_shear_stress, dl_ratio, PM_case, radial_case):
+    rotor = ConceptRotor(name='rotor')
+    rotor.dl_ratio = dl_ratio
+    stator = ConceptStator(name='stator')
+    sizing_tool = MotorSizingTool(electrical_motor_assembly=ConceptMotorAssembly('motor', rotor, stator),
+                                  average_shear_stress=average_shear_stress,
+                                  maximum_rotor_speed=maximum_rotor_speed,
+                                  max_torque=max_torque,
+                                  base_speed=base_speed,
+                                  PM_case=PM_case,
+                                  radial_case=radial_case)
+    sizing_tool.size_motor()
+    return sizing_tool
+
+
+class BatchSizingTestCase(unittest.TestCase):
+    def test_matches_scalar_path(self):
+        rng = np.random.default_rng(1)
+        n = 60
+        inputs = dict(max_torque=rng.uniform(50.0, 500.0, n),
+                      base_speed=rng.uniform(1000.0, 6000.0, n),
+                      maximum_rotor_speed=rng.uniform(8000.0, 20000.0, n),
+                      average_shear_stress=rng.uniform(30.0, 130.0, n),
+                      dl_ratio=rng.uniform(0.5, 3.0, n),
+                      PM_case=rng.random(n) < 0.5,
+                      radial_case=rng.random(n) < 0.6)
+        batch = size_motor_batch(**inputs)
+        self.assertEqual(set(batch), set(SIZING_OUTPUT_FIELDS))
+
+        for i in range(n):
+            sizing_tool = size_scalar(*[inputs[key][i].item() for key in inputs])
+            rotor = sizing_tool.electrical_motor_assembly.rotor
+            stator = sizing_tool.electrical_motor_assembly.stator
+            self.assertEqual(batch['rotor_outer_diameter'][i], rotor.outer_diameter)
+            self.assertEqual(batch['rotor_stack_length'][i], rotor.stack_length)
+            self.assertEqual(batch['rotor_inner_diameter'][i], rotor.inner_diameter)
+            self.assertEqual(batch['shaft_diameter'][i], rotor.shaft_diameter)
+            self.assertEqual(batch['stator_outer_diameter'][i], stator.outer_diameter)
+            self.assertEqual(batch['stator_split_ratio'][i], stator.split_ratio)
+            self.assertEqual(batch['tip_speed_error_flag'][i], sizing_tool.tip_speed_error_flag)
+            self.assertEqual(batch['stacking_limit_exceeded_flag'][i], sizing_tool.stacking_limit_exceeded_flag)
+            self.assertEqual(batch['shear_stress_out_of_range'][i], sizing_tool.shear_stress_out_of_range)
+            for key in MASS_FIELDS + BOM_FIELDS:
+                self.assertEqual(batch[key][i], getattr(sizing_tool.mass_result, key), key)
+
+    def test_scalar_inputs_broadcast(self):
+        batch = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, np.array([0.5, 1.0, 2.0]), True, False)
+        self.assertEqual(batch['total_motor_weight'].shape, (3,))
+        self.assertTrue(np.all(batch['ndfeb'] == 0.0))
+        self.assertTrue(np.all(batch['ferrite'] > 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
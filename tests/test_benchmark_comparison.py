@@ -0,0 +1,18 @@
+import unittest
+
+from benchmarks.compare_benchmarks import compare
+
+
+class BenchmarkComparisonTestCase(unittest.TestCase):
+    def test_flags_time_and_memory_regressions(self):
+        baseline = {'sizing': {'mean': 1.0, 'peak_memory_bytes': 100},
+                    'lca': {'mean': 1.0, 'peak_memory_bytes': 100}}
+        current = {'sizing': {'mean': 1.05, 'peak_memory_bytes': 150},
+                   'lca': {'mean': 1.5, 'peak_memory_bytes': 100}}
+        self.assertEqual(compare(baseline, current, time_threshold=0.1, memory_threshold=0.1),
+                         [('lca', 'mean', 1.0, 1.5), ('sizing', 'peak_memory_bytes', 100, 150)])
+        self.assertEqual(compare(baseline, baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.cross_section_sheets import CROSS_SECTION_FIELDS, get_batch_extent, get_cross_section_geometry, \
+    get_sheet_bounds, get_tile_layout, get_tile_size, render_cross_sections
+from examples.example_motor_sizing_tool import get_concept_motor
+
+HAS_MATPLOTLIB = importlib.util.find_spec('matplotlib') is not None
+
+
+class CrossSectionSheetsTestCase(unittest.TestCase):
+    def test_sheet_bounds(self):
+        self.assertEqual(get_sheet_bounds(250, 10, 10), [(0, 100), (100, 200), (200, 250)])
+        self.assertEqual(get_sheet_bounds(0), [])
+
+    def test_geometry_of_assemblies(self):
+        geometry = get_cross_section_geometry([get_concept_motor(1.0), get_concept_motor(2.0)])
+        np.testing.assert_array_equal(geometry['rotor_outer_diameter'], [0.05, 0.05])
+        np.testing.assert_array_equal(geometry['shaft_diameter'], [0.025, 0.025])
+
+    def test_tile_layout(self):
+        geometry = get_cross_section_geometry([get_concept_motor(1.0), get_concept_motor(2.0)])
+        extent = get_batch_extent(geometry)
+        tile_width, tile_height, margin, diameter, stack_length = get_tile_size(extent)
+        self.assertEqual((diameter, stack_length), extent)
+        layout = get_tile_layout(geometry, extent, columns=1, rows=3)
+        # one tile per row from the top, the radial section on the left of the tile
+        np.testing.assert_allclose(layout['radial_centres'], [[margin + diameter / 2, 2.5 * tile_height],
+                                                              [margin + diameter / 2, 1.5 * tile_height]])
+        np.testing.assert_allclose(layout['label_positions'], [[margin / 4, 3 * tile_height],
+                                                               [margin / 4, 2 * tile_height]])
+        # the axial sections are as long as the stack, the shaft twice as long, and fit into the tile
+        for field, vertices in layout['axial_vertices'].items():
+            self.assertEqual(vertices.shape, (2, 4, 2))
+            length = vertices[:, 1, 0] - vertices[:, 0, 0]
+            factor = 2.0 if field == 'shaft_diameter' else 1.0
+            np.testing.assert_allclose(length, factor * geometry['rotor_stack_length'])
+            np.testing.assert_allclose(vertices[:, 2, 1] - vertices[:, 1, 1], geometry[field])
+            self.assertTrue(np.all(vertices[..., 0] <= tile_width))
+
+    def test_batch_without_extent(self):
+        empty = {field: np.zeros(0) for field in CROSS_SECTION_FIELDS}
+        self.assertEqual(get_batch_extent(empty), (0.0, 0.0))
+        nan = {field: np.array([np.nan]) for field in CROSS_SECTION_FIELDS}
+        self.assertEqual(get_batch_extent(nan), (0.0, 0.0))
+        tile_width, tile_height, margin, diameter, stack_length = get_tile_size((0.0, 0.0))
+        self.assertEqual((diameter, stack_length), (1.0, 0.0))
+        self.assertGreater(min(tile_width, tile_height, margin), 0.0)
+        zeros = {field: np.zeros(3) for field in CROSS_SECTION_FIELDS}
+        layout = get_tile_layout(zeros, get_batch_extent(zeros), columns=2, rows=2)
+        self.assertTrue(np.all(np.isfinite(layout['radial_centres'])))
+
+    @unittest.skipUnless(HAS_MATPLOTLIB, 'matplotlib is not installed')
+    def test_render_sheets(self):
+        rng = np.random.default_rng(0)
+        result = size_motor_batch(rng.uniform(100.0, 400.0, 30), 3000.0, 12000.0, 80.0, rng.uniform(0.5, 3.0, 30),
+                                  topology=rng.integers(0, 5, 30))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = render_cross_sections(result, directory, columns=4, rows=4)
+            self.assertEqual(len(paths), 2)
+            for path in paths:
+                with open(path, 'rb') as file:
+                    self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+
+            svg_paths = render_cross_sections(result, directory, columns=4, rows=4, file_format='svg', workers=2)
+            self.assertEqual([os.path.splitext(path)[1] for path in svg_paths], ['.svg', '.svg'])
+
+            zeros = {field: np.zeros(3) for field in CROSS_SECTION_FIELDS}
+            self.assertEqual(len(render_cross_sections(zeros, directory, prefix='zeros')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from sizing.design_optimizer import evaluate_design, evaluate_with_gradients, minimise_design, pareto_front
+
+REQUIREMENTS = dict(max_torque=250.0, base_speed=3000.0, maximum_rotor_speed=15000.0, PM_case=True, radial_case=True)
+
+
+class DesignOptimizerTestCase(unittest.TestCase):
+    def test_gradients_match_finite_differences(self):
+        x = np.array([[1.2, 70.0], [0.7, 100.0]])
+        values, gradients = evaluate_with_gradients(x, REQUIREMENTS)
+        for variable in range(2):
+            step = np.zeros(2)
+            step[variable] = 1e-6
+            upper = evaluate_design(*(x + step).T, **REQUIREMENTS)
+            lower = evaluate_design(*(x - step).T, **REQUIREMENTS)
+            for name in values:
+                np.testing.assert_allclose(gradients[name][:, variable], (upper[name] - lower[name]) / 2e-6,
+                                           rtol=1e-5, atol=1e-9)
+
+    def test_optimum_beats_dense_sweep_with_fewer_evaluations(self):
+        dl_ratio, shear_stress = np.meshgrid(np.linspace(0.5, 3.0, 300), np.linspace(40.0, 120.0, 300))
+        values = evaluate_design(dl_ratio.ravel(), shear_stress.ravel(), **REQUIREMENTS)
+        feasible = (values['tip_speed_constraint'] < 0.0) & (values['stack_length_constraint'] <= 0.0)
+        for objective in ('total_motor_weight', 'climate_change'):
+            design = minimise_design(objective, seed=0, **REQUIREMENTS)
+            self.assertTrue(design['feasible'])
+            self.assertLess(design['evaluations'], dl_ratio.size / 10)
+            self.assertLessEqual(design[objective], np.min(values[objective][feasible]) * (1 + 1e-4))
+
+    def test_pareto_front_is_non_dominated(self):
+        front = pareto_front(seed=0, number_of_weights=11, **REQUIREMENTS)
+        self.assertGreater(front['total_motor_weight'].size, 1)
+        self.assertTrue(np.all(np.diff(front['total_motor_weight']) > 0))
+        self.assertTrue(np.all(np.diff(front['climate_change']) < 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
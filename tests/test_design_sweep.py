@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.design_sweep import grid_samples, latin_hypercube_samples, run_sweep, collect_sweep
+
+
+class DesignSweepTestCase(unittest.TestCase):
+    def test_grid_samples(self):
+        samples = grid_samples(dl_ratio=[0.5, 1.0, 2.0], average_shear_stress=[40.0, 80.0])
+        self.assertEqual(samples['dl_ratio'].tolist(), [0.5, 0.5, 1.0, 1.0, 2.0, 2.0])
+        self.assertEqual(samples['average_shear_stress'].tolist(), [40.0, 80.0] * 3)
+
+    def test_latin_hypercube_is_stratified_and_seeded(self):
+        samples = latin_hypercube_samples({'dl_ratio': (0.5, 3.0)}, 50, seed=4)
+        strata = np.floor((samples['dl_ratio'] - 0.5) / 2.5 * 50)
+        self.assertEqual(sorted(strata.tolist()), list(range(50)))
+        np.testing.assert_array_equal(samples['dl_ratio'],
+                                      latin_hypercube_samples({'dl_ratio': (0.5, 3.0)}, 50, seed=4)['dl_ratio'])
+
+    def test_parallel_sweep_matches_batch_in_order(self):
+        samples = latin_hypercube_samples({'dl_ratio': (0.5, 3.0), 'average_shear_stress': (40.0, 120.0),
+                                           'max_torque': (100.0, 400.0)}, 1000, seed=0)
+        samples['radial_case'] = np.arange(1000) % 3 != 0
+        starts = []
+
+        def record_starts(sweep):
+            for start, result in sweep:
+                starts.append(start)
+                yield start, result
+
+        swept = collect_sweep(record_starts(run_sweep(samples, chunk_size=128, workers=2, lca=True)))
+        self.assertEqual(starts, list(range(0, 1000, 128)))
+        expected = size_motor_batch(samples['max_torque'], 3000.0, 12000.0, samples['average_shear_stress'],
+                                    samples['dl_ratio'], True, samples['radial_case'])
+        for field, values in expected.items():
+            np.testing.assert_array_equal(swept[field], values, field)
+        self.assertEqual(swept['climate_change'].shape, (1000,))
+
+
+if __name__ == '__main__':
+    unittest.main()
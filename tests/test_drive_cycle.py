@@ -0,0 +1,85 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.drive_cycle import TorqueSpeedEnvelope, get_fleet_requirements, iter_trace_chunks, read_trace_envelope, \
+    size_fleet
+
+
+class DriveCycleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(1)
+        self.trace = np.column_stack([rng.uniform(-250.0, 250.0, 5000), rng.uniform(0.0, 11000.0, 5000)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_traces(self):
+        csv_path = os.path.join(self.directory.name, 'trace.csv')
+        np.savetxt(csv_path, self.trace, delimiter=',', header='torque,speed', comments='')
+        npy_path = os.path.join(self.directory.name, 'trace.npy')
+        np.save(npy_path, self.trace)
+        bin_path = os.path.join(self.directory.name, 'trace.bin')
+        self.trace.astype('<f8').tofile(bin_path)
+        return csv_path, npy_path, bin_path
+
+    def test_formats_are_read_in_chunks(self):
+        for path in self.write_traces():
+            chunks = list(iter_trace_chunks(path, chunk_size=1200))
+            self.assertEqual([torque.size for torque, _ in chunks], [1200, 1200, 1200, 1200, 200], path)
+            np.testing.assert_allclose(np.concatenate([speed for _, speed in chunks]), self.trace[:, 1])
+
+    def test_streamed_envelope_matches_whole_trace(self):
+        torque = np.abs(self.trace[:, 0])
+        speed = self.trace[:, 1]
+        power = torque * speed * math.pi / 30.0
+        envelope = read_trace_envelope(self.write_traces()[1], chunk_size=700)
+        self.assertEqual(envelope.number_of_samples, 5000)
+        self.assertEqual(envelope.max_torque, torque.max())
+        self.assertEqual(envelope.maximum_rotor_speed, speed.max())
+        self.assertAlmostEqual(envelope.peak_power, power.max())
+        self.assertAlmostEqual(envelope.base_speed * math.pi / 30.0 * envelope.max_torque, power.max())
+
+        halves = TorqueSpeedEnvelope().update(*self.trace[:2500].T)
+        halves.merge(TorqueSpeedEnvelope().update(*self.trace[2500:].T))
+        np.testing.assert_array_equal(halves.envelope_torque, envelope.envelope_torque)
+        self.assertEqual(halves.get_requirements(), envelope.get_requirements())
+
+    def test_invalid_samples(self):
+        envelope = TorqueSpeedEnvelope().update(*self.trace[:100].T)
+        state = (envelope.number_of_samples, envelope.max_torque, envelope.peak_power,
+                 envelope.envelope_torque.copy())
+        with self.assertRaises(ValueError):
+            envelope.update([10.0, 20.0], [1e9, 1000.0])
+        self.assertEqual((envelope.number_of_samples, envelope.max_torque, envelope.peak_power), state[:3])
+        np.testing.assert_array_equal(envelope.envelope_torque, state[3])
+
+        # logger dropouts are skipped and counted
+        envelope.update([np.nan, 300.0, 50.0], [2000.0, np.inf, 1000.0])
+        self.assertEqual((envelope.number_of_samples, envelope.number_of_skipped_samples), (101, 2))
+        self.assertEqual(envelope.max_torque, state[1])
+        self.assertEqual(envelope.envelope_torque.size, state[3].size)
+
+    def test_size_fleet(self):
+        paths = self.write_traces()
+        result = size_fleet(paths, dl_ratio=1.5)
+        requirements = read_trace_envelope(paths[0]).get_requirements()
+        expected = size_motor_batch(requirements['max_torque'], requirements['base_speed'],
+                                    requirements['maximum_rotor_speed'], 80.0, 1.5)
+        self.assertEqual(result['total_motor_weight'].shape, (3,))
+        np.testing.assert_allclose(result['total_motor_weight'], expected['total_motor_weight'][0])
+
+        # a trace without torque has no base speed
+        idle_path = os.path.join(self.directory.name, 'idle.npy')
+        np.save(idle_path, np.column_stack([np.zeros(100), np.linspace(0.0, 5000.0, 100)]))
+        with self.assertRaises(ValueError):
+            get_fleet_requirements(paths + (idle_path,), speed_bin_width=250.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+from lca.EM_fleet_impact import FleetAggregate, aggregate_fleet
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS, EM_PEI_KG
+from sizing.batch_sizing import BOM_FIELDS, get_bom_array_batch, size_motor_batch
+from sizing.material_database import TOPOLOGY_INDEX
+
+
+class FleetImpactTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.table = {'programme': rng.choice(np.array(['compact', 'suv']), 500),
+                      'year': rng.integers(2026, 2029, 500),
+                      'volume': rng.integers(100, 10000, 500).astype(float),
+                      'max_torque': rng.uniform(100.0, 400.0, 500),
+                      'dl_ratio': rng.uniform(0.5, 3.0, 500),
+                      'PM_case': rng.random(500) < 0.7}
+
+    def test_totals_match_per_variant_impacts(self):
+        totals = aggregate_fleet(self.table, chunk_size=128).get_totals()
+        self.assertEqual(set(totals['topology']), {'IPM', 'induction'})
+
+        result = size_motor_batch(self.table['max_torque'], 3000.0, 12000.0, 80.0, self.table['dl_ratio'],
+                                  self.table['PM_case'], True)
+        impacts = get_bom_array_batch(result) @ EM_PEI_KG.T * self.table['volume'][:, None]
+        for row in range(len(totals['volume'])):
+            variants = (self.table['programme'] == totals['programme'][row]) & \
+                (self.table['year'] == totals['year'][row]) & \
+                (self.table['PM_case'] == (totals['topology'][row] == 'IPM'))
+            self.assertEqual(totals['variants'][row], np.count_nonzero(variants))
+            self.assertAlmostEqual(totals['volume'][row], self.table['volume'][variants].sum())
+            np.testing.assert_allclose([totals[field][row] for field in EM_PEI_FIELDS],
+                                       impacts[variants].sum(axis=0), rtol=1e-12)
+
+    def test_partial_aggregates_merge(self):
+        whole = aggregate_fleet(self.table)
+        first = aggregate_fleet({name: values[:200] for name, values in self.table.items()})
+        second = aggregate_fleet({name: values[200:] for name, values in self.table.items()})
+        merged = first.merge(second).get_totals()
+        for field, values in whole.get_totals().items():
+            if values.dtype.kind == 'f':
+                np.testing.assert_allclose(merged[field], values, rtol=1e-12, err_msg=field)
+            else:
+                np.testing.assert_array_equal(merged[field], values, field)
+        with self.assertRaises(ValueError):
+            first.merge(FleetAggregate(('programme',)))
+
+    def test_processes_and_material_split(self):
+        serial = aggregate_fleet(self.table, group_by=('programme',), chunk_size=100).get_totals()
+        parallel = aggregate_fleet(self.table, group_by=('programme',), chunk_size=100, workers=2)
+        np.testing.assert_allclose(parallel.get_totals()['climate_change'], serial['climate_change'], rtol=1e-12)
+
+        by_material = parallel.get_totals(by_material=True)
+        self.assertEqual(len(by_material['material']), 2 * len(BOM_FIELDS))
+        for programme_index, programme in enumerate(serial['programme']):
+            rows = by_material['programme'] == programme
+            np.testing.assert_allclose(by_material['mass'][rows],
+                                       [serial[field][programme_index] for field in BOM_FIELDS])
+            share = by_material['climate_change'][rows].sum() / serial['climate_change'][programme_index]
+            self.assertAlmostEqual(share, 1.0, places=12)
+
+    def test_topology_names_match_indices(self):
+        names = np.where(self.table['PM_case'], 'IPM', 'SynRel')
+        by_name = aggregate_fleet(dict(self.table, topology=names), chunk_size=128).get_totals()
+        indices = np.array([TOPOLOGY_INDEX[name] for name in names])
+        by_index = aggregate_fleet(dict(self.table, topology=indices), chunk_size=128).get_totals()
+        self.assertEqual(set(by_name['topology']), {'IPM', 'SynRel'})
+        for field, values in by_index.items():
+            if values.dtype.kind == 'f':
+                np.testing.assert_allclose(by_name[field], values, rtol=1e-12, err_msg=field)
+            else:
+                np.testing.assert_array_equal(by_name[field], values, field)
+
+    def test_unsized_variants_are_counted_not_summed(self):
+        table = dict(self.table, max_torque=self.table['max_torque'].copy(), volume=self.table['volume'].copy())
+        table['max_torque'][:3] = np.nan
+        table['volume'][3] = np.nan
+        totals = aggregate_fleet(table, group_by=(), chunk_size=128).get_totals()
+        valid = {name: values[4:] for name, values in self.table.items()}
+        expected = aggregate_fleet(valid, group_by=()).get_totals()
+        self.assertEqual(totals['invalid_variants'].tolist(), [4.0])
+        self.assertEqual(totals['variants'].tolist(), [496.0])
+        for field in ('volume', 'total_motor_weight') + EM_PEI_FIELDS:
+            np.testing.assert_allclose(totals[field], expected[field], rtol=1e-12, err_msg=field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from lca.EM_impact_uncertainty import ImpactUncertainty, get_impact_percentiles, sample_impacts
+from lca.EM_production_environmental_impact import EM_PEI_FIELDS, get_pei_matrix_batch
+from sizing.batch_sizing import get_bom_array_batch, size_motor_batch
+
+
+class ImpactUncertaintyTestCase(unittest.TestCase):
+    def test_without_spread_samples_equal_point_estimate(self):
+        no_spread = ImpactUncertainty(sizing_input_spread={}, bom_ratio_spread=0.0, impact_factor_spread=0.0)
+        samples = sample_impacts(dl_ratio=[1.0, 2.0], number_of_samples=10, uncertainty=no_spread, seed=0)
+
+        # the deterministic LCA of the sweeps and the optimizer
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, np.array([1.0, 2.0]))
+        expected = get_pei_matrix_batch(get_bom_array_batch(result))
+        np.testing.assert_allclose(samples, np.repeat(expected[:, None, :], 10, axis=1), rtol=1e-12)
+
+    def test_each_block_is_sized_in_one_batch(self):
+        dl_ratio = np.linspace(0.5, 3.0, 7)
+        together = sample_impacts(dl_ratio=dl_ratio, number_of_samples=300, seed=3)
+        self.assertEqual(together.shape, (7, 300, len(EM_PEI_FIELDS)))
+        self.assertFalse(np.array_equal(together[0], together[1]))
+        np.testing.assert_array_equal(sample_impacts(dl_ratio=dl_ratio, number_of_samples=300, seed=3), together)
+
+        # 7 designs x 57 samples per block of 400 rows
+        with mock.patch('lca.EM_impact_uncertainty.MONTE_CARLO_BLOCK', 400), \
+                mock.patch('lca.EM_impact_uncertainty.size_motor_batch', wraps=size_motor_batch) as sizing:
+            blocks = sample_impacts(dl_ratio=dl_ratio, number_of_samples=300, seed=3)
+        self.assertEqual(sizing.call_count, 6)
+        self.assertEqual(sizing.call_args.kwargs['dl_ratio'].shape, (7 * (300 - 5 * 57),))
+        self.assertFalse(np.array_equal(blocks[:, :57], blocks[:, 57:114]))
+        np.testing.assert_allclose(blocks.mean(axis=1), together.mean(axis=1), rtol=0.1)
+
+    def test_percentiles_are_reproducible_and_ordered(self):
+        percentiles = get_impact_percentiles(dl_ratio=[1.0, 1.5], number_of_samples=25000, seed=7)
+        again = get_impact_percentiles(dl_ratio=[1.0, 1.5], number_of_samples=25000, seed=7)
+        for field in EM_PEI_FIELDS:
+            self.assertEqual(percentiles[field].shape, (2, 3))
+            self.assertTrue(np.all(np.diff(percentiles[field], axis=1) > 0.0), field)
+        np.testing.assert_array_equal(percentiles['climate_change'][0], again['climate_change'][0])
+        self.assertFalse(np.array_equal(percentiles['climate_change'][0],
+                                        get_impact_percentiles(number_of_samples=25000, seed=8)['climate_change'][0]))
+
+        point = get_pei_matrix_batch(get_bom_array_batch(size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0)))
+        self.assertLess(percentiles['climate_change'][0, 0], point[0, 0])
+        self.assertGreater(percentiles['climate_change'][0, 2], point[0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
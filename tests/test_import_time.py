@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds allowed for a fresh interpreter to import the sizing and LCA modules, numpy included
+IMPORT_TIME_BUDGET = float(os.environ.get("RUBICON_IMPORT_TIME_BUDGET", "1.5"))
+
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+import sizing.motor_sizing_tool
+import lca.EM_production_environmental_impact
+import examples.example_motor_sizing_tool
+elapsed = time.perf_counter() - start
+sys.stderr.write(json.dumps([elapsed, 'matplotlib' in sys.modules]))
+"""
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_import_is_clean_and_fast(self):
+        completed = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=REPOSITORY_ROOT,
+                                   capture_output=True, text=True, timeout=60)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        elapsed, matplotlib_imported = json.loads(completed.stderr)
+        self.assertEqual(completed.stdout, "")
+        self.assertFalse(matplotlib_imported)
+        self.assertLess(elapsed, IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
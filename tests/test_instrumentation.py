@@ -0,0 +1,77 @@
+import contextlib
+import io
+import json
+import threading
+import unittest
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator, \
+    ElectricMachineBom
+from lca.EM_production_environmental_impact import get_pei_matrix
+from instrumentation.stage_timers import PROFILER, instrumented
+from sizing.motor_sizing_tool import MotorSizingTool
+
+
+def size_and_assess(verbose=False):
+    sizing_tool = MotorSizingTool(ConceptMotorAssembly('motor', ConceptRotor('rotor'), ConceptStator('stator')),
+                                  verbose=verbose)
+    with contextlib.redirect_stdout(io.StringIO()):
+        mass_result = sizing_tool.size_motor()
+    return get_pei_matrix(ElectricMachineBom.from_mass_result('bom', mass_result))
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def tearDown(self):
+        PROFILER.disable()
+        PROFILER.reset()
+
+    def test_disabled_records_nothing(self):
+        size_and_assess()
+        self.assertEqual(PROFILER.report(), {'stages': {}, 'stacks': {}})
+
+    def test_stages_and_stacks(self):
+        PROFILER.enable()
+        size_and_assess(verbose=True)
+        size_and_assess()
+        PROFILER.disable()
+
+        stages = json.loads(PROFILER.to_json())['stages']
+        self.assertEqual(stages['MotorSizingTool.size_motor']['calls'], 2)
+        self.assertEqual(stages['MotorSizingTool.material_size_wieght_cal']['calls'], 2)
+        self.assertEqual(stages['print_sizing_report']['calls'], 1)
+        self.assertEqual(stages['get_pei_matrix']['calls'], 2)
+        size_motor = stages['MotorSizingTool.size_motor']
+        self.assertLessEqual(size_motor['self_time'], size_motor['total_time'])
+
+        collapsed = PROFILER.to_collapsed().splitlines()
+        stacks = [line.rsplit(' ', 1)[0] for line in collapsed]
+        self.assertIn('MotorSizingTool.size_motor;MotorSizingTool.calc_rot_dimensions', stacks)
+        self.assertIn('MotorSizingTool.size_motor;print_sizing_report;print_mass_result', stacks)
+        self.assertIn('get_pei_matrix', stacks)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed))
+
+    def test_threads_keep_their_own_stacks(self):
+        inside, release = threading.Event(), threading.Event()
+
+        @instrumented('worker_stage')
+        def worker_stage():
+            inside.set()
+            release.wait(5.0)
+
+        PROFILER.enable()
+        worker = threading.Thread(target=worker_stage)
+        with PROFILER.stage('main_stage'):
+            worker.start()
+            inside.wait(5.0)
+            # a reset while the worker is inside its stage must not break it
+            PROFILER.reset()
+            with PROFILER.stage('main_child'):
+                pass
+        release.set()
+        worker.join()
+        PROFILER.disable()
+
+        self.assertEqual(sorted(PROFILER.report()['stacks']), ['main_stage', 'main_stage;main_child', 'worker_stage'])
+
+
+if __name__ == '__main__':
+    unittest.main()
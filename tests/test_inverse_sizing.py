@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.inverse_sizing import size_for_envelope
+
+
+class InverseSizingTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.housing_diameter = rng.uniform(0.15, 0.45, 1000)
+        self.housing_length = rng.uniform(0.08, 0.6, 1000)
+        self.maximum_rotor_speed = rng.uniform(6000.0, 20000.0, 1000)
+
+    def test_solution_fits_envelope(self):
+        fit = size_for_envelope(self.housing_diameter, self.housing_length, self.maximum_rotor_speed)
+        self.assertTrue(fit['feasible'].all())
+        result = size_motor_batch(fit['max_torque'], 3000.0, self.maximum_rotor_speed, fit['average_shear_stress'],
+                                  fit['dl_ratio'])
+        np.testing.assert_allclose(result['housing_diameter'], fit['housing_diameter'], rtol=1e-12)
+        self.assertTrue(np.all(result['housing_diameter'] <= self.housing_diameter + 1e-12))
+        self.assertTrue(np.all(result['housing_length'] <= self.housing_length + 1e-12))
+        for flag in ('tip_speed_error_flag', 'stacking_limit_exceeded_flag', 'shear_stress_out_of_range'):
+            self.assertFalse(result[flag].any(), flag)
+
+    def test_no_grid_point_beats_solution(self):
+        shear_stress, dl_ratio = (grid.ravel() for grid in np.meshgrid(np.linspace(40.0, 120.0, 81),
+                                                                        np.linspace(0.5, 3.0, 51)))
+        for index in range(3):
+            fit = size_for_envelope(self.housing_diameter[index], self.housing_length[index],
+                                    self.maximum_rotor_speed[index])
+            # largest torque of every grid point by bisection on the forward sizing
+            lower, upper = np.zeros_like(shear_stress), np.full_like(shear_stress, 5000.0)
+            for _ in range(40):
+                torque = (lower + upper) / 2
+                result = size_motor_batch(torque, 3000.0, self.maximum_rotor_speed[index], shear_stress, dl_ratio)
+                fits = (result['housing_diameter'] <= self.housing_diameter[index]) & \
+                    (result['housing_length'] <= self.housing_length[index]) & \
+                    ~result['tip_speed_error_flag'] & ~result['stacking_limit_exceeded_flag']
+                lower, upper = np.where(fits, torque, lower), np.where(fits, upper, torque)
+            self.assertLessEqual(lower.max(), fit['max_torque'][0] * (1 + 1e-6))
+
+    def test_fixed_shear_stress_and_infeasible_envelope(self):
+        fit = size_for_envelope([0.3, 0.03], 0.25, shear_stress_range=(80.0, 80.0))
+        np.testing.assert_array_equal(fit['average_shear_stress'], 80.0)
+        np.testing.assert_array_equal(fit['feasible'], [True, False])
+        for field in ('max_torque', 'dl_ratio', 'rotor_outer_diameter', 'rotor_stack_length', 'stator_outer_diameter',
+                      'housing_diameter', 'housing_length'):
+            self.assertTrue(np.isnan(fit[field][1]), field)
+            self.assertFalse(np.isnan(fit[field][0]), field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from lca.EM_production_environmental_impact import get_pei_matrix, get_pei_matrix_batch, get_bom_array, EM_PEI_KG
+from physical_objects.motors.concept_motor import ElectricMachineBom
+from sizing.batch_sizing import size_motor_batch, get_bom_array_batch
+from sizing.motor_mass_result import MotorMassResult
+
+
+def get_pei_matrix_loop(em_bom):
+    """Reference implementation, the original triple loop"""
+    em_pei = [[0] for _ in range(len(EM_PEI_KG))]
+    for i in range(len(EM_PEI_KG)):
+        for j in range(len(em_bom[0])):
+            for k in range(len(em_bom)):
+                em_pei[i][j] += EM_PEI_KG[i][k] * em_bom[k][j]
+    return em_pei
+
+
+class PeiMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bom = ElectricMachineBom(name="test bom", electrical_steel=107, other_steel=10, aluminum=16, copper=10,
+                                      ndfeb=2.5, ferrite=0)
+
+    def test_single_bom_matches_loop(self):
+        em_pei = get_pei_matrix(self.bom)
+        self.assertEqual(len(em_pei), 12)
+        np.testing.assert_allclose(em_pei, get_pei_matrix_loop(self.bom.get_bom_as_array()), rtol=1e-12)
+
+    def test_batch_matches_single(self):
+        boms = [self.bom, ElectricMachineBom(name="x-motor", electrical_steel=20, other_steel=5, aluminum=6,
+                                             copper=4, ndfeb=0, ferrite=1.2)]
+        em_pei = get_pei_matrix_batch(get_bom_array(boms))
+        self.assertEqual(em_pei.shape, (2, 12))
+        for row, bom in zip(em_pei, boms):
+            np.testing.assert_allclose(row, np.ravel(get_pei_matrix(bom)), rtol=1e-12)
+
+    def test_batch_sizing_to_lca(self):
+        batch = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, np.array([0.5, 1.0]), True, np.array([True, False]))
+        em_pei = get_pei_matrix_batch(get_bom_array_batch(batch))
+        mass_result = MotorMassResult.from_batch(batch, 1, PM_case=True, radial_case=False)
+        np.testing.assert_allclose(em_pei[1], np.ravel(get_pei_matrix(mass_result)), rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
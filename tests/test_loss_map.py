@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.batch_sizing import size_motor_batch
+from sizing.loss_map import LossMapCache, compute_operating_point_losses, get_loss_map, get_loss_maps_batch, \
+    integrate_drive_cycle
+from sizing.material_database import MATERIAL_INDEX, TOPOLOGY_INDEX
+from sizing.motor_sizing_tool import MotorSizingTool
+
+
+def make_sizing_tool(dl_ratio=1.0, **materials):
+    rotor = ConceptRotor('rotor')
+    rotor.set_dl_ratio_length(dl_ratio, 0.1)
+    tool = MotorSizingTool(ConceptMotorAssembly('motor', rotor, ConceptStator('stator')), **materials)
+    tool.size_motor()
+    return tool
+
+
+class LossMapTestCase(unittest.TestCase):
+    def test_maps_match_batch_and_are_physical(self):
+        tool = make_sizing_tool()
+        loss_map = get_loss_map(tool)
+        batch = get_loss_maps_batch(size_motor_batch(200.0, 3000.0, 12000.0, 80.0, [0.5, 1.0]), 200.0, 3000.0,
+                                    12000.0)
+        np.testing.assert_allclose(batch[1].total_loss, loss_map.total_loss, equal_nan=True)
+
+        efficiency = loss_map.efficiency[0]
+        self.assertEqual(efficiency.shape, (200, 200))
+        # above base speed the torque is limited to constant power
+        self.assertTrue(np.isnan(efficiency[-1, -1]))
+        self.assertFalse(np.isnan(efficiency[-1, 49]))
+        valid = efficiency[1:, 1:][~np.isnan(efficiency[1:, 1:])]
+        self.assertTrue(np.all((valid > 0.0) & (valid < 1.0)))
+        # copper loss grows with torque, iron loss with speed up to base speed
+        self.assertTrue(np.all(np.diff(loss_map.copper_loss[0, :, 0]) > 0.0))
+        self.assertTrue(np.all(np.diff(loss_map.iron_loss[0, 0, :49]) > 0.0))
+
+    def test_cache_shares_maps_of_identical_designs(self):
+        cache = LossMapCache(maxsize=1)
+        first = cache.get_loss_map(make_sizing_tool())
+        self.assertIs(cache.get_loss_map(make_sizing_tool()), first)
+        cache.get_loss_map(make_sizing_tool(dl_ratio=1.5))
+        self.assertEqual(cache.statistics.as_dict(), {'hits': 1, 'misses': 2, 'evictions': 1})
+        aluminum = cache.get_loss_map(make_sizing_tool(dl_ratio=1.5, conductor=MATERIAL_INDEX['aluminum conductor']))
+        self.assertEqual(cache.statistics.misses, 3)
+        np.testing.assert_allclose(aluminum.copper_loss, get_loss_map(
+            make_sizing_tool(dl_ratio=1.5, conductor=MATERIAL_INDEX['aluminum conductor'])).copper_loss)
+
+    def test_maps_and_operating_points_use_the_same_stator(self):
+        topology = np.array([TOPOLOGY_INDEX['IPM'], TOPOLOGY_INDEX['X-motor'], TOPOLOGY_INDEX['SynRel']])
+        materials = {'topology': topology, 'electrical_steel': MATERIAL_INDEX['NO20'],
+                     'conductor': np.array([MATERIAL_INDEX['copper']] * 2 + [MATERIAL_INDEX['aluminum conductor']])}
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, **materials)
+        loss_maps = get_loss_maps_batch(result, 200.0, 3000.0, 12000.0, n_torque=101, n_speed=121, **materials)
+        losses = compute_operating_point_losses(result['stator_outer_diameter'], result['stator_inner_diameter'],
+                                                result['stator_stack_length'], result['shaft_diameter'], 200.0,
+                                                3000.0, 100.0, 3000.0, **materials)
+        np.testing.assert_allclose(loss_maps.copper_loss[:, 50, 30], losses['copper_loss'])
+        np.testing.assert_allclose(loss_maps.iron_loss[:, 0, 30], losses['teeth_iron_loss'] + losses['yoke_iron_loss'])
+        np.testing.assert_allclose(loss_maps.mechanical_loss[:, 0, 30], losses['mechanical_loss'])
+
+        # an aluminium winding of the same geometry has the higher resistivity
+        copper = compute_operating_point_losses(result['stator_outer_diameter'][2], result['stator_inner_diameter'][2],
+                                                result['stator_stack_length'][2], result['shaft_diameter'][2], 200.0,
+                                                3000.0, 100.0, 3000.0, topology='SynRel', electrical_steel='NO20')
+        np.testing.assert_allclose(losses['copper_loss'][2] / copper['copper_loss'][0], 3.8e-8 / 2.3e-8)
+
+    def test_drive_cycle_integration(self):
+        loss_maps = get_loss_maps_batch(size_motor_batch(200.0, 3000.0, 12000.0, 80.0, [0.5, 1.0]), 200.0, 3000.0,
+                                        12000.0, n_torque=101, n_speed=121)
+        # grid points are reproduced exactly
+        energy = integrate_drive_cycle(loss_maps, [100.0, -100.0], [3000.0, 3000.0], 2.0)
+        np.testing.assert_allclose(energy['loss_energy'], 4.0 * loss_maps.total_loss[:, 50, 30])
+        self.assertTrue(np.allclose(energy['mechanical_energy'], 0.0))
+
+        rng = np.random.default_rng(3)
+        torque = rng.uniform(-150.0, 150.0, 1000)
+        speed = rng.uniform(0.0, 9000.0, 1000)
+        whole = integrate_drive_cycle(loss_maps, torque, speed, 0.1)
+        halves = [integrate_drive_cycle(loss_maps, torque[part], speed[part], 0.1)
+                  for part in (slice(0, 400), slice(400, None))]
+        for name, value in whole.items():
+            np.testing.assert_allclose(halves[0][name] + halves[1][name], value)
+        self.assertTrue(np.all(whole['electrical_energy'] > whole['mechanical_energy']))
+        self.assertTrue(np.all(whole['samples_outside_envelope'] > 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
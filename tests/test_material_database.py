@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from lca.EM_production_environmental_impact import get_pei_matrix_batch
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.batch_sizing import BOM_FIELDS, MASS_FIELDS, get_bom_array_batch, size_motor_batch
+from sizing.material_database import MATERIALS, TOPOLOGIES, get_conductor_property, get_density, get_material_index, \
+    get_topology_index
+from sizing.motor_sizing_tool import MotorSizingTool
+
+
+class MaterialDatabaseTestCase(unittest.TestCase):
+    def test_tables_are_read_only(self):
+        with self.assertRaises(ValueError):
+            MATERIALS['density'][0] = 1.0
+        with self.assertRaises(ValueError):
+            TOPOLOGIES['fill_factor'][0] = 1.0
+        self.assertEqual(get_density('copper'), 8933.0)
+        with self.assertRaises(KeyError):
+            get_material_index('unobtainium')
+        self.assertEqual(get_conductor_property('copper', 'resistivity'), 2.3e-8)
+        with self.assertRaises(KeyError):
+            get_conductor_property([get_material_index('copper'), get_material_index('M235-35A')], 'resistivity')
+
+    def test_topology_indices_match_flags(self):
+        topology = [get_topology_index(name) for name in ('IPM', 'induction', 'X-motor')]
+        by_topology = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, topology=topology)
+        by_flags = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, [True, False, True], [True, True, False])
+        for field, values in by_flags.items():
+            np.testing.assert_array_equal(by_topology[field], values, field)
+
+    def test_material_grades_as_vectorized_axis(self):
+        steels = np.array([get_material_index(name) for name in ('M235-35A', 'NO20')])
+        magnets = np.array([get_material_index(name) for name in ('N42UH', 'N48SH')])
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, electrical_steel=steels[:, None],
+                                  magnet=magnets[None, :])
+        default = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0)
+        # steel-major rows: (M235-35A, N42UH), (M235-35A, N48SH), (NO20, N42UH), (NO20, N48SH)
+        self.assertEqual(result['total_motor_weight'].shape, (4,))
+        self.assertEqual(get_bom_array_batch(result).shape, (4, 10))
+        self.assertEqual(result['total_motor_weight'][0], default['total_motor_weight'][0])
+        np.testing.assert_allclose(result['stator_core_weight'][2] / default['stator_core_weight'][0],
+                                   7600.0 / 7650.0)
+        np.testing.assert_allclose(result['ndfeb'][1] / default['ndfeb'][0], 7550.0 / 7500.0)
+        self.assertEqual(result['stator_outer_diameter'].shape, (4,))
+
+        aluminum_winding = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0,
+                                            conductor=get_material_index('aluminum conductor'))
+        self.assertEqual(aluminum_winding['copper'][0], 0.0)
+        np.testing.assert_allclose(aluminum_winding['aluminum'] - default['aluminum'],
+                                   default['copper'] * 2700.0 / 8933.0)
+
+    def test_scalar_tool_and_lca_take_material_indices(self):
+        materials = dict(electrical_steel=get_material_index('NO20'),
+                         conductor=get_material_index('aluminum conductor'), magnet=get_material_index('ferrite'))
+        for PM_case, radial_case in ((True, True), (False, True), (True, False)):
+            rotor = ConceptRotor(name='rotor')
+            rotor.dl_ratio = 1.2
+            sizing_tool = MotorSizingTool(ConceptMotorAssembly('motor', rotor, ConceptStator(name='stator')),
+                                          PM_case=PM_case, radial_case=radial_case, **materials)
+            mass_result = sizing_tool.size_motor()
+            batch = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.2, PM_case, radial_case, **materials)
+            for field in MASS_FIELDS + BOM_FIELDS:
+                self.assertEqual(getattr(mass_result, field), batch[field][0], field)
+
+        # impacts of masses per material, mapped to the BOM categories
+        masses = np.array([[10.0, 2.0, 1.0]])
+        materials = [get_material_index(name) for name in ('M235-35A', 'N42UH', 'N48SH')]
+        bom = np.zeros((1, 10))
+        bom[0, BOM_FIELDS.index('electrical_steel')] = 10.0
+        bom[0, BOM_FIELDS.index('ndfeb')] = 3.0
+        np.testing.assert_allclose(get_pei_matrix_batch(masses, MATERIALS['bom_column'][materials]),
+                                   get_pei_matrix_batch(bom))
+
+
+if __name__ == '__main__':
+    unittest.main()
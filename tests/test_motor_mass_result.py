@@ -0,0 +1,73 @@
+import contextlib
+import io
+import unittest
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator, \
+    ElectricMachineBom
+from sizing.batch_sizing import size_motor_batch
+from sizing.material_database import MATERIAL_INDEX
+from sizing.motor_mass_result import MotorMassResult
+from sizing.motor_sizing_tool import MotorSizingTool
+from sizing.sizing_report import print_sizing_report
+
+
+def get_sizing_tool(PM_case=True, radial_case=True, verbose=False, **materials):
+    rotor = ConceptRotor(name='rotor')
+    rotor.dl_ratio = 1.5
+    stator = ConceptStator(name='stator')
+    return MotorSizingTool(electrical_motor_assembly=ConceptMotorAssembly('motor', rotor, stator),
+                           PM_case=PM_case, radial_case=radial_case, verbose=verbose, **materials)
+
+
+class MotorMassResultTestCase(unittest.TestCase):
+    def test_size_motor_is_silent_and_returns_record(self):
+        sizing_tool = get_sizing_tool()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            mass_result = sizing_tool.size_motor()
+        self.assertEqual(output.getvalue(), '')
+        self.assertIsInstance(mass_result, MotorMassResult)
+        self.assertIs(mass_result, sizing_tool.mass_result)
+        self.assertEqual(mass_result.cage_weight, 0.0)
+        self.assertEqual(mass_result.ndfeb, mass_result.pm_weight)
+
+    def test_verbose_prints_report(self):
+        for PM_case, radial_case in ((True, True), (False, True), (True, False)):
+            sizing_tool = get_sizing_tool(PM_case, radial_case, verbose=True)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                mass_result = sizing_tool.size_motor()
+            self.assertIn(F"total_motor_weight = {mass_result.total_motor_weight} kg", output.getvalue())
+            self.assertIn("power = ", output.getvalue())
+
+            report = io.StringIO()
+            print_sizing_report(sizing_tool, file=report)
+            self.assertEqual(report.getvalue(), output.getvalue())
+
+    def test_report_shows_the_magnet_material(self):
+        report = io.StringIO()
+        sizing_tool = get_sizing_tool(magnet=MATERIAL_INDEX['ferrite'])
+        mass_result = sizing_tool.size_motor()
+        print_sizing_report(sizing_tool, file=report)
+        self.assertIn(F"Ferrite = {mass_result.ferrite} kg", report.getvalue())
+        self.assertNotIn("NdFeB", report.getvalue())
+        self.assertGreater(mass_result.ferrite, 0.0)
+
+    def test_bom_from_mass_result(self):
+        mass_result = get_sizing_tool(radial_case=False).size_motor()
+        bom = ElectricMachineBom.from_mass_result("x-motor", mass_result)
+        self.assertEqual(bom.get_bom_as_array(), mass_result.get_bom_as_array())
+        self.assertEqual(bom.insulation_resins, mass_result.impregnation_weight)
+        self.assertEqual(bom.ferrite, mass_result.pm_weight)
+
+    def test_from_batch_matches_scalar(self):
+        sizing_tool = get_sizing_tool(PM_case=False)
+        mass_result = sizing_tool.size_motor()
+        batch = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.5, False, True)
+        from_batch = MotorMassResult.from_batch(batch, 0, PM_case=False, radial_case=True)
+        for field in MotorMassResult.__slots__:
+            self.assertEqual(getattr(from_batch, field), getattr(mass_result, field), field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
+
+import numpy as np
+
 from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from physical_objects.motors.concept_motor_array import RotorArray, StatorArray, MotorAssemblyArray
+from sizing.batch_sizing import size_motor_batch
 
 
 class MyTestCase(unittest.TestCase):
@@ -7,5 +12,49 @@ class MyTestCase(unittest.TestCase):
         test_rotor = ConceptRotor("test rotor", 0.1, 0.03, 0.1)
         self.assertIsInstance(test_rotor, ConceptRotor)
 
+    def test_slots(self):
+        test_rotor = ConceptRotor("test rotor", 0.1, 0.03, 0.1)
+        with self.assertRaises(AttributeError):
+            test_rotor.outer_diamter = 0.2
+        self.assertFalse(hasattr(ConceptStator("test stator"), '__dict__'))
+
+
+class ConceptMotorArrayTestCase(unittest.TestCase):
+    def test_vectorized_methods_match_instances(self):
+        rotors = [ConceptRotor("rotor %d" % i, 0.1 + i / 100, 0.03, 0.1 + i / 50) for i in range(5)]
+        rotor_array = RotorArray.from_rotors(rotors)
+        rotor_array.set_rotor_mass_with_density(7650.0)
+        for rotor, view in zip(rotors, rotor_array):
+            rotor.set_rotor_mass_with_density(7650.0)
+            self.assertEqual(view.name, rotor.name)
+            self.assertAlmostEqual(view.mass, rotor.mass)
+            self.assertAlmostEqual(view.get_rotor_volume(), rotor.get_rotor_volume())
+
+        stators = [ConceptStator("stator %d" % i, inner_diameter=0.1 + i / 100) for i in range(5)]
+        stator_array = StatorArray.from_stators(stators)
+        stator_array.set_split_ratio_inner(0.6, stator_array.inner_diameter)
+        for stator, view in zip(stators, stator_array):
+            stator.set_split_ratio_inner(0.6, stator.inner_diameter)
+            self.assertAlmostEqual(view.outer_diameter, stator.outer_diameter)
+            self.assertAlmostEqual(view.calc_stator_volume(), stator.calc_stator_volume())
+
+    def test_views_do_not_copy(self):
+        rotor_array = RotorArray(3)
+        view = rotor_array[1]
+        view.set_dl_ratio_diameter(4.0, 0.2)
+        self.assertEqual(rotor_array.stack_length.tolist(), [0.1, 0.05, 0.1])
+        self.assertEqual(rotor_array.outer_diameter[1], 0.2)
+        rotor_array.outer_diameter[2] = 0.3
+        self.assertEqual(rotor_array[2].outer_diameter, 0.3)
+
+    def test_assemblies_from_batch(self):
+        batch = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, np.array([0.5, 1.0, 2.0]))
+        motors = MotorAssemblyArray.from_batch(batch)
+        self.assertEqual(len(motors), 3)
+        self.assertIsInstance(motors[2], ConceptMotorAssembly)
+        self.assertEqual(motors[2].stator.outer_diameter, batch['stator_outer_diameter'][2])
+        np.testing.assert_allclose(motors.stators.calc_stator_volume(),
+                                   [motor.stator.calc_stator_volume() for motor in motors])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from sizing.design_sweep import size_sweep_chunk
+from sizing.response_surface import INTERPOLATION_LIMIT, ResponseSurface
+
+FIELDS = ('stator_outer_diameter', 'total_motor_weight', 'climate_change')
+
+
+class ResponseSurfaceTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.surface = ResponseSurface.build(cls.directory.name, tolerance=1e-2, fields=FIELDS,
+                                            maximum_rotor_speed=15000.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.surface
+        cls.directory.cleanup()
+
+    def test_grid_is_refined_where_needed(self):
+        self.assertGreater(self.surface.number_of_points, 5 ** 4)
+        # grid points are reproduced exactly
+        axes = self.surface.axes
+        result = self.surface.query(max_torque=axes[0][3], base_speed=axes[1][1], average_shear_stress=axes[2][2],
+                                    dl_ratio=axes[3][-1])
+        exact = size_sweep_chunk({'max_torque': np.array([axes[0][3]]), 'base_speed': axes[1][1],
+                                  'average_shear_stress': axes[2][2], 'dl_ratio': axes[3][-1],
+                                  'maximum_rotor_speed': 15000.0}, lca=True)
+        for field in FIELDS:
+            self.assertAlmostEqual(result[field][0], exact[field][0], places=12)
+
+    def test_errors_within_estimates(self):
+        rng = np.random.default_rng(0)
+        queries = {'max_torque': rng.uniform(50.0, 500.0, 5000), 'base_speed': rng.uniform(1000.0, 6000.0, 5000),
+                   'average_shear_stress': rng.uniform(40.0, 120.0, 5000), 'dl_ratio': rng.uniform(0.5, 3.0, 5000)}
+        surface = ResponseSurface(self.directory.name)
+        blocks = [surface.query(**{name: values[start:start + INTERPOLATION_LIMIT] for name, values in queries.items()})
+                  for start in range(0, 5000, INTERPOLATION_LIMIT)]
+        result = {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+        self.assertFalse(result['exact'].any())
+        exact = size_sweep_chunk(dict(queries, maximum_rotor_speed=15000.0), lca=True)
+        for field in FIELDS:
+            error = np.abs(result[field] - exact[field])
+            self.assertTrue(np.all(error <= result[field + '_error_estimate'] + 1e-12), field)
+            # the tolerance holds for the edge midpoints of every axis, the cell errors add up over the 4 axes
+            self.assertLess(error.max(), 4 * 1e-2 * np.ptp(exact[field]), field)
+
+    def test_out_of_bounds_queries_are_exact(self):
+        result = self.surface.query(max_torque=[600.0, 200.0], dl_ratio=1.2)
+        np.testing.assert_array_equal(result['exact'], [True, False])
+        exact = size_sweep_chunk({'max_torque': np.array([600.0]), 'dl_ratio': 1.2, 'maximum_rotor_speed': 15000.0},
+                                 lca=True)
+        self.assertEqual(result['total_motor_weight'][0], exact['total_motor_weight'][0])
+        self.assertEqual(result['total_motor_weight_error_estimate'][0], 0.0)
+        with self.assertRaises(ValueError):
+            self.surface.query(maximum_rotor_speed=12000.0)
+
+    def test_large_batches_are_exact(self):
+        dl_ratio = np.linspace(0.5, 3.0, INTERPOLATION_LIMIT + 1)
+        result = self.surface.query(max_torque=200.0, dl_ratio=dl_ratio)
+        self.assertTrue(result['exact'].all())
+        exact = size_sweep_chunk({'max_torque': 200.0, 'dl_ratio': dl_ratio, 'maximum_rotor_speed': 15000.0},
+                                 lca=True)
+        for field in FIELDS:
+            np.testing.assert_array_equal(result[field], exact[field], field)
+            np.testing.assert_array_equal(result[field + '_error_estimate'], 0.0, field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from sizing.design_sweep import latin_hypercube_samples, run_sweep, collect_sweep
+from sizing.material_database import DEFAULT_MATERIALS, MATERIAL_INDEX, TOPOLOGY_INDEX
+from sizing.results_store import ResultsStore, get_results_schema
+
+
+class ResultsStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.samples = latin_hypercube_samples({'dl_ratio': (0.5, 3.0), 'average_shear_stress': (40.0, 120.0),
+                                                'max_torque': (100.0, 400.0)}, 500, seed=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_sweep_and_read_back(self):
+        store = ResultsStore(self.directory.name, get_results_schema(lca=True))
+        store.append_sweep(self.samples, run_sweep(self.samples, chunk_size=128, workers=1, lca=True))
+        expected = collect_sweep(run_sweep(self.samples, chunk_size=500, workers=1, lca=True))
+
+        reopened = ResultsStore(self.directory.name)
+        self.assertEqual(len(reopened), 500)
+        np.testing.assert_array_equal(reopened.column('total_motor_weight'), expected['total_motor_weight'])
+        np.testing.assert_array_equal(reopened.column('dl_ratio'), self.samples['dl_ratio'])
+        self.assertEqual(reopened.column('tip_speed_error_flag').dtype, np.bool_)
+        np.testing.assert_array_equal(reopened.column('base_speed'), np.full(500, 3000.0))
+
+    def test_topology_and_material_inputs_are_stored(self):
+        samples = dict(self.samples, topology=np.arange(500) % 5, magnet=MATERIAL_INDEX['N48SH'])
+        store = ResultsStore(self.directory.name, get_results_schema(lca=False))
+        store.append_sweep(samples, run_sweep(samples, chunk_size=128, workers=1))
+
+        np.testing.assert_array_equal(store.column('topology_index'), samples['topology'])
+        np.testing.assert_array_equal(store.column('magnet_index'), np.full(500, MATERIAL_INDEX['N48SH']))
+        np.testing.assert_array_equal(store.column('conductor_index'), np.full(500, DEFAULT_MATERIALS['conductor']))
+        # the flags are those of the topology which was sized, not the PM_case / radial_case defaults
+        induction = samples['topology'] == TOPOLOGY_INDEX['induction']
+        self.assertFalse(np.any(store.column('PM_case')[induction]))
+        np.testing.assert_array_equal(store.column('radial_case'), samples['topology'] != TOPOLOGY_INDEX['X-motor'])
+
+    def test_filter_and_aggregate_in_chunks(self):
+        store = ResultsStore(self.directory.name, get_results_schema(lca=True))
+        store.append_sweep(self.samples, run_sweep(self.samples, chunk_size=100, workers=1, lca=True))
+        weight = store.column('total_motor_weight')
+        stack_ok = ~store.column('stacking_limit_exceeded_flag')
+
+        selected = store.filter(lambda chunk: ~chunk['stacking_limit_exceeded_flag'], columns=['total_motor_weight'],
+                                where_columns=['stacking_limit_exceeded_flag'], chunk_size=64)
+        np.testing.assert_array_equal(selected['total_motor_weight'], weight[stack_ok])
+
+        aggregate = store.aggregate('total_motor_weight', where=lambda chunk: ~chunk['stacking_limit_exceeded_flag'],
+                                    where_columns=['stacking_limit_exceeded_flag'], chunk_size=64)
+        self.assertEqual(aggregate['count'], stack_ok.sum())
+        self.assertAlmostEqual(aggregate['max'], weight[stack_ok].max())
+        self.assertAlmostEqual(aggregate['mean'], weight[stack_ok].mean())
+
+    def test_schema_mismatch(self):
+        ResultsStore(self.directory.name, get_results_schema(lca=False))
+        with self.assertRaises(ValueError):
+            ResultsStore(self.directory.name, get_results_schema(lca=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from sizing import run_manifest
+from sizing.design_sweep import size_sweep_chunk
+from sizing.material_database import MATERIALS, MATERIAL_INDEX, TOPOLOGY_INDEX
+from sizing.run_manifest import ContentAddressedRuns, get_row_hashes, get_table_row_hashes
+
+
+class RunManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.samples = {'max_torque': rng.uniform(100.0, 400.0, 300),
+                        'dl_ratio': rng.uniform(0.5, 3.0, 300),
+                        'PM_case': rng.random(300) < 0.6}
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_rerun_reuses_every_row(self):
+        runs = ContentAddressedRuns(self.directory.name)
+        results, manifest = runs.run(self.samples, chunk_size=64)
+        self.assertEqual((manifest['computed'], manifest['reused']), (300, 0))
+        expected = size_sweep_chunk(self.samples, lca=True)
+        for field, values in expected.items():
+            np.testing.assert_array_equal(results[field], values, field)
+
+        rerun, rerun_manifest = ContentAddressedRuns(self.directory.name).run(self.samples, chunk_size=1000)
+        self.assertEqual((rerun_manifest['computed'], rerun_manifest['reused']), (0, 300))
+        self.assertEqual(rerun_manifest, dict(manifest, computed=0, reused=300))
+        with open(os.path.join(self.directory.name, 'manifests', manifest['run'] + '.json')) as manifest_file:
+            self.assertEqual(json.load(manifest_file), rerun_manifest)
+
+        # same results in a fresh store, whatever the chunking
+        with tempfile.TemporaryDirectory() as directory:
+            _, fresh_manifest = ContentAddressedRuns(directory).run(self.samples, chunk_size=7)
+        self.assertEqual(fresh_manifest['results'], manifest['results'])
+
+    def test_only_changed_rows_are_sized(self):
+        runs = ContentAddressedRuns(self.directory.name, lca=False)
+        runs.run(self.samples)
+        changed = dict(self.samples, max_torque=self.samples['max_torque'].copy())
+        changed['max_torque'][:25] += 1.0
+        # rows 25-49 repeat the changed row 0, duplicates are sized once
+        changed['max_torque'][25:50] = changed['max_torque'][0]
+        changed['dl_ratio'] = changed['dl_ratio'].copy()
+        changed['dl_ratio'][25:50] = changed['dl_ratio'][0]
+        changed['PM_case'] = changed['PM_case'].copy()
+        changed['PM_case'][25:50] = changed['PM_case'][0]
+        results, manifest = runs.run(changed)
+        self.assertEqual((manifest['computed'], manifest['reused']), (25, 275))
+        self.assertEqual(len(runs.store), 325)
+        np.testing.assert_array_equal(results['total_motor_weight'],
+                                      size_sweep_chunk(changed)['total_motor_weight'])
+
+    def test_material_changes_only_invalidate_their_rows(self):
+        samples = dict(self.samples, magnet=np.where(np.arange(300) < 100, MATERIAL_INDEX['N42UH'],
+                                                     MATERIAL_INDEX['ferrite']))
+        hashes = get_row_hashes(samples)
+        np.testing.assert_array_equal(get_row_hashes(samples), hashes)
+        self.assertEqual(len(np.unique(hashes.view('V16'))), 300)
+
+        changed = MATERIALS.copy()
+        changed['density'][MATERIAL_INDEX['ferrite']] += 1.0
+        with mock.patch.object(run_manifest, 'MATERIALS', changed):
+            changed_hashes = get_row_hashes(samples)
+        # only the rows with ferrite magnets get new hashes
+        same = np.all(changed_hashes == hashes, axis=1)
+        np.testing.assert_array_equal(same, samples['magnet'] != MATERIAL_INDEX['ferrite'])
+        self.assertEqual(get_table_row_hashes(changed)[MATERIAL_INDEX['N42UH']].tolist(),
+                         get_table_row_hashes(MATERIALS)[MATERIAL_INDEX['N42UH']].tolist())
+
+        # -0.0 and 0.0 are the same input
+        self.assertTrue(np.array_equal(get_row_hashes({'max_torque': np.array([0.0, -0.0])})[0],
+                                       get_row_hashes({'max_torque': np.array([-0.0, 0.0])})[0]))
+        with self.assertRaises(ValueError):
+            get_row_hashes({'torque': 1.0})
+
+    def test_prune_keeps_only_the_current_model(self):
+        runs = ContentAddressedRuns(self.directory.name)
+        results, manifest = runs.run(self.samples)
+        lca_factors = run_manifest.EM_PEI_KG * 1.01
+        with mock.patch.object(run_manifest, 'EM_PEI_KG', lca_factors):
+            _, new_manifest = runs.run(self.samples)
+            self.assertEqual((new_manifest['computed'], len(runs.store)), (300, 600))
+            self.assertEqual(runs.prune(), 300)
+            self.assertEqual(len(runs.store), 300)
+            _, rerun_manifest = ContentAddressedRuns(self.directory.name).run(self.samples)
+        self.assertEqual(rerun_manifest['reused'], 300)
+        self.assertEqual(rerun_manifest['results'], new_manifest['results'])
+
+        # the superseded rows are gone, pruning to the earlier model empties the store
+        _, old_manifest = runs.run(self.samples)
+        self.assertEqual((old_manifest['computed'], old_manifest['results']), (300, manifest['results']))
+        self.assertEqual(runs.prune(new_manifest['model']['model']), 300)
+        self.assertEqual(len(runs.store), 300)
+        self.assertEqual(runs.prune(), 300)
+        self.assertEqual(len(runs.store), 0)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['manifests', 'results'])
+
+    def test_stored_inputs_are_those_of_the_topology(self):
+        runs = ContentAddressedRuns(self.directory.name, lca=False)
+        results, _ = runs.run({'max_torque': np.array([200.0, 250.0]), 'topology': TOPOLOGY_INDEX['induction']})
+        np.testing.assert_array_equal(results['PM_case'], [False, False])
+        np.testing.assert_array_equal(results['radial_case'], [True, True])
+        np.testing.assert_array_equal(results['topology_index'], TOPOLOGY_INDEX['induction'])
+        np.testing.assert_array_equal(results['conductor_index'], MATERIAL_INDEX['copper'])
+        # the PM_case flag of the samples does not change the rows of an explicit topology
+        np.testing.assert_array_equal(
+            get_row_hashes({'max_torque': 200.0, 'topology': TOPOLOGY_INDEX['induction'], 'PM_case': True}),
+            get_row_hashes({'max_torque': 200.0, 'topology': TOPOLOGY_INDEX['induction']}))
+
+
+if __name__ == '__main__':
+    unittest.main()
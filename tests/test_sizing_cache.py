@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator, \
+    ElectricMachineBom
+from lca.EM_production_environmental_impact import get_pei_matrix
+from sizing.motor_sizing_tool import MotorSizingTool
+from sizing import sizing_cache
+from sizing.sizing_cache import SizingCache
+
+
+def get_sizing_tool(max_torque=200.0, dl_ratio=1.0):
+    rotor = ConceptRotor(name='rotor')
+    rotor.dl_ratio = dl_ratio
+    return MotorSizingTool(ConceptMotorAssembly('motor', rotor, ConceptStator(name='stator')), max_torque=max_torque)
+
+
+class SizingCacheTestCase(unittest.TestCase):
+    def test_hit_restores_sized_state(self):
+        cache = SizingCache(maxsize=8)
+        reference = get_sizing_tool()
+        reference_mass = reference.size_motor()
+
+        cache.size_motor(get_sizing_tool())
+        sizing_tool = get_sizing_tool()
+        mass_result = cache.size_motor(sizing_tool)
+
+        self.assertEqual(cache.statistics.as_dict(), {'hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 0})
+        self.assertEqual(mass_result.total_motor_weight, reference_mass.total_motor_weight)
+        self.assertEqual(sizing_tool.electrical_motor_assembly.stator.outer_diameter,
+                         reference.electrical_motor_assembly.stator.outer_diameter)
+        self.assertEqual(sizing_tool.electrical_motor_assembly.rotor.shaft_diameter,
+                         reference.electrical_motor_assembly.rotor.shaft_diameter)
+        self.assertEqual(sizing_tool.power, reference.power)
+
+    def test_quantization_and_eviction(self):
+        cache = SizingCache(maxsize=2, quantization=1e-3)
+        cache.size_motor(get_sizing_tool(200.0))
+        cache.size_motor(get_sizing_tool(200.0001))
+        self.assertEqual(cache.statistics.hits, 1)
+        cache.size_motor(get_sizing_tool(210.0))
+        cache.size_motor(get_sizing_tool(220.0))
+        self.assertEqual(cache.statistics.evictions, 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_persistent_tier(self):
+        bom = ElectricMachineBom(name="test bom", electrical_steel=107, other_steel=10, aluminum=16, copper=10,
+                                 ndfeb=2.5, ferrite=0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sizing_cache')
+            with SizingCache(persistent_path=path) as cache:
+                self.assertEqual(cache.get_pei_matrix(bom), get_pei_matrix(bom))
+                cache.size_motor(get_sizing_tool())
+            with SizingCache(persistent_path=path) as cache:
+                self.assertEqual(cache.get_pei_matrix(bom), get_pei_matrix(bom))
+                cache.size_motor(get_sizing_tool())
+                self.assertEqual(cache.statistics.disk_hits, 2)
+                self.assertEqual(cache.statistics.misses, 0)
+            # a changed model does not read the entries of the old one
+            with mock.patch.object(sizing_cache, 'get_model_fingerprint', return_value='changed model'):
+                with SizingCache(persistent_path=path) as cache:
+                    cache.size_motor(get_sizing_tool())
+                    self.assertEqual(cache.statistics.disk_hits, 0)
+                    self.assertEqual(cache.statistics.misses, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from lca.EM_production_environmental_impact import EM_PEI_KG, get_pei_matrix
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.motor_sizing_tool import MotorSizingTool
+from sizing.sizing_graph import SizingGraph
+
+
+def make_sizing_tool(**kwargs):
+    return MotorSizingTool(ConceptMotorAssembly('motor', ConceptRotor('rotor'), ConceptStator('stator')), **kwargs)
+
+
+class SizingGraphTestCase(unittest.TestCase):
+    def assert_calls(self, graph, stages):
+        calls = dict(graph.stage_calls)
+        graph.evaluate()
+        ran = [stage for stage, count in graph.stage_calls.items() if count != calls[stage]]
+        self.assertEqual(ran, stages)
+
+    def assert_matches_full_sizing(self, graph, **kwargs):
+        tool = make_sizing_tool(**kwargs)
+        tool.electrical_motor_assembly.rotor.dl_ratio = graph.get('rotor.dl_ratio')
+        expected = tool.size_motor()
+        result = graph.evaluate()
+        self.assertEqual(result['mass_result'].get_bom_as_array(), expected.get_bom_as_array())
+        self.assertEqual(result['mass_result'].total_motor_weight, expected.total_motor_weight)
+        np.testing.assert_allclose(result['pei'], np.ravel(get_pei_matrix(expected)))
+
+    def test_only_affected_stages_rerun(self):
+        graph = SizingGraph(make_sizing_tool())
+        self.assert_calls(graph, [stage for stage, _, _ in SizingGraph.STAGES])
+        self.assert_calls(graph, [])
+
+        graph.set('tool.PM_case', False)
+        self.assert_calls(graph, ['material_size_wieght_cal', 'calc_pei'])
+        self.assert_matches_full_sizing(graph, PM_case=False)
+
+        graph.set('lca.impact_factors', EM_PEI_KG * 1.1)
+        self.assert_calls(graph, ['calc_pei'])
+
+        graph.set('tool.maximum_rotor_speed', 20000.0)
+        self.assert_calls(graph, ['calc_tip_speed'])
+        self.assertTrue(graph.sizing_tool.tip_speed_error_flag)
+
+        graph.set('tool.base_speed', 4000.0)
+        # the shaft diameter only depends on power / base_speed, so the change stops at the power
+        self.assert_calls(graph, ['calc_rotor_inner_diameter'])
+        self.assertAlmostEqual(graph.sizing_tool.power, 4000.0 * np.pi / 30 * 200.0)
+
+        # changed directly on the rotor
+        graph.sizing_tool.electrical_motor_assembly.rotor.dl_ratio = 1.5
+        self.assertEqual(graph.get_dirty_stages(), ['calc_rot_dimensions'])
+        self.assert_calls(graph, [stage for stage, _, _ in SizingGraph.STAGES])
+        graph.set('lca.impact_factors', EM_PEI_KG)
+        self.assert_matches_full_sizing(graph, PM_case=False, maximum_rotor_speed=20000.0, base_speed=4000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.sizing_service import LatencyStatistics, MicroBatcher, ServiceOverloaded, SizingService, generate_load, \
+    request_sizing
+
+
+class SizingServiceTestCase(unittest.TestCase):
+    def test_concurrent_requests_are_batched(self):
+        async def scenario():
+            batcher = MicroBatcher(window=0.05, fields=('total_motor_weight', 'climate_change'))
+            batcher.start()
+            try:
+                results = await asyncio.gather(*(batcher.submit({'dl_ratio': dl_ratio, 'PM_case': False})
+                                                 for dl_ratio in (0.5, 1.0, 2.0)))
+            finally:
+                await batcher.stop()
+            return results, batcher.statistics.report()
+
+        results, statistics = asyncio.run(scenario())
+        expected = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, np.array([0.5, 1.0, 2.0]), False)
+        self.assertEqual([result['total_motor_weight'] for result in results], expected['total_motor_weight'].tolist())
+        self.assertEqual(set(results[0]), {'total_motor_weight', 'climate_change'})
+        self.assertEqual(statistics['batches'], 1)
+        self.assertEqual(statistics['requests'], 3)
+
+    def test_invalid_request_does_not_fail_its_batch(self):
+        async def scenario():
+            batcher = MicroBatcher(window=0.05, fields=('total_motor_weight',))
+            batcher.start()
+            try:
+                return await asyncio.gather(batcher.submit({'max_torque': 250}),
+                                            batcher.submit({'max_torque': 'abc'}),
+                                            batcher.submit({'PM_case': 'yes'}),
+                                            batcher.submit({'dl_ratio': 2.0, 'PM_case': 0}),
+                                            return_exceptions=True)
+            finally:
+                await batcher.stop()
+
+        first, text, flag, last = asyncio.run(scenario())
+        self.assertIsInstance(text, ValueError)
+        self.assertIsInstance(flag, ValueError)
+        expected = size_motor_batch(np.array([250.0, 200.0]), 3000.0, 12000.0, 80.0, np.array([1.0, 2.0]),
+                                    np.array([True, False]))
+        self.assertEqual([first['total_motor_weight'], last['total_motor_weight']],
+                         expected['total_motor_weight'].tolist())
+
+        statistics = LatencyStatistics(history_size=4)
+        for _ in range(3):
+            statistics.add_batch(2, [0.1, 0.2])
+        self.assertEqual(len(statistics.latencies), 4)
+        self.assertEqual((statistics.report()['requests'], statistics.report()['batches']), (6, 3))
+
+    def test_backpressure(self):
+        async def scenario():
+            batcher = MicroBatcher(max_pending=2)
+            # not started, so the queue is not drained
+            pending = [asyncio.ensure_future(batcher.submit({})) for _ in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(ServiceOverloaded):
+                await batcher.submit({})
+            with self.assertRaises(ValueError):
+                await batcher.submit({'torque': 1.0})
+            batcher.start()
+            await asyncio.gather(*pending)
+            await batcher.stop()
+            return batcher.statistics.report()
+
+        self.assertEqual(asyncio.run(scenario())['rejected'], 1)
+
+    def test_service_and_load_generator(self):
+        async def scenario():
+            service = SizingService(port=0)
+            await service.start()
+            try:
+                response = await request_sizing(service.address, id=7, max_torque=300.0)
+                error = await request_sizing(service.address, speed=1.0)
+                load = await generate_load(service.address, clients=8, requests_per_client=10, seed=0)
+            finally:
+                await service.stop()
+            return response, error, load
+
+        response, error, load = asyncio.run(scenario())
+        self.assertEqual(response['id'], 7)
+        self.assertEqual(response['result']['total_motor_weight'],
+                         size_motor_batch(300.0, 3000.0, 12000.0, 80.0, 1.0)['total_motor_weight'][0])
+        self.assertIn('climate_change', response['result'])
+        self.assertIn('unknown inputs', error['error'])
+        self.assertEqual(load['requests'], 80)
+        self.assertEqual(load['errors'], 0)
+        self.assertLessEqual(load['p50'], load['p99'])
+        self.assertLess(load['service']['batches'], 81)
+
+
+if __name__ == '__main__':
+    unittest.main()
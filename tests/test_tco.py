@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from physical_objects.motors.concept_motor import ConceptMotorAssembly, ConceptRotor, ConceptStator
+from sizing.batch_sizing import get_bom_array_batch, size_motor_batch
+from sizing.motor_sizing_tool import MotorSizingTool
+from tco.EM_total_cost_of_ownership import ASSEMBLY_COST, EM_MATERIAL_PRICES, MANUFACTURING_OVERHEAD, \
+    PriceScenarios, calc_tco, calc_tco_batch, calc_tco_statistics, get_annual_energy
+
+
+class TcoTestCase(unittest.TestCase):
+    def test_single_scenario(self):
+        tool = MotorSizingTool(ConceptMotorAssembly('motor', ConceptRotor('rotor'), ConceptStator('stator')))
+        mass_result = tool.size_motor()
+        scenarios = PriceScenarios(electricity_price=0.2, discount_rate=0.0, lifetime_years=10)
+        tco = calc_tco(mass_result, 1000.0, scenarios)
+
+        material_cost = np.dot(np.ravel(mass_result.get_bom_as_array()), EM_MATERIAL_PRICES)
+        self.assertAlmostEqual(tco['material_cost'][0], material_cost)
+        self.assertAlmostEqual(tco['manufacturing_cost'][0], material_cost * (1 + MANUFACTURING_OVERHEAD) +
+                               ASSEMBLY_COST)
+        self.assertAlmostEqual(tco['operating_cost'][0], 2000.0)
+        self.assertAlmostEqual(tco['tco'][0], tco['manufacturing_cost'][0] + 2000.0)
+        self.assertAlmostEqual(get_annual_energy(3.6e6, 250), 250.0)
+
+    def test_batch_matches_loop_over_scenarios(self):
+        bom = get_bom_array_batch(size_motor_batch(np.linspace(100.0, 400.0, 300), 3000.0, 12000.0, 80.0, 1.0))
+        annual_energy = np.linspace(1000.0, 3000.0, 300)
+        scenarios = PriceScenarios.random(7, seed=2)
+        result = calc_tco_batch(bom, annual_energy, scenarios)
+        self.assertEqual(result['tco'].shape, (300, 7))
+        for scenario in range(len(scenarios)):
+            single = PriceScenarios(scenarios.material_prices[scenario], scenarios.electricity_price[scenario])
+            np.testing.assert_allclose(result['tco'][:, scenario],
+                                       calc_tco_batch(bom, annual_energy, single)['tco'][:, 0])
+
+        statistics = calc_tco_statistics(bom, annual_energy, scenarios, chunk_size=64)
+        np.testing.assert_allclose(statistics['mean'], result['tco'].mean(axis=1))
+        np.testing.assert_allclose(statistics['p95'], np.percentile(result['tco'], 95, axis=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import size_motor_batch
+from sizing.design_sweep import collect_sweep, run_sweep, size_sweep_chunk
+from sizing.loss_map import compute_operating_point_losses
+from sizing.material_database import TOPOLOGY_INDEX, get_material_index
+from sizing.thermal_network import END_WINDING, HOUSING, THERMAL_FIELDS, WINDING, WINDING_TEMPERATURE_LIMIT, \
+    calc_thermal_screening_batch, get_thermal_network_batch
+
+
+class ThermalNetworkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.average_shear_stress = np.array([40.0, 80.0, 120.0])
+        self.result = size_motor_batch(200.0, 3000.0, 12000.0, self.average_shear_stress, 1.0)
+        self.network = get_thermal_network_batch(self.result)
+        losses = compute_operating_point_losses(self.result['stator_outer_diameter'],
+                                                self.result['stator_inner_diameter'],
+                                                self.result['stator_stack_length'], self.result['shaft_diameter'],
+                                                200.0, 3000.0, 100.0, 3000.0, self.average_shear_stress)
+        self.loss_vector = self.network.get_loss_vector(losses)
+
+    def test_steady_state_energy_balance(self):
+        temperatures = self.network.steady_state(self.loss_vector)
+        heat_to_coolant = self.network.coolant_conductance[:, HOUSING] * \
+            (temperatures[:, HOUSING] - self.network.coolant_temperature)
+        np.testing.assert_allclose(heat_to_coolant, self.loss_vector.sum(axis=1), rtol=1e-10)
+        self.assertTrue(np.all(temperatures > self.network.coolant_temperature[:, None]))
+
+    def test_transient_approaches_steady_state(self):
+        history = self.network.transient(self.loss_vector, duration=60.0, time_step=1.0)
+        self.assertEqual(history.shape, (61, 3, 6))
+        np.testing.assert_array_equal(history[0], 65.0)
+        self.assertTrue(np.all(np.diff(history, axis=0) >= -1e-12))
+        final = self.network.transient(self.loss_vector, duration=2e5, time_step=100.0, record=False)
+        np.testing.assert_allclose(final, self.network.steady_state(self.loss_vector), rtol=1e-6)
+
+    def test_screening_in_sweep(self):
+        screening = calc_thermal_screening_batch(self.result, 200.0, 3000.0, self.average_shear_stress)
+        # a higher shear stress means a smaller motor with a higher current density
+        self.assertTrue(np.all(np.diff(screening['continuous_winding_temperature']) > 0))
+        self.assertTrue(np.all(screening['peak_winding_temperature'] > screening['continuous_winding_temperature']))
+        np.testing.assert_array_equal(screening['thermal_limit_exceeded_flag'],
+                                      screening['peak_winding_temperature'] > WINDING_TEMPERATURE_LIMIT)
+
+        swept = size_sweep_chunk({'average_shear_stress': self.average_shear_stress}, thermal=True)
+        for field in THERMAL_FIELDS:
+            np.testing.assert_array_equal(swept[field], screening[field], field)
+
+    def test_screening_with_worker_processes(self):
+        samples = {'average_shear_stress': np.tile(self.average_shear_stress, 4),
+                   'topology': np.repeat([TOPOLOGY_INDEX['IPM'], TOPOLOGY_INDEX['SynRel']], 6)}
+        swept = collect_sweep(run_sweep(samples, chunk_size=5, workers=2, fields=THERMAL_FIELDS, thermal=True))
+        expected = size_sweep_chunk(samples, thermal=True)
+        for field in THERMAL_FIELDS:
+            np.testing.assert_array_equal(swept[field], expected[field], field)
+
+    def test_screening_per_topology(self):
+        topology = np.array([TOPOLOGY_INDEX['IPM'], TOPOLOGY_INDEX['induction'], TOPOLOGY_INDEX['SynRel'],
+                             TOPOLOGY_INDEX['PMaSynRel']])
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, topology=topology)
+        screening = calc_thermal_screening_batch(result, 200.0, 3000.0, 80.0, magnet_temperature_limit=0.0,
+                                                 winding_temperature_limit=1000.0, topology=topology)
+        # only the designs with magnets are held to the magnet temperature limit
+        np.testing.assert_array_equal(screening['thermal_limit_exceeded_flag'], [True, False, False, True])
+
+        # the synchronous reluctance stators have a thinner yoke than the IPM one of the same size
+        geometry = [result[field][[0, 0]] for field in ('stator_outer_diameter', 'stator_inner_diameter',
+                                                        'stator_stack_length', 'shaft_diameter')]
+        losses = compute_operating_point_losses(*geometry, 200.0, 3000.0, 200.0, 3000.0,
+                                                topology=topology[[0, 2]], electrical_steel='NO20')
+        self.assertGreater(losses['yoke_iron_loss'][1], losses['yoke_iron_loss'][0])
+        default = compute_operating_point_losses(*geometry, 200.0, 3000.0, 200.0, 3000.0)
+        np.testing.assert_array_equal(losses['copper_loss'][0], default['copper_loss'][0])
+        self.assertLess(losses['mechanical_loss'][0], default['mechanical_loss'][0])
+
+    def test_screening_per_conductor(self):
+        conductor = np.array([get_material_index('copper'), get_material_index('aluminum conductor')])
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 80.0, 1.0, conductor=conductor)
+        network = get_thermal_network_batch(result, conductor=conductor)
+        copper = get_thermal_network_batch(result)
+        np.testing.assert_array_equal(network.conductance[0], copper.conductance[0])
+        np.testing.assert_allclose(network.conductance[1, WINDING, END_WINDING] /
+                                   copper.conductance[1, WINDING, END_WINDING], 237.0 / 400.0)
+        np.testing.assert_allclose(network.capacitance[1, WINDING] / copper.capacitance[1, WINDING], 900.0 / 385.0)
+
+        # the aluminium winding of the same stator has the higher resistance and runs hotter
+        screening = calc_thermal_screening_batch(result, 200.0, 3000.0, 80.0, conductor=conductor)
+        self.assertGreater(screening['continuous_winding_temperature'][1],
+                           screening['continuous_winding_temperature'][0])
+        swept = size_sweep_chunk({'conductor': conductor}, thermal=True)
+        for field in THERMAL_FIELDS:
+            np.testing.assert_array_equal(swept[field], screening[field], field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from sizing.batch_sizing import MASS_FIELDS, material_size_wieght_cal_batch, size_motor_batch
+from sizing.material_database import TOPOLOGIES, get_topology_index
+from sizing.topologies import TOPOLOGY_KERNELS, TopologyKernel, get_topology_kernel, register_topology
+
+
+class TopologyRegistryTestCase(unittest.TestCase):
+    def test_every_topology_has_a_kernel(self):
+        self.assertEqual(sorted(TOPOLOGY_KERNELS), list(range(len(TOPOLOGIES))))
+        self.assertEqual(get_topology_kernel(get_topology_index('SynRel')).name, 'SynRel')
+        with self.assertRaises(KeyError):
+            get_topology_kernel(len(TOPOLOGIES))
+
+    def test_kernel_needs_a_database_row(self):
+        with self.assertRaises(KeyError):
+            @register_topology
+            class AxialFluxKernel(TopologyKernel):
+                name = 'axial flux'
+        # kernels have to provide the rotor masses
+        with self.assertRaises(TypeError):
+            TopologyKernel()
+
+    def test_mixed_batch_matches_homogeneous_batches(self):
+        rng = np.random.default_rng(0)
+        topology = rng.integers(0, len(TOPOLOGIES), 1000)
+        max_torque = rng.uniform(100.0, 400.0, topology.size)
+        dl_ratio = rng.uniform(0.5, 3.0, topology.size)
+        mixed = size_motor_batch(max_torque, 3000.0, 12000.0, 80.0, dl_ratio, topology=topology)
+        for index in range(len(TOPOLOGIES)):
+            designs = topology == index
+            homogeneous = size_motor_batch(max_torque[designs], 3000.0, 12000.0, 80.0, dl_ratio[designs],
+                                           topology=index)
+            for field, values in homogeneous.items():
+                np.testing.assert_array_equal(mixed[field][designs], values, field)
+
+        masses = material_size_wieght_cal_batch(mixed['stator_outer_diameter'], mixed['stator_inner_diameter'],
+                                                mixed['shaft_diameter'], mixed['rotor_stack_length'],
+                                                mixed['rotor_inner_diameter'], True, True, topology=topology)
+        for field in MASS_FIELDS:
+            np.testing.assert_array_equal(masses[field], mixed[field], field)
+
+    def test_reluctance_machines(self):
+        result = size_motor_batch(200.0, 3000.0, 12000.0, 40.0, 1.0,
+                                  topology=[get_topology_index('SynRel'), get_topology_index('PMaSynRel')])
+        synrel = size_motor_batch(200.0, 3000.0, 12000.0, 40.0, 1.0, topology='SynRel')
+        np.testing.assert_array_equal(result['total_motor_weight'][:1], synrel['total_motor_weight'])
+        # no cage, the SynRel rotor has no magnets, the PMaSynRel rotor ferrite ones
+        np.testing.assert_array_equal(result['cage_weight'], 0.0)
+        self.assertEqual(result['pm_weight'][0], 0.0)
+        self.assertGreater(result['ferrite'][1], 0.0)
+        self.assertEqual(result['ndfeb'][1], 0.0)
+        # the barriers make the rotor lighter than the IPM rotor of the same size
+        ipm = size_motor_batch(200.0, 3000.0, 12000.0, 40.0, 1.0, topology='IPM')
+        self.assertLess(result['rotor_core_weight'][0], ipm['rotor_core_weight'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()